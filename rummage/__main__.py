@@ -28,7 +28,6 @@ if '' in sys.path:
 import os  # noqa: E402
 import argparse  # noqa: E402
 from .lib import __meta__  # noqa: E402
-from .lib.gui.app import rummage_app  # noqa: E402
 
 if sys.executable.endswith("pythonw.exe"):
     sys.stdout = open(os.devnull, "w")
@@ -44,12 +43,21 @@ def parse_arguments():
     parser.add_argument('--debug', action='store_true', default=False, help=argparse.SUPPRESS)
     parser.add_argument('--no-redirect', action='store_true', default=False, help=argparse.SUPPRESS)
     parser.add_argument('--path', default=None, help="Path to search.")
+    parser.epilog = "Run '%(prog)s search --help' to search from the command line without the GUI."
     return parser.parse_args(sys.argv[1:])
 
 
 def run():
     """Configure environment, start the app, and launch the appropriate frame."""
 
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        # Headless search: don't import the GUI.
+        from .lib import cli
+
+        return cli.main(sys.argv[2:])
+
+    from .lib.gui.app import rummage_app
+
     args = parse_arguments()
     app = rummage_app.RummageApp(args)
     app.MainLoop()
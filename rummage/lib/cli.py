@@ -0,0 +1,423 @@
+"""
+Rummage (command line).
+
+Licensed under MIT
+Copyright (c) 2011 - 2026 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from . import __meta__
+from . import rumcore
+
+REGEX_MODES = {
+    're': rumcore.RE_MODE,
+    'bre': rumcore.BRE_MODE,
+    'regex': rumcore.REGEX_MODE,
+    'bregex': rumcore.BREGEX_MODE
+}
+
+SIZE_UNITS = {
+    'K': 1e3,
+    'M': 1e6,
+    'G': 1e9,
+    'T': 1e12
+}
+
+LIMIT_COMPARE = ('gt', 'eq', 'lt')
+
+# Exit codes (same as grep)
+EXIT_MATCH = 0
+EXIT_NO_MATCH = 1
+EXIT_ERROR = 2
+
+
+def parse_limit(value, convert):
+    """Parse a `qualifier:value` limit."""
+
+    qualifier, _, limit = value.partition(':')
+    if qualifier not in LIMIT_COMPARE or not limit:
+        raise argparse.ArgumentTypeError(
+            "'%s' must be in the form of 'gt:value', 'eq:value', or 'lt:value'" % value
+        )
+    try:
+        return (qualifier, convert(limit))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def parse_size(value):
+    """Parse a size limit: `gt:10K`."""
+
+    def convert(limit):
+        """Convert size with optional unit to bytes."""
+
+        unit = limit[-1:].upper()
+        if unit in SIZE_UNITS:
+            return float(limit[:-1]) * SIZE_UNITS[unit]
+        return float(limit)
+
+    return parse_limit(value, convert)
+
+
+def parse_time(value):
+    """Parse a time limit in local time: `gt:2020-01-31T12:00:00`."""
+
+    return parse_limit(value, lambda limit: datetime.fromisoformat(limit).astimezone().timestamp())
+
+
+def parse_arguments(argv):
+    """Parse the search arguments."""
+
+    parser = argparse.ArgumentParser(
+        prog='%s search' % __meta__.__app__.lower(),
+        description='Search (and optionally replace) the content of files without the GUI.'
+    )
+    parser.add_argument('--version', action='version', version=('%(prog)s ' + __meta__.__version__))
+    parser.add_argument('pattern', help="Pattern to search for.")
+    parser.add_argument('path', help="File or folder to search.")
+
+    # Search options
+    group = parser.add_argument_group('search options')
+    group.add_argument(
+        '--regex-mode', choices=list(REGEX_MODES.keys()), default='re', help="Regular expression engine to use."
+    )
+    group.add_argument('-F', '--literal', action='store_true', help="Search for the pattern as a literal string.")
+    group.add_argument(
+        '-T', '--terms', action='store_true', help="Search for any of the terms, one per line, in the pattern file."
+    )
+    group.add_argument('-i', '--ignore-case', action='store_true', help="Search case insensitively.")
+    group.add_argument('-s', '--dotall', action='store_true', help="Dot matches newlines.")
+    group.add_argument('-u', '--unicode', action='store_true', help="Use Unicode character classes.")
+    group.add_argument('--format-replace', action='store_true', help="Use format style replace templates.")
+    group.add_argument('-r', '--replace', default=None, help="Replace matches with the given template.")
+    group.add_argument('-c', '--count', action='store_true', help="Only count the matches.")
+    group.add_argument('-l', '--boolean', action='store_true', help="Only report whether a file matches.")
+    group.add_argument('-m', '--max-count', type=int, default=None, help="Stop after the given number of matches.")
+    group.add_argument('-C', '--context', type=int, default=0, help="Lines of context before and after a match.")
+    group.add_argument('-B', '--before-context', type=int, default=None, help="Lines of context before a match.")
+    group.add_argument('-A', '--after-context', type=int, default=None, help="Lines of context after a match.")
+    group.add_argument('--truncate', action='store_true', help="Truncate long context lines.")
+    group.add_argument('--encoding', default=None, help="Force the encoding of all files.")
+    group.add_argument('--binary', action='store_true', help="Search binary files.")
+    group.add_argument(
+        '--no-share-encodings', action='store_true',
+        help="Detect the encoding of every file instead of sharing encodings between files like each other."
+    )
+    group.add_argument('--no-backup', action='store_true', help="Don't back up files on replace.")
+    group.add_argument('--backup-folder', action='store_true', help="Back up files to a folder on replace.")
+    group.add_argument('--backup-location', default=None, help="Backup file extension or folder name.")
+    group.add_argument(
+        '--backup-link', action='store_true',
+        help="Clone or hard link files as backups instead of copying them, where the file system allows it."
+    )
+    group.add_argument(
+        '--journal', default=None,
+        help="Folder to keep a journal of what a replace changes in, instead of backing up each file."
+    )
+    group.add_argument(
+        '--transaction', action='store_true',
+        help="Replace in every file or none, leaving every file as it was if one fails or the replace is stopped."
+    )
+    group.add_argument('-j', '--workers', type=int, default=None, help="Search files with worker processes.")
+    group.add_argument('--walkers', type=int, default=None, help="Walk folders with threads.")
+    group.add_argument(
+        '--snapshot', default=None, help="Folder to keep search snapshots in, so reruns only search changed files."
+    )
+    group.add_argument(
+        '--encoding-cache', default=None,
+        help="File to keep detected encodings in, so unchanged files aren't detected again."
+    )
+
+    # File options
+    group = parser.add_argument_group('file options')
+    group.add_argument('-R', '--recursive', action='store_true', help="Search sub-folders.")
+    group.add_argument('-f', '--file-pattern', default=None, help="Files to search.")
+    group.add_argument('--file-regex', action='store_true', help="File pattern is a regular expression.")
+    group.add_argument('-x', '--exclude', default=None, help="Folders to exclude.")
+    group.add_argument('--exclude-regex', action='store_true', help="Folder exclude is a regular expression.")
+    group.add_argument('--hidden', action='store_true', help="Search hidden files and folders.")
+    group.add_argument('--follow-links', action='store_true', help="Follow symlinks.")
+    group.add_argument(
+        '--ignore-files', action='store_true',
+        help="Skip files and folders ignored by .gitignore, .ignore, and .rummageignore files."
+    )
+    group.add_argument('--extmatch', action='store_true', help="Enable extended glob patterns.")
+    group.add_argument('--brace', action='store_true', help="Enable brace expansion in glob patterns.")
+    group.add_argument('--globstar', action='store_true', help="Match full paths with globstar (`**`) support.")
+    group.add_argument('--case-sensitive-files', action='store_true', help="Match file patterns case sensitively.")
+    group.add_argument('--limit', type=int, default=1000, help="Maximum number of patterns after brace expansion.")
+    group.add_argument('--size', type=parse_size, default=None, help="Size limit: 'gt:10K', 'lt:2M', or 'eq:0'.")
+    group.add_argument(
+        '--modified', type=parse_time, default=None, help="Modified time limit: 'gt:2020-01-31T12:00:00'."
+    )
+    group.add_argument(
+        '--created', type=parse_time, default=None, help="Creation time limit: 'lt:2020-01-31T12:00:00'."
+    )
+
+    # Output options
+    group = parser.add_argument_group('output options')
+    group.add_argument('--json', action='store_true', help="Output records as JSON Lines.")
+
+    return parser.parse_args(argv)
+
+
+def get_flags(args):
+    """Get the `rumcore` flags from the arguments."""
+
+    flags = rumcore.MULTILINE | rumcore.PIPELINE | rumcore.BYTE_SEARCH | rumcore.STREAM
+    regex_mode = REGEX_MODES[args.regex_mode]
+
+    if regex_mode in rumcore.REGEX_MODES:
+        flags |= rumcore.VERSION0
+    if args.terms:
+        flags |= rumcore.TERMS
+    elif args.literal:
+        flags |= rumcore.LITERAL
+    elif args.dotall:
+        flags |= rumcore.DOTALL
+    if args.unicode:
+        flags |= rumcore.UNICODE
+    elif regex_mode == rumcore.REGEX_MODE:
+        flags |= rumcore.ASCII
+    if args.ignore_case:
+        flags |= rumcore.IGNORECASE
+    if args.format_replace and regex_mode in rumcore.FORMAT_MODES:
+        flags |= rumcore.FORMATREPLACE
+
+    if args.count:
+        flags |= rumcore.COUNT_ONLY
+    if args.boolean:
+        flags |= rumcore.BOOLEAN
+    if args.truncate:
+        flags |= rumcore.TRUNCATE_LINES
+    if args.binary:
+        flags |= rumcore.PROCESS_BINARY
+    if not args.no_share_encodings:
+        flags |= rumcore.ENCODING_PRIORS
+    if not args.no_backup:
+        flags |= rumcore.BACKUP
+    if args.backup_folder:
+        flags |= rumcore.BACKUP_FOLDER
+    if args.backup_link:
+        flags |= rumcore.BACKUP_LINK
+    if args.journal:
+        flags |= rumcore.BACKUP_JOURNAL
+    if args.transaction:
+        flags |= rumcore.TRANSACTION
+
+    if args.recursive:
+        flags |= rumcore.RECURSIVE
+    if args.file_regex:
+        flags |= rumcore.FILE_REGEX_MATCH
+    if args.exclude_regex:
+        flags |= rumcore.DIR_REGEX_MATCH
+    if args.hidden:
+        flags |= rumcore.SHOW_HIDDEN
+    if args.follow_links:
+        flags |= rumcore.FOLLOW_LINKS
+    if args.ignore_files:
+        flags |= rumcore.IGNORE_FILES
+    if args.extmatch:
+        flags |= rumcore.EXTMATCH
+    if args.brace:
+        flags |= rumcore.BRACE
+    if args.globstar:
+        flags |= rumcore.GLOBSTAR | rumcore.FILEPATHNAME | rumcore.DIRPATHNAME
+    if args.case_sensitive_files:
+        flags |= rumcore.FILECASE
+
+    return flags
+
+
+def record_to_json(record):
+    """Convert a record to JSON."""
+
+    def convert(obj):
+        """Convert named tuples to dictionaries."""
+
+        if hasattr(obj, '_asdict'):
+            return {k: convert(v) for k, v in obj._asdict().items()}
+        elif isinstance(obj, (tuple, list)):
+            return [convert(v) for v in obj]
+        return obj
+
+    value = convert(record)
+    value['type'] = record.__class__.__name__
+    return json.dumps(value, ensure_ascii=False)
+
+
+def format_error(record):
+    """Format the error of a record."""
+
+    name = record.info.name if isinstance(record, rumcore.FileRecord) else getattr(record, 'name', None)
+    error = record.error[0].strip() if isinstance(record.error, (tuple, list)) else str(record.error)
+    return '%s: %s' % (name, error) if name else error
+
+
+class TextOutput:
+    """Output results in a `grep` like format."""
+
+    def __init__(self, out, count_only, boolean, replace):
+        """Initialize."""
+
+        self.out = out
+        self.count_only = count_only
+        self.boolean = boolean
+        self.replace = replace
+        self.current = None
+        self.count = 0
+
+    def flush(self):
+        """Output the per file summary of the last file."""
+
+        if self.current is not None and self.count:
+            if self.boolean:
+                self.out.write('%s\n' % self.current)
+            elif self.count_only or self.replace:
+                self.out.write('%s:%d\n' % (self.current, self.count))
+        self.current = None
+        self.count = 0
+
+    def write(self, record):
+        """Output a match record."""
+
+        name = record.info.name
+        if name != self.current:
+            self.flush()
+            self.current = name
+        self.count += 1
+
+        if not (self.boolean or self.count_only or self.replace):
+            match = record.match
+            lines = match.lines.rstrip('\r\n') if match.lines is not None else ''
+            self.out.write('%s:%d:%d:%s\n' % (name, match.lineno, match.colno, lines))
+
+
+class JsonOutput:
+    """Output results as JSON Lines."""
+
+    def __init__(self, out):
+        """Initialize."""
+
+        self.out = out
+
+    def flush(self):
+        """Nothing to flush."""
+
+    def write(self, record):
+        """Output a match record."""
+
+        self.out.write(record_to_json(record) + '\n')
+
+
+def stop(rummage, results):
+    """
+    Stop the search and let it wind down, throwing away what is left of the results.
+
+    The search finishes up once it is done, rolling back a transaction and saving the encoding cache,
+    which only happens if the results are gathered to the end.
+    """
+
+    rummage.kill()
+    for _ in results:
+        pass
+
+
+def search(args, out=None, err=None):
+    """Run the search and output the results."""
+
+    out = sys.stdout if out is None else out
+    err = sys.stderr if err is None else err
+
+    flags = get_flags(args)
+    replace = args.replace is not None
+    before = args.context if args.before_context is None else args.before_context
+    after = args.context if args.after_context is None else args.after_context
+
+    pattern = args.pattern
+    if args.terms:
+        try:
+            pattern = rumcore.read_terms(pattern)
+        except Exception as e:
+            err.write('%s: %s: %s\n' % (__meta__.__app__.lower(), pattern, e))
+            return EXIT_ERROR
+
+    if not os.path.exists(args.path):
+        err.write('%s: No such file or directory: %s\n' % (__meta__.__app__.lower(), args.path))
+        return EXIT_ERROR
+
+    search_chain = rumcore.Search(replace)
+    search_chain.add(pattern, args.replace, flags & rumcore.SEARCH_MASK)
+
+    rummage = rumcore.Rummage(
+        target=args.path,
+        searches=search_chain,
+        file_pattern=args.file_pattern,
+        folder_exclude=args.exclude,
+        limit=args.limit,
+        flags=flags & rumcore.FILE_MASK,
+        context=(before, after),
+        max_count=args.max_count,
+        encoding=args.encoding,
+        size=args.size,
+        modified=args.modified,
+        created=args.created,
+        backup_location=args.backup_location,
+        regex_mode=REGEX_MODES[args.regex_mode],
+        workers=args.workers,
+        walkers=args.walkers,
+        snapshot=args.snapshot,
+        encoding_cache=args.encoding_cache,
+        journal=args.journal
+    )
+
+    output = JsonOutput(out) if args.json else TextOutput(out, args.count, args.boolean, replace)
+    matched = False
+    errors = False
+    results = rummage.find()
+    try:
+        for record in results:
+            if record.error is not None:
+                errors = True
+                if args.json:
+                    output.write(record)
+                else:
+                    err.write('%s: %s\n' % (__meta__.__app__.lower(), format_error(record)))
+            elif isinstance(record, rumcore.FileRecord) and record.match is not None:
+                matched = True
+                output.write(record)
+        output.flush()
+    except KeyboardInterrupt:  # pragma: no cover
+        stop(rummage, results)
+        output.flush()
+    except BrokenPipeError:
+        # Whatever reads the output stopped early, as `head` does, so there is no one left to tell.
+        stop(rummage, results)
+        if out is sys.stdout:
+            # Keep Python from failing to flush the closed pipe on exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+    return EXIT_ERROR if errors and not matched else (EXIT_MATCH if matched else EXIT_NO_MATCH)
+
+
+def main(argv=None):
+    """Main entry point for command line searches."""
+
+    return search(parse_arguments(sys.argv[2:] if argv is None else argv))
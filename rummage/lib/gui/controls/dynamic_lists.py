@@ -297,6 +297,15 @@ class DynamicList(wx.ListCtrl, listmix.ColumnSorterMixin):
             self.last_idx_sized = idx
             self.size_sample -= 1
 
+    def remove_items(self, keys):
+        """Remove entries from the item map."""
+
+        keys = set(keys)
+        for key in keys:
+            del self.itemDataMap[key]
+        if keys:
+            self.itemIndexMap = [idx for idx in self.itemIndexMap if idx not in keys]
+
     def get_map_item(self, idx, col=0, absolute=False):
         """Get attribute in item map entry and the given index."""
 
@@ -338,6 +347,16 @@ class DynamicList(wx.ListCtrl, listmix.ColumnSorterMixin):
             self.size_sample = 0
             self.complete = True
 
+    def refresh_list(self):
+        """Refresh the list after items were added or removed, keeping it sorted."""
+
+        self.SetItemCount(len(self.itemDataMap))
+        if not self.sort_init:
+            column, order = self.GetSortState()
+            if column != -1:
+                self.SortListItems(column, order)
+        self.Refresh()
+
     def get_item_text(self, idx, col, absolute=False):
         """Return the text for the given item and col."""
 
@@ -350,6 +350,15 @@ class ResultFileList(CommonOperationsMixin, DynamicList):
                     obj.match.colno
                 )
 
+    def remove_file(self, name):
+        """Remove a file from the list, and return the number of matches it had."""
+
+        base, path = os.path.basename(name), os.path.dirname(name)
+        keys = [k for k, v in self.itemDataMap.items() if v[FILE_NAME] == base and v[FILE_PATH] == path]
+        count = sum(max(self.itemDataMap[k][FILE_MATCH], 1) for k in keys)
+        self.remove_items(keys)
+        return count
+
     def on_motion(self, event):
         """Display full file path in status bar on item mouseover."""
 
@@ -694,6 +703,12 @@ class ResultContentList(CommonOperationsMixin, DynamicList):
                 obj.info.encoding
             )
 
+    def remove_file(self, name):
+        """Remove the matches of a file from the list."""
+
+        location = (os.path.basename(name), os.path.dirname(name))
+        self.remove_items([k for k, v in self.itemDataMap.items() if v[CONTENT_PATH] == location])
+
     def OnGetItemImage(self, item):
         """Override method to get the image for the given item."""
 
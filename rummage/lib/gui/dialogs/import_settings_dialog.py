@@ -43,8 +43,8 @@ class ImportSettingsDialog(gui.ImportSettingsDialog):
     )
     STRING = ("backup_ext", "backup_folder", "term_notifier", "editor", "notify_method", "notify_sound")
     INTEGER = ("backup_type", "regex_mode", "regex_version", "patten_limit")
-    RE_LITERAL_FLAGS = re.compile(r'[iuf]*')
-    RE_REGEXP_FLAGS = re.compile(r'[iufsbewrpF]*')
+    RE_LITERAL_FLAGS = re.compile(r'[iuft]*')
+    RE_REGEXP_FLAGS = re.compile(r'[iufsbewrpFt]*')
     RE_STRING_REFS = re.compile(r'[\a\b\f\r\t\n\v]')
     RE_NAME = re.compile(r'[\w-]', re.UNICODE)
 
@@ -200,7 +200,7 @@ class ImportSettingsDialog(gui.ImportSettingsDialog):
             maximum = 1
         elif key == 'chardet_mode':
             minimum = 0
-            maximum = 2
+            maximum = 3
         if not self.is_integer(value, minimum, maximum):
             value = None
         return value
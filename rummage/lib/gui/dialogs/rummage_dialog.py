@@ -81,6 +81,7 @@ _COMPLETED = 0
 _RECORDS = 0
 _SKIPPED = 0
 _ERRORS = []
+_CHANGES = []
 _ABORT = False
 
 LIMIT_COMPARE = {
@@ -176,6 +177,8 @@ class RummageThread(threading.Thread):
         self.no_results = 0
         self.running = False
         self.file_search = len(args['chain']) == 0
+        self.watch = args['watch']
+        self.watching = False
 
         self.rummage = rumcore.Rummage(
             target=args['target'],
@@ -190,7 +193,9 @@ class RummageThread(threading.Thread):
             size=args['size_compare'],
             backup_location=args['backup_location'],
             regex_mode=args['regex_mode'],
-            encoding_options=args['encoding_options']
+            encoding_options=args['encoding_options'],
+            encoding_cache=args['encoding_cache'],
+            journal=args['journal']
         )
 
         threading.Thread.__init__(self)
@@ -229,6 +234,7 @@ class RummageThread(threading.Thread):
         global _RECORDS
         global _ERRORS
         global _SKIPPED
+        global _CHANGES
         with _LOCK:
             _RESULTS = []
             _COMPLETED = 0
@@ -250,6 +256,22 @@ class RummageThread(threading.Thread):
             self.update_status()
             wx.WakeUpIdle()
 
+        if self.watch and not _ABORT:
+            with _LOCK:
+                _CHANGES = []
+            self.update_benchmark()
+            self.runtime = self.BENCHMARK_STATUS % self.benchmark
+            self.watching = True
+            wx.WakeUpIdle()
+            self.rummage.watch(self.on_change)
+
+    def on_change(self, record):
+        """Queue up a file that changed while watching."""
+
+        with _LOCK:
+            _CHANGES.append(record)
+        wx.WakeUpIdle()
+
     def update_benchmark(self):
         """Update benchmark."""
         self.benchmark = time() - self.start
@@ -267,10 +289,11 @@ class RummageThread(threading.Thread):
         except Exception:
             error(traceback.format_exc())
 
-        self.update_benchmark()
-        runtime = self.BENCHMARK_STATUS % self.benchmark
+        # When watching, the benchmark is of the search that came before.
+        if not self.watching:
+            self.update_benchmark()
+            self.runtime = self.BENCHMARK_STATUS % self.benchmark
 
-        self.runtime = runtime
         self.running = False
         self.update_status()
         if _ABORT:
@@ -307,14 +330,18 @@ class RummageArgs:
         self.count_only = False
         self.unicode = False
         self.boolean = False
+        self.watch = False
         self.backup = True
         self.backup_folder = False
+        self.backup_link = False
+        self.backup_journal = False
         self.replace = None
         self.force_encode = None
         self.backup_location = None
         self.bestmatch = False
         self.enhancematch = False
         self.process_binary = False
+        self.ignore_files = False
         self.word = False
         self.reverse = False
         self.posix = False
@@ -380,6 +407,8 @@ class RummageFrame(gui.RummageFrame):
         except Exception:
             self.last_update_check = None
         self.allow_update = False
+        self.watch_started = False
+        self.watch_count = 0
         self.checking_updates = False
         self.imported_plugins = {}
         if start_path is None:
@@ -522,6 +551,15 @@ class RummageFrame(gui.RummageFrame):
         # Dialog messages
         self.MSG_REPLACE_WARN = _("Are you sure you want to replace all instances?")
         self.MSG_BACKUPS_DISABLED = _("Backups are currently disabled.")
+        self.MSG_NO_JOURNAL = _("There are no replace journals to restore.")
+        self.MSG_CHOOSE_JOURNAL = _("Choose the replace to restore or discard:")
+        self.MSG_RESTORE_JOURNAL = _(
+            "Restore the files this replace changed, or discard its journal and keep the files as they are?"
+        )
+        self.MSG_JOURNAL_RESTORED = _("The files were restored.")
+        self.JOURNAL_RUN = _("%s (%d files)")
+        self.RESTORE = _("Restore")
+        self.DISCARD = _("Discard")
 
         # Notifications
         self.NOTIFY_SEARCH_ABORTED = _("Search Aborted")
@@ -530,6 +568,11 @@ class RummageFrame(gui.RummageFrame):
 
         # ERRORS
         self.ERR_NO_LOG = _("Cannot find log file!")
+        self.ERR_RESTORE_JOURNAL = _(
+            "%d files could not be restored, as they were changed or removed since they were replaced!"
+            "  See the log for more info."
+        )
+        self.ERR_JOURNAL = _("There was a problem with the replace journal!  See the log for more info.")
         self.ERR_EMPTY_SEARCH = _("There is no search to save!")
         self.ERR_HTML_FAILED = _("There was a problem exporting the HTML!  See the log for more info.")
         self.ERR_CSV_FAILED = _("There was a problem exporting the CSV!  See the log for more info.")
@@ -553,6 +596,7 @@ class RummageFrame(gui.RummageFrame):
         self.INIT_STATUS = _("Searched: 0 Skipped: 0 Matches: 0")
         self.UPDATE_STATUS = _("Searched: %d Skipped: %d Matches: %d")
         self.FINAL_STATUS = _("Searched: %d Skipped: %d Matches: %d Benchmark: %s")
+        self.WATCH_STATUS = _("Searched: %d Skipped: %d Matches: %d Benchmark: %s Watching for changes")
 
         # Status bar popup
         self.SB_ERRORS = _("errors")
@@ -582,6 +626,7 @@ class RummageFrame(gui.RummageFrame):
         self.FORCE = _("Force")
         self.USE_CHAIN = _("Use chain search")
         self.USE_PLUGIN = _("Use plugin replace")
+        self.WATCH = _("Watch for changes")
         self.BESTMATCH = _("Best fuzzy match")
         self.FUZZY_FIT = _("Improve fuzzy fit")
         self.WORD = _("Unicode word breaks")
@@ -593,6 +638,7 @@ class RummageFrame(gui.RummageFrame):
         self.HIDDEN = _("Include hidden")
         self.SYMLINK = _("Follow symlinks")
         self.INCLUDE_BINARY = _("Include binary files")
+        self.IGNORE_FILES = _("Use ignore files")
         self.USE_REGEX = _("Regex")
         self.TEST_REGEX = _("Test Regex")
         self.SAVE_SEARCH = _("Save Search")
@@ -607,6 +653,7 @@ class RummageFrame(gui.RummageFrame):
         self.MENU_EXPORT_SETTINGS = _("Export Settings")
         self.MENU_IMPORT_SETTINGS = _("Import Settings")
         self.MENU_DELETE_BACKUPS = _("Delete Backups")
+        self.MENU_RESTORE_JOURNAL = _("Restore Replace Journal")
         self.MENU_FILE = _("File")
         self.MENU_VIEW = _("View")
         self.MENU_HELP = _("Help")
@@ -665,6 +712,7 @@ class RummageFrame(gui.RummageFrame):
             self.m_force_encode_choice.Append(x)
         self.m_chains_checkbox.SetLabel(self.USE_CHAIN)
         self.m_replace_plugin_checkbox.SetLabel(self.USE_PLUGIN)
+        self.m_watch_checkbox.SetLabel(self.WATCH)
         self.m_bestmatch_checkbox.SetLabel(self.BESTMATCH)
         self.m_enhancematch_checkbox.SetLabel(self.FUZZY_FIT)
         self.m_word_checkbox.SetLabel(self.WORD)
@@ -677,6 +725,7 @@ class RummageFrame(gui.RummageFrame):
         self.m_hidden_checkbox.SetLabel(self.HIDDEN)
         self.m_symlinks_checkbox.SetLabel(self.SYMLINK)
         self.m_binary_checkbox.SetLabel(self.INCLUDE_BINARY)
+        self.m_ignore_files_checkbox.SetLabel(self.IGNORE_FILES)
         self.m_dirregex_checkbox.SetLabel(self.USE_REGEX)
         self.m_fileregex_checkbox.SetLabel(self.USE_REGEX)
         self.m_regex_test_button.SetLabel(self.TEST_REGEX)
@@ -695,6 +744,7 @@ class RummageFrame(gui.RummageFrame):
         self.m_export_settings_menuitem.SetItemLabel(self.MENU_EXPORT_SETTINGS)
         self.m_import_settings_menuitem.SetItemLabel(self.MENU_IMPORT_SETTINGS)
         self.m_delete_backups_menuitem.SetItemLabel(self.MENU_DELETE_BACKUPS)
+        self.m_restore_journal_menuitem.SetItemLabel(self.MENU_RESTORE_JOURNAL)
         self.m_log_menuitem.SetItemLabel(self.MENU_OPEN_LOG)
         self.m_about_menuitem.SetItemLabel(self.MENU_ABOUT)
         self.m_update_menuitem.SetItemLabel(self.MENU_UPDATE)
@@ -830,6 +880,7 @@ class RummageFrame(gui.RummageFrame):
         self.m_unicode_checkbox.SetValue(Settings.get_search_setting("unicode_toggle", True))
         self.m_boolean_checkbox.SetValue(Settings.get_search_setting("boolean_toggle", False))
         self.m_count_only_checkbox.SetValue(Settings.get_search_setting("count_only_toggle", False))
+        self.m_watch_checkbox.SetValue(Settings.get_search_setting("watch_toggle", False))
         self.m_backup_checkbox.SetValue(Settings.get_search_setting("backup_toggle", True))
         self.m_force_encode_checkbox.SetValue(Settings.get_search_setting("force_encode_toggle", False))
         encode_val = util.normalize_encoding_name(Settings.get_search_setting("force_encode", "ASCII"))
@@ -850,6 +901,7 @@ class RummageFrame(gui.RummageFrame):
         self.m_symlinks_checkbox.SetValue(Settings.get_search_setting("symlink_toggle", False))
         self.m_subfolder_checkbox.SetValue(Settings.get_search_setting("recursive_toggle", True))
         self.m_binary_checkbox.SetValue(Settings.get_search_setting("binary_toggle", False))
+        self.m_ignore_files_checkbox.SetValue(Settings.get_search_setting("ignore_files_toggle", False))
         self.m_chains_checkbox.SetValue(Settings.get_search_setting("chain_toggle", False))
         self.m_replace_plugin_checkbox.SetValue(Settings.get_search_setting("replace_plugin_toggle", False))
 
@@ -1151,6 +1203,7 @@ class RummageFrame(gui.RummageFrame):
         self.last_update = 0.0
         self.m_grep_notebook.SetSelection(1)
         self.count = 0
+        self.watch_started = False
         self.m_result_file_list.reset_list()
         self.m_result_list.reset_list()
 
@@ -1174,7 +1227,9 @@ class RummageFrame(gui.RummageFrame):
                 if "f" in string:
                     flags |= rumcore.FULLCASE
 
-        if not regexp:
+        if "t" in string:
+            flags |= rumcore.TERMS
+        elif not regexp:
             flags |= rumcore.LITERAL
         elif "s" in string:
             flags |= rumcore.DOTALL
@@ -1208,7 +1263,10 @@ class RummageFrame(gui.RummageFrame):
     def get_flags(self, args):
         """Determine `rumcore` flags from `RummageArgs`."""
 
-        flags = rumcore.MULTILINE | rumcore.TRUNCATE_LINES
+        flags = rumcore.MULTILINE | rumcore.TRUNCATE_LINES | rumcore.PIPELINE | rumcore.BYTE_SEARCH | rumcore.STREAM
+
+        if Settings.get_share_encodings():
+            flags |= rumcore.ENCODING_PRIORS
 
         if args.regex_mode in rumcore.REGEX_MODES:
             if args.regex_version == 1:
@@ -1276,6 +1334,9 @@ class RummageFrame(gui.RummageFrame):
         if args.process_binary:
             flags |= rumcore.PROCESS_BINARY
 
+        if args.ignore_files:
+            flags |= rumcore.IGNORE_FILES
+
         if args.count_only:
             flags |= rumcore.COUNT_ONLY
 
@@ -1288,6 +1349,12 @@ class RummageFrame(gui.RummageFrame):
         if args.backup_folder:
             flags |= rumcore.BACKUP_FOLDER
 
+        if args.backup_link:
+            flags |= rumcore.BACKUP_LINK
+
+        if args.backup_journal:
+            flags |= rumcore.BACKUP_JOURNAL
+
         if args.regex_mode in rumcore.REGEX_MODES:
             if args.bestmatch:
                 flags |= rumcore.BESTMATCH
@@ -1321,7 +1388,7 @@ class RummageFrame(gui.RummageFrame):
                 replace_obj = None
 
             flags = self.chain_flags(search_obj['flags'], search_obj['is_regex'])
-            is_literal = (flags & rumcore.LITERAL)
+            is_literal = (flags & (rumcore.LITERAL | rumcore.TERMS))
 
             if replace_obj is not None:
                 if mode == rumcore.REGEX_MODE and (flags & rumcore.FORMATREPLACE) and not is_literal:
@@ -1330,7 +1397,7 @@ class RummageFrame(gui.RummageFrame):
                     replace_obj = util.preprocess_replace(replace_obj)
 
             search_chain.add(
-                search_obj['search'],
+                rumcore.read_terms(search_obj['search']) if flags & rumcore.TERMS else search_obj['search'],
                 replace_obj,
                 flags
             )
@@ -1386,8 +1453,12 @@ class RummageFrame(gui.RummageFrame):
         if args.regex_mode in rumcore.FORMAT_MODES:
             args.formatreplace = self.m_format_replace_checkbox.GetValue()
         args.boolean = self.m_boolean_checkbox.GetValue()
+        # Replaces would change the files they are watching.
+        args.watch = self.m_watch_checkbox.GetValue() and not replace
         args.backup = self.m_backup_checkbox.GetValue()
         args.backup_folder = bool(Settings.get_backup_type())
+        args.backup_link = Settings.get_backup_link()
+        args.backup_journal = Settings.get_backup_journal()
         args.force_encode = None
         if self.m_force_encode_checkbox.GetValue():
             args.force_encode = self.m_force_encode_choice.GetStringSelection()
@@ -1403,6 +1474,7 @@ class RummageFrame(gui.RummageFrame):
             args.process_binary = self.m_binary_checkbox.GetValue()
             args.show_hidden = self.m_hidden_checkbox.GetValue()
             args.follow_links = self.m_symlinks_checkbox.GetValue()
+            args.ignore_files = self.m_ignore_files_checkbox.GetValue()
             args.extmatch = bool(Settings.get_extmatch())
             args.brace_expansion = bool(Settings.get_brace_expansion())
             args.file_case_sensitive = bool(Settings.get_file_case_sensitive())
@@ -1503,7 +1575,10 @@ class RummageFrame(gui.RummageFrame):
             'size_compare': args.size_compare,
             'backup_location': args.backup_location,
             'regex_mode': args.regex_mode,
-            'encoding_options': args.encoding_options
+            'encoding_options': args.encoding_options,
+            'encoding_cache': Settings.get_encoding_cache() if Settings.get_remember_encodings() else None,
+            'journal': Settings.get_journal_folder(),
+            'watch': args.watch
         }
 
         # Save GUI history
@@ -1555,10 +1630,12 @@ class RummageFrame(gui.RummageFrame):
             ("hidden_toggle", args.show_hidden),
             ("symlink_toggle", args.follow_links),
             ("binary_toggle", args.process_binary),
+            ("ignore_files_toggle", args.ignore_files),
             ("regex_file_toggle", self.m_fileregex_checkbox.GetValue()),
             ("regex_dir_toggle", self.m_dirregex_checkbox.GetValue()),
             ("boolean_toggle", args.boolean),
             ("count_only_toggle", args.count_only),
+            ("watch_toggle", self.m_watch_checkbox.GetValue()),
             ("bestmatch_toggle", args.bestmatch),
             ("enhancematch_toggle", args.enhancematch),
             ("word_toggle", args.word),
@@ -1686,6 +1763,9 @@ class RummageFrame(gui.RummageFrame):
 
             self.count = count
 
+            if self.thread.watching and not is_complete:
+                self.update_watch(completed, skipped)
+
             # Run is finished or has been terminated
             if is_complete:
                 kill = self.kill
@@ -1700,43 +1780,94 @@ class RummageFrame(gui.RummageFrame):
                     global _ABORT
                     if _ABORT:
                         _ABORT = False
-                with _LOCK:
-                    errors = _ERRORS[:]
-                    del _ERRORS[:]
-                if errors:
-                    self.error_dlg = SearchErrorDialog(self, errors)
-                    self.m_statusbar.set_icon(
-                        self.SB_ERRORS,
-                        data.get_bitmap('error.png'),
-                        msg=self.SB_TOOLTIP_ERR % len(errors),
-                        click_left=self.on_error_click
+                if self.watch_started:
+                    # The search was wrapped up when the watch started.
+                    self.m_statusbar.set_status(
+                        self.FINAL_STATUS % (
+                            completed,
+                            skipped,
+                            self.watch_count,
+                            benchmark
+                        )
                     )
-                self.m_result_file_list.load_list(True)
-                self.m_result_list.load_list(True)
+                else:
+                    self.finish_search(completed, skipped, count, benchmark, kill)
                 self.debounce_search = False
                 self.allow_update = False
                 self.thread = None
 
-                self.m_statusbar.set_status(
-                    self.FINAL_STATUS % (
-                        completed,
-                        skipped,
-                        count,
-                        benchmark
-                    )
-                )
+            self.checking = False
 
-                if Settings.get_notify():
-                    message_type = 'error' if kill else 'info'
-                    getattr(notify, message_type)(
-                        (self.NOTIFY_SEARCH_ABORTED if kill else self.NOTIFY_SEARCH_COMPLETED),
-                        self.NOTIFY_MATCHES_FOUND % count,
-                        sound=Settings.get_alert()
-                    )
-                elif Settings.get_alert():
-                    notify.play_alert()
+    def finish_search(self, completed, skipped, count, benchmark, kill):
+        """Show the errors and final results of a search and notify that it is done."""
 
-            self.checking = False
+        with _LOCK:
+            errors = _ERRORS[:]
+            del _ERRORS[:]
+        if errors:
+            self.error_dlg = SearchErrorDialog(self, errors)
+            self.m_statusbar.set_icon(
+                self.SB_ERRORS,
+                data.get_bitmap('error.png'),
+                msg=self.SB_TOOLTIP_ERR % len(errors),
+                click_left=self.on_error_click
+            )
+        self.m_result_file_list.load_list(True)
+        self.m_result_list.load_list(True)
+
+        self.m_statusbar.set_status(
+            self.FINAL_STATUS % (
+                completed,
+                skipped,
+                count,
+                benchmark
+            )
+        )
+
+        if Settings.get_notify():
+            message_type = 'error' if kill else 'info'
+            getattr(notify, message_type)(
+                (self.NOTIFY_SEARCH_ABORTED if kill else self.NOTIFY_SEARCH_COMPLETED),
+                self.NOTIFY_MATCHES_FOUND % count,
+                sound=Settings.get_alert()
+            )
+        elif Settings.get_alert():
+            notify.play_alert()
+
+    def update_watch(self, completed, skipped):
+        """Update the result lists with the files that changed while watching."""
+
+        started = not self.watch_started
+        if started:
+            # The search is done, so wrap it up before showing the changes.
+            self.watch_started = True
+            self.watch_count = self.count
+            self.finish_search(completed, skipped, self.count, self.thread.runtime, False)
+
+        with _LOCK:
+            changes = _CHANGES[:]
+            del _CHANGES[:]
+        if not changes and not started:
+            return
+
+        for change in changes:
+            self.watch_count -= self.m_result_file_list.remove_file(change.name)
+            self.m_result_list.remove_file(change.name)
+            self.watch_count = self.update_table(
+                self.watch_count,
+                *[r for r in change.records if r.error is None and (self.no_pattern or r.match is not None)]
+            )
+        self.m_result_file_list.refresh_list()
+        self.m_result_list.refresh_list()
+
+        self.m_statusbar.set_status(
+            self.WATCH_STATUS % (
+                completed,
+                skipped,
+                self.watch_count,
+                self.thread.runtime
+            )
+        )
 
     def update_table(self, count, *results):
         """Update the result lists with current search results."""
@@ -1830,91 +1961,48 @@ class RummageFrame(gui.RummageFrame):
         """Validate search regex."""
 
         mode = Settings.get_regex_mode()
+        flags = rumcore.MULTILINE
         if mode in rumcore.REGEX_MODES:
-            import regex
-
-            engine = bregex if rumcore.BREGEX_MODE else regex
-            flags = engine.MULTILINE
             version = Settings.get_regex_version()
             if version == 1:
-                flags |= engine.VERSION1
-            else:
-                flags |= engine.VERSION0
-            if self.m_dotmatch_checkbox.GetValue():
-                flags |= engine.DOTALL
-            if not self.m_case_checkbox.GetValue():
-                flags |= engine.IGNORECASE
-            if self.m_unicode_checkbox.GetValue():
-                flags |= engine.UNICODE
+                flags |= rumcore.VERSION1
             else:
-                flags |= engine.ASCII
+                flags |= rumcore.VERSION0
+                if self.m_fullcase_checkbox.GetValue():
+                    flags |= rumcore.FULLCASE
             if self.m_bestmatch_checkbox.GetValue():
-                flags |= engine.BESTMATCH
+                flags |= rumcore.BESTMATCH
             if self.m_enhancematch_checkbox.GetValue():
-                flags |= engine.ENHANCEMATCH
+                flags |= rumcore.ENHANCEMATCH
             if self.m_word_checkbox.GetValue():
-                flags |= engine.WORD
+                flags |= rumcore.WORD
             if self.m_reverse_checkbox.GetValue():
-                flags |= engine.REVERSE
+                flags |= rumcore.REVERSE
             if self.m_posix_checkbox.GetValue():
-                flags |= engine.POSIX
-            if version == 0 and self.m_fullcase_checkbox.GetValue():
-                flags |= engine.FULLCASE
-        else:
-            engine = bre if mode == rumcore.BRE_MODE else re
-            flags = engine.MULTILINE
-            if self.m_dotmatch_checkbox.GetValue():
-                flags |= engine.DOTALL
-            if not self.m_case_checkbox.GetValue():
-                flags |= engine.IGNORECASE
-            if self.m_unicode_checkbox.GetValue():
-                flags |= engine.UNICODE
-        return self.validate_regex(self.m_searchfor_textbox.Value, flags)
+                flags |= rumcore.POSIX
+        if self.m_dotmatch_checkbox.GetValue():
+            flags |= rumcore.DOTALL
+        if not self.m_case_checkbox.GetValue():
+            flags |= rumcore.IGNORECASE
+        if self.m_unicode_checkbox.GetValue():
+            flags |= rumcore.UNICODE
+        elif mode == rumcore.REGEX_MODE:
+            flags |= rumcore.ASCII
+        return self.validate_chain_regex(self.m_searchfor_textbox.Value, flags)
 
     def validate_chain_regex(self, pattern, cflags):
-        """Validate chain regex."""
-
-        mode = Settings.get_regex_mode()
-        if mode in rumcore.REGEX_MODES:
-            import regex
+        """Validate chain regex by compiling it just as the search will, so the search can reuse it."""
 
-            engine = bregex if mode == rumcore.BREGEX_MODE else regex
-            flags = engine.MULTILINE
-            if cflags & rumcore.VERSION1:
-                flags |= engine.VERSION1
-            else:
-                flags |= engine.VERSION0
-            if cflags & rumcore.DOTALL:
-                flags |= engine.DOTALL
-            if cflags & rumcore.IGNORECASE:
-                flags |= engine.IGNORECASE
-            if cflags & rumcore.UNICODE:
-                flags |= engine.UNICODE
-            else:
-                flags |= engine.ASCII
-            if cflags & rumcore.BESTMATCH:
-                flags |= engine.BESTMATCH
-            if cflags & rumcore.ENHANCEMATCH:
-                flags |= engine.ENHANCEMATCH
-            if cflags & rumcore.WORD:
-                flags |= engine.WORD
-            if cflags & rumcore.REVERSE:
-                flags |= engine.REVERSE
-            if cflags & rumcore.POSIX:
-                flags |= engine.POSIX
-            if flags & engine.VERSION0 and cflags & rumcore.FULLCASE:
-                flags |= engine.FULLCASE
-        else:
-            engine = bre if mode == rumcore.BRE_MODE else re
-            flags = engine.MULTILINE
-            if cflags & rumcore.DOTALL:
-                flags |= engine.DOTALL
-            if cflags & rumcore.IGNORECASE:
-                flags |= engine.IGNORECASE
-            if cflags & rumcore.UNICODE:
-                flags |= engine.UNICODE
-
-        return self.validate_regex(pattern, flags)
+        try:
+            if cflags & rumcore.TERMS:
+                pattern = rumcore.read_terms(pattern)
+            rumcore.compile_search(pattern, cflags & rumcore.SEARCH_MASK, Settings.get_regex_mode())
+            return False
+        except Exception:
+            debug('Pattern: %s' % pattern)
+            debug('Flags: %s' % hex(cflags))
+            debug(traceback.format_exc())
+            return True
 
     def validate_regex(self, pattern, flags=0):
         """Validate regular expression compiling."""
@@ -2405,6 +2493,45 @@ class RummageFrame(gui.RummageFrame):
         dlg.ShowModal()
         dlg.Destroy()
 
+    def on_restore_journal(self, event):
+        """Restore or discard a replace run kept in the journal."""
+
+        location = Settings.get_journal_folder()
+        runs = rumcore.get_journal_runs(location)
+        if not runs:
+            infomsg(self.MSG_NO_JOURNAL)
+            return
+
+        choices = [
+            self.JOURNAL_RUN % (datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S'), count)
+            for _run, start, count in runs
+        ]
+        dlg = wx.SingleChoiceDialog(self, self.MSG_CHOOSE_JOURNAL, self.MENU_RESTORE_JOURNAL, choices)
+        selected = dlg.GetSelection() if dlg.ShowModal() == wx.ID_OK else None
+        dlg.Destroy()
+        if selected is None:
+            return
+
+        result = yesno_cancel(self.MSG_RESTORE_JOURNAL, yes=self.RESTORE, no=self.DISCARD)
+        if result == wx.ID_CANCEL:
+            return
+
+        run = runs[selected][0]
+        try:
+            if result == wx.ID_YES:
+                errors = rumcore.restore_journal_run(location, run)
+                for name, err in errors:
+                    error('Could not restore %s: %s' % (name, err))
+                if errors:
+                    errormsg(self.ERR_RESTORE_JOURNAL % len(errors))
+                else:
+                    infomsg(self.MSG_JOURNAL_RESTORED)
+            else:
+                rumcore.discard_journal_run(location, run)
+        except Exception:
+            error(traceback.format_exc())
+            errormsg(self.ERR_JOURNAL)
+
     def on_import_settings(self, event):
         """Import settings."""
 
@@ -74,6 +74,7 @@ class SaveSearchDialog(gui.SaveSearchDialog):
         self.SEARCH = _("Search")
         self.REPLACE = _("Replace")
         self.FLAGS = _("Flags")
+        self.TERMS = _("Term list")
         self.OVERWRITE = _("'%s' already exists. Overwrite?")
         self.ERR_NO_NAME = _("Please give the search a name!")
         self.ERR_INVALID_NAME = _("Names can only be Unicode word characters, '_', and '-'")
@@ -90,6 +91,7 @@ class SaveSearchDialog(gui.SaveSearchDialog):
         self.m_search_label.SetLabel(self.SEARCH)
         self.m_replace_label.SetLabel(self.REPLACE)
         self.m_flags_label.SetLabel(self.FLAGS)
+        self.m_terms_checkbox.SetLabel(self.TERMS)
 
         self.Fit()
 
@@ -119,6 +121,7 @@ class SaveSearchDialog(gui.SaveSearchDialog):
             self.m_flags_textbox.SetValue(flags)
         self.m_type_checkbox.SetValue(not self.is_regex)
         self.m_replace_plugin_checkbox.SetValue(self.is_plugin)
+        self.m_terms_checkbox.SetValue("t" in self.m_flags_textbox.GetValue())
 
     def get_flag_string(self):
         """Get flags in a string representation."""
@@ -207,6 +210,14 @@ class SaveSearchDialog(gui.SaveSearchDialog):
         obj = event.GetEventObject()
         obj.SetValue(not obj.GetValue())
 
+    def on_terms_toggle(self, event):
+        """Search the terms listed in the file the search names, or stop doing so."""
+
+        flags = self.m_flags_textbox.GetValue().replace("t", "")
+        if self.m_terms_checkbox.GetValue():
+            flags += "t"
+        self.m_flags_textbox.SetValue(flags)
+
     def on_cancel(self, event):
         """Close dialog."""
 
@@ -158,6 +158,10 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
         self.m_back_ext_textbox.SetValue(self.backup_ext)
         self.m_back_folder_textbox.SetValue(self.backup_folder)
         self.m_back2folder_checkbox.SetValue(bool(Settings.get_backup_type()))
+        self.m_back_link_checkbox.SetValue(Settings.get_backup_link())
+        self.m_back_journal_checkbox.SetValue(Settings.get_backup_journal())
+        self.m_encoding_cache_checkbox.SetValue(Settings.get_remember_encodings())
+        self.m_encoding_priors_checkbox.SetValue(Settings.get_share_encodings())
         self.m_back_ext_button.Enable(False)
         self.m_back_folder_button.Enable(False)
         self.m_pattern_limit_button.Enable(False)
@@ -283,6 +287,8 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
         self.BACK_EXT = _("Backup extension")
         self.BACK_FOLDER = _("Backup folder")
         self.BACK_2_FOLDER = _("Backup to folder")
+        self.BACK_LINK = _("Share data with backups")
+        self.BACK_JOURNAL = _("Keep backups in a journal")
         self.ERR_INVALID_EXT = _(
             "Invalid extension! Please enter a valid extension.\n\n"
             "Extensions must be alphanumeric and can contain\n"
@@ -303,10 +309,13 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
         self.PRERELEASES = _("Include pre-releases")
         self.CHECK_NOW = _("Check now")
         self.ENCODING = _("Encoding")
+        self.REMEMBER_ENCODINGS = _("Remember detected encodings")
+        self.SHARE_ENCODINGS = _("Share encodings between similar files")
         self.CHARDET_CHOICE = [
             _("Fastest"),
             _("chardet (pure python)"),
-            _("cchardet (C)")
+            _("cchardet (C)"),
+            _("Fast (start of file only)")
         ]
         self.ALERT_PLAYER = _("Alert player")
         self.SPECIAL = _("Special file types:")
@@ -352,6 +361,8 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
         self.m_back_ext_label.SetLabel(self.BACK_EXT)
         self.m_back_folder_label.SetLabel(self.BACK_FOLDER)
         self.m_back2folder_checkbox.SetLabel(self.BACK_2_FOLDER)
+        self.m_back_link_checkbox.SetLabel(self.BACK_LINK)
+        self.m_back_journal_checkbox.SetLabel(self.BACK_JOURNAL)
         self.m_close_button.SetLabel(self.CLOSE)
         self.m_back_ext_button.SetLabel(self.SAVE)
         self.m_back_folder_button.SetLabel(self.SAVE)
@@ -359,6 +370,8 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
         self.m_prerelease_checkbox.SetLabel(self.PRERELEASES)
         self.m_check_update_button.SetLabel(self.CHECK_NOW)
         self.m_filetype_label.SetLabel(self.SPECIAL)
+        self.m_encoding_cache_checkbox.SetLabel(self.REMEMBER_ENCODINGS)
+        self.m_encoding_priors_checkbox.SetLabel(self.SHARE_ENCODINGS)
         self.m_alt_row_checkbox.SetLabel(self.ALT_ROW_COLOR)
         self.m_autocomplete_checkbox.SetLabel(self.AUTOCOMPLETE)
 
@@ -366,10 +379,13 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
 
         encoding = Settings.get_chardet_mode()
         cchardet_available = Settings.is_cchardet_available()
-        options = self.CHARDET_CHOICE if cchardet_available else self.CHARDET_CHOICE[:1]
-        for x in options:
-            self.m_encoding_choice.Append(x)
-        self.m_encoding_choice.SetSelection(encoding)
+        self.chardet_modes = [rumcore.text_decode.CHARDET_DEFAULT]
+        if cchardet_available:
+            self.chardet_modes.extend([rumcore.text_decode.CHARDET_PYTHON, rumcore.text_decode.CHARDET_CLIB])
+        self.chardet_modes.append(rumcore.text_decode.CHARDET_FAST)
+        for x in self.chardet_modes:
+            self.m_encoding_choice.Append(self.CHARDET_CHOICE[x])
+        self.m_encoding_choice.SetSelection(self.chardet_modes.index(encoding))
 
         self.reload_list()
 
@@ -428,7 +444,17 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
     def on_chardet(self, event):
         """Handle `chardet` selection."""
 
-        Settings.set_chardet_mode(self.m_encoding_choice.GetCurrentSelection())
+        Settings.set_chardet_mode(self.chardet_modes[self.m_encoding_choice.GetCurrentSelection()])
+
+    def on_encoding_cache_toggle(self, event):
+        """Handle on change remember encodings."""
+
+        Settings.set_remember_encodings(self.m_encoding_cache_checkbox.GetValue())
+
+    def on_encoding_priors_toggle(self, event):
+        """Handle on change share encodings."""
+
+        Settings.set_share_encodings(self.m_encoding_priors_checkbox.GetValue())
 
     def on_check(self, event):
         """Check updates."""
@@ -606,6 +632,16 @@ class SettingsDialog(webview.WebViewMixin, gui.SettingsDialog):
 
         Settings.set_backup_type(int(self.m_back2folder_checkbox.GetValue()))
 
+    def on_back_link_toggle(self, event):
+        """Handle on change backup link."""
+
+        Settings.set_backup_link(self.m_back_link_checkbox.GetValue())
+
+    def on_back_journal_toggle(self, event):
+        """Handle on change backup journal."""
+
+        Settings.set_backup_journal(self.m_back_journal_checkbox.GetValue())
+
     def on_cancel(self, event):
         """Close on cancel."""
 
@@ -185,6 +185,9 @@ class RummageFrame ( wx.Frame ):
         self.m_replace_plugin_checkbox = wx.CheckBox( self.m_options_panel, wx.ID_ANY, u"Use plugin replace", wx.DefaultPosition, wx.DefaultSize, 0 )
         gbSizer2.Add( self.m_replace_plugin_checkbox, wx.GBPosition( 5, 1 ), wx.GBSpan( 1, 1 ), wx.ALL, 5 )
 
+        self.m_watch_checkbox = wx.CheckBox( self.m_options_panel, wx.ID_ANY, u"Watch for changes", wx.DefaultPosition, wx.DefaultSize, 0 )
+        gbSizer2.Add( self.m_watch_checkbox, wx.GBPosition( 5, 2 ), wx.GBSpan( 1, 1 ), wx.ALL, 5 )
+
 
         fgSizer9.Add( gbSizer2, 1, wx.EXPAND|wx.ALIGN_CENTER_HORIZONTAL, 5 )
 
@@ -317,9 +320,9 @@ class RummageFrame ( wx.Frame ):
         self.m_staticline41 = wx.StaticLine( self.m_limit_panel, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.LI_VERTICAL )
         gbSizer3.Add( self.m_staticline41, wx.GBPosition( 0, 4 ), wx.GBSpan( 3, 1 ), wx.ALL|wx.EXPAND|wx.RESERVE_SPACE_EVEN_IF_HIDDEN, 5 )
 
-        fgSizer32 = wx.FlexGridSizer( 0, 6, 0, 0 )
+        fgSizer32 = wx.FlexGridSizer( 0, 7, 0, 0 )
         fgSizer32.AddGrowableCol( 0 )
-        fgSizer32.AddGrowableCol( 5 )
+        fgSizer32.AddGrowableCol( 6 )
         fgSizer32.SetFlexibleDirection( wx.HORIZONTAL )
         fgSizer32.SetNonFlexibleGrowMode( wx.FLEX_GROWMODE_SPECIFIED )
 
@@ -339,6 +342,9 @@ class RummageFrame ( wx.Frame ):
         self.m_binary_checkbox = wx.CheckBox( self.m_limit_panel, wx.ID_ANY, u"Include binary files", wx.DefaultPosition, wx.DefaultSize, 0 )
         fgSizer32.Add( self.m_binary_checkbox, 0, wx.ALL, 5 )
 
+        self.m_ignore_files_checkbox = wx.CheckBox( self.m_limit_panel, wx.ID_ANY, u"Use ignore files", wx.DefaultPosition, wx.DefaultSize, 0 )
+        fgSizer32.Add( self.m_ignore_files_checkbox, 0, wx.ALL, 5 )
+
 
         fgSizer32.Add( ( 0, 0), 1, wx.EXPAND, 5 )
 
@@ -454,6 +460,9 @@ class RummageFrame ( wx.Frame ):
         self.m_delete_backups_menuitem = wx.MenuItem( self.m_file_menu, wx.ID_ANY, u"Delete Backups", wx.EmptyString, wx.ITEM_NORMAL )
         self.m_file_menu.Append( self.m_delete_backups_menuitem )
 
+        self.m_restore_journal_menuitem = wx.MenuItem( self.m_file_menu, wx.ID_ANY, u"Restore Replace Journal", wx.EmptyString, wx.ITEM_NORMAL )
+        self.m_file_menu.Append( self.m_restore_journal_menuitem )
+
         self.m_file_menu.AppendSeparator()
 
         self.m_quit_menuitem = wx.MenuItem( self.m_file_menu, wx.ID_EXit, u"&Exit", wx.EmptyString, wx.ITEM_NORMAL )
@@ -519,6 +528,7 @@ class RummageFrame ( wx.Frame ):
         self.Bind( wx.EVT_MENU, self.on_export_settings, id = self.m_export_settings_menuitem.GetId() )
         self.Bind( wx.EVT_MENU, self.on_import_settings, id = self.m_import_settings_menuitem.GetId() )
         self.Bind( wx.EVT_MENU, self.on_delete_backups, id = self.m_delete_backups_menuitem.GetId() )
+        self.Bind( wx.EVT_MENU, self.on_restore_journal, id = self.m_restore_journal_menuitem.GetId() )
         self.Bind( wx.EVT_MENU, self.on_exit, id = self.m_quit_menuitem.GetId() )
         self.Bind( wx.EVT_MENU, self.on_about, id = self.m_about_menuitem.GetId() )
         self.Bind( wx.EVT_MENU, self.on_check_update, id = self.m_update_menuitem.GetId() )
@@ -597,6 +607,9 @@ class RummageFrame ( wx.Frame ):
     def on_delete_backups( self, event ):
         event.Skip()
 
+    def on_restore_journal( self, event ):
+        event.Skip()
+
     def on_exit( self, event ):
         event.Skip()
 
@@ -1085,9 +1098,9 @@ class SettingsDialog ( wx.Dialog ):
         fgSizer43.Fit( self.m_search_panel )
         self.m_settings_notebook.AddPage( self.m_search_panel, u"Search", False )
         self.m_encoding_panel = wx.Panel( self.m_settings_notebook, wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, wx.TAB_TRAVERSAL )
-        fgSizer57 = wx.FlexGridSizer( 3, 1, 0, 0 )
+        fgSizer57 = wx.FlexGridSizer( 5, 1, 0, 0 )
         fgSizer57.AddGrowableCol( 0 )
-        fgSizer57.AddGrowableRow( 2 )
+        fgSizer57.AddGrowableRow( 4 )
         fgSizer57.SetFlexibleDirection( wx.BOTH )
         fgSizer57.SetNonFlexibleGrowMode( wx.FLEX_GROWMODE_SPECIFIED )
 
@@ -1108,6 +1121,12 @@ class SettingsDialog ( wx.Dialog ):
 
         fgSizer57.Add( fgSizer58, 1, wx.EXPAND, 5 )
 
+        self.m_encoding_cache_checkbox = wx.CheckBox( self.m_encoding_panel, wx.ID_ANY, u"Remember detected encodings", wx.DefaultPosition, wx.DefaultSize, 0 )
+        fgSizer57.Add( self.m_encoding_cache_checkbox, 0, wx.ALL, 5 )
+
+        self.m_encoding_priors_checkbox = wx.CheckBox( self.m_encoding_panel, wx.ID_ANY, u"Share encodings between similar files", wx.DefaultPosition, wx.DefaultSize, 0 )
+        fgSizer57.Add( self.m_encoding_priors_checkbox, 0, wx.ALL, 5 )
+
         self.m_filetype_label = wx.StaticText( self.m_encoding_panel, wx.ID_ANY, u"Special file types:", wx.DefaultPosition, wx.DefaultSize, 0 )
         self.m_filetype_label.Wrap( -1 )
 
@@ -1285,6 +1304,12 @@ class SettingsDialog ( wx.Dialog ):
         self.m_back2folder_checkbox = wx.CheckBox( self.m_backup_panel, wx.ID_ANY, u"Backup to folder", wx.DefaultPosition, wx.DefaultSize, 0 )
         fgSizer401.Add( self.m_back2folder_checkbox, 0, wx.ALL, 5 )
 
+        self.m_back_link_checkbox = wx.CheckBox( self.m_backup_panel, wx.ID_ANY, u"Share data with backups", wx.DefaultPosition, wx.DefaultSize, 0 )
+        fgSizer401.Add( self.m_back_link_checkbox, 0, wx.ALL, 5 )
+
+        self.m_back_journal_checkbox = wx.CheckBox( self.m_backup_panel, wx.ID_ANY, u"Keep backups in a journal", wx.DefaultPosition, wx.DefaultSize, 0 )
+        fgSizer401.Add( self.m_back_journal_checkbox, 0, wx.ALL, 5 )
+
 
         self.m_backup_panel.SetSizer( fgSizer401 )
         self.m_backup_panel.Layout()
@@ -1350,6 +1375,8 @@ class SettingsDialog ( wx.Dialog ):
         self.m_pattern_limit_textbox.Bind( wx.EVT_TEXT, self.on_pattern_limit_changed )
         self.m_pattern_limit_button.Bind( wx.EVT_BUTTON, self.on_pattern_limit_click )
         self.m_encoding_choice.Bind( wx.EVT_CHOICE, self.on_chardet )
+        self.m_encoding_cache_checkbox.Bind( wx.EVT_CHECKBOX, self.on_encoding_cache_toggle )
+        self.m_encoding_priors_checkbox.Bind( wx.EVT_CHECKBOX, self.on_encoding_priors_toggle )
         self.m_editor_text.Bind( wx.EVT_TEXT, self.on_editor_changed )
         self.m_editor_button.Bind( wx.EVT_BUTTON, self.on_editor_change )
         self.m_visual_alert_checkbox.Bind( wx.EVT_CHECKBOX, self.on_notify_toggle )
@@ -1363,6 +1390,8 @@ class SettingsDialog ( wx.Dialog ):
         self.m_back_folder_textbox.Bind( wx.EVT_TEXT, self.on_back_folder_changed )
         self.m_back_folder_button.Bind( wx.EVT_BUTTON, self.on_back_folder_click )
         self.m_back2folder_checkbox.Bind( wx.EVT_CHECKBOX, self.on_back2folder_toggle )
+        self.m_back_link_checkbox.Bind( wx.EVT_CHECKBOX, self.on_back_link_toggle )
+        self.m_back_journal_checkbox.Bind( wx.EVT_CHECKBOX, self.on_back_journal_toggle )
         self.m_close_button.Bind( wx.EVT_BUTTON, self.on_cancel )
 
     def __del__( self ):
@@ -1445,6 +1474,12 @@ class SettingsDialog ( wx.Dialog ):
     def on_chardet( self, event ):
         event.Skip()
 
+    def on_encoding_cache_toggle( self, event ):
+        event.Skip()
+
+    def on_encoding_priors_toggle( self, event ):
+        event.Skip()
+
     def on_editor_changed( self, event ):
         event.Skip()
 
@@ -1484,6 +1519,12 @@ class SettingsDialog ( wx.Dialog ):
     def on_back2folder_toggle( self, event ):
         event.Skip()
 
+    def on_back_link_toggle( self, event ):
+        event.Skip()
+
+    def on_back_journal_toggle( self, event ):
+        event.Skip()
+
     def on_cancel( self, event ):
         event.Skip()
 
@@ -2195,6 +2236,9 @@ class SaveSearchDialog ( wx.Dialog ):
         self.m_replace_plugin_checkbox = wx.CheckBox( self.m_save_panel, wx.ID_ANY, u"Replace plugin", wx.DefaultPosition, wx.DefaultSize, 0 )
         gbSizer5.Add( self.m_replace_plugin_checkbox, wx.GBPosition( 7, 0 ), wx.GBSpan( 1, 2 ), wx.ALL, 5 )
 
+        self.m_terms_checkbox = wx.CheckBox( self.m_save_panel, wx.ID_ANY, u"Term list", wx.DefaultPosition, wx.DefaultSize, 0 )
+        gbSizer5.Add( self.m_terms_checkbox, wx.GBPosition( 8, 0 ), wx.GBSpan( 1, 2 ), wx.ALL, 5 )
+
 
         gbSizer5.AddGrowableCol( 1 )
         gbSizer5.AddGrowableRow( 0 )
@@ -2239,6 +2283,7 @@ class SaveSearchDialog ( wx.Dialog ):
         # Connect Events
         self.m_type_checkbox.Bind( wx.EVT_CHECKBOX, self.on_toggle )
         self.m_replace_plugin_checkbox.Bind( wx.EVT_CHECKBOX, self.on_toggle )
+        self.m_terms_checkbox.Bind( wx.EVT_CHECKBOX, self.on_terms_toggle )
         self.m_apply_button.Bind( wx.EVT_BUTTON, self.on_apply )
         self.m_cancel_button.Bind( wx.EVT_BUTTON, self.on_cancel )
 
@@ -2251,6 +2296,9 @@ class SaveSearchDialog ( wx.Dialog ):
         event.Skip()
 
 
+    def on_terms_toggle( self, event ):
+        event.Skip()
+
     def on_apply( self, event ):
         event.Skip()
 
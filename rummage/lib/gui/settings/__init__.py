@@ -37,6 +37,8 @@ from .. import util
 DEV_MODE = False
 SETTINGS_FILE = "rummage_dev.settings" if DEV_MODE else "rummage.settings"
 CACHE_FILE = "rummage_dev.cache" if DEV_MODE else "rummage.cache"
+ENCODING_CACHE_FILE = "rummage_dev.encodings" if DEV_MODE else "rummage.encodings"
+JOURNAL_FOLDER = "rummage_dev.journal" if DEV_MODE else "rummage.journal"
 LOG_FILE = "rummage.log"
 FIFO = "rummage.fifo"
 
@@ -74,6 +76,8 @@ DEFAULT_SETTINGS = {
     "backup_ext": "rum-bak",
     "backup_folder": ".rum-bak",
     "backup_type": BACKUP_FILE,
+    "backup_link": False,
+    "backup_journal": False,
     "brace_expansion": False,
     "chains": {},
     "check_prerelease": False,
@@ -102,6 +106,8 @@ DEFAULT_SETTINGS = {
     "pos_cols_file": [],
     "regex_mode": rumcore.RE_MODE,
     "regex_version": 0,
+    "remember_encodings": True,
+    "share_encodings": True,
     "saved_searches": {},
     "single_instance": False,
     "term_notifier": ""
@@ -209,7 +215,7 @@ class Settings:
     def _set_chardet_mode(cls, value):
         """Set `chardet` mode."""
 
-        if not cls.is_cchardet_available() or value > text_decode.CHARDET_CLIB:
+        if value != text_decode.CHARDET_FAST and (not cls.is_cchardet_available() or value > text_decode.CHARDET_CLIB):
             value = text_decode.CHARDET_DEFAULT
         if 'encoding_options' not in cls.settings:
             cls.settings['encoding_options'] = copy.deepcopy(text_decode.DEFAULT_ENCODING_OPTIONS)
@@ -221,7 +227,7 @@ class Settings:
 
         cls.reload_settings()
         value = cls.settings.get('encoding_options', {}).get('chardet_mode', text_decode.CHARDET_DEFAULT)
-        if text_decode.CCDetect is None or value > text_decode.CHARDET_CLIB:
+        if value != text_decode.CHARDET_FAST and (text_decode.CCDetect is None or value > text_decode.CHARDET_CLIB):
             value = text_decode.CHARDET_DEFAULT
         return value
 
@@ -1268,6 +1274,48 @@ class Settings:
 
         cls.settings['backup_type'] = value
 
+    @classmethod
+    def get_backup_link(cls):
+        """Get whether backups should share the data of the files instead of copying it."""
+
+        cls.reload_settings()
+        return cls.settings.get('backup_link', False)
+
+    @classmethod
+    def set_backup_link(cls, value):
+        """Set backup link."""
+
+        cls.reload_settings()
+        cls._set_backup_link(value)
+        cls.save_settings()
+
+    @classmethod
+    def _set_backup_link(cls, value):
+        """Set backup link."""
+
+        cls.settings['backup_link'] = bool(value)
+
+    @classmethod
+    def get_backup_journal(cls):
+        """Get whether replaces should keep their backups in a journal instead of backing up each file."""
+
+        cls.reload_settings()
+        return cls.settings.get('backup_journal', False)
+
+    @classmethod
+    def set_backup_journal(cls, value):
+        """Set backup journal."""
+
+        cls.reload_settings()
+        cls._set_backup_journal(value)
+        cls.save_settings()
+
+    @classmethod
+    def _set_backup_journal(cls, value):
+        """Set backup journal."""
+
+        cls.settings['backup_journal'] = bool(value)
+
     @classmethod
     def get_backup_ext(cls):
         """Get backup extension."""
@@ -1289,6 +1337,60 @@ class Settings:
 
         cls.settings['backup_ext'] = value
 
+    @classmethod
+    def get_remember_encodings(cls):
+        """Get whether detected encodings should be remembered, so unchanged files aren't detected again."""
+
+        cls.reload_settings()
+        return cls.settings.get('remember_encodings', True)
+
+    @classmethod
+    def set_remember_encodings(cls, value):
+        """Set remember encodings."""
+
+        cls.reload_settings()
+        cls._set_remember_encodings(value)
+        cls.save_settings()
+
+    @classmethod
+    def _set_remember_encodings(cls, value):
+        """Set remember encodings."""
+
+        cls.settings['remember_encodings'] = bool(value)
+
+    @classmethod
+    def get_share_encodings(cls):
+        """Get whether files in the same folder with the same extension should share an encoding they agree on."""
+
+        cls.reload_settings()
+        return cls.settings.get('share_encodings', True)
+
+    @classmethod
+    def set_share_encodings(cls, value):
+        """Set share encodings."""
+
+        cls.reload_settings()
+        cls._set_share_encodings(value)
+        cls.save_settings()
+
+    @classmethod
+    def _set_share_encodings(cls, value):
+        """Set share encodings."""
+
+        cls.settings['share_encodings'] = bool(value)
+
+    @classmethod
+    def get_encoding_cache(cls):
+        """Get the file detected encodings are kept in."""
+
+        return os.path.join(cls.config_folder, ENCODING_CACHE_FILE)
+
+    @classmethod
+    def get_journal_folder(cls):
+        """Get the folder the journals of replace runs are kept in."""
+
+        return os.path.join(cls.config_folder, JOURNAL_FOLDER)
+
     @classmethod
     def get_backup_folder(cls):
         """Get backup folder."""
@@ -1640,6 +1742,10 @@ class Settings:
             cls._set_backup_ext(obj['backup_ext'])
         if 'backup_type' in obj:
             cls._set_backup_type(obj['backup_type'])
+        if 'backup_link' in obj:
+            cls._set_backup_link(obj['backup_link'])
+        if 'backup_journal' in obj:
+            cls._set_backup_journal(obj['backup_journal'])
 
         # Updates
         if 'check_updates' in obj:
@@ -1651,6 +1757,10 @@ class Settings:
             if 'chardet_mode' in obj['encoding_options']:
                 cls._set_chardet_mode(obj['encoding_options']['chardet_mode'])
             cls._set_encoding_ext(obj['encoding_options'])
+        if 'remember_encodings' in obj:
+            cls._set_remember_encodings(obj['remember_encodings'])
+        if 'share_encodings' in obj:
+            cls._set_share_encodings(obj['share_encodings'])
 
         # File matching
         if 'extmatch' in obj:
@@ -21,15 +21,35 @@ IN THE SOFTWARE.
 """
 import sys
 import codecs
+import errno
+import io
 import mmap
 import os
 import re
 import shutil
+import stat
+import pickle
+import queue
+import threading
+import multiprocessing
+import functools
+import importlib.util
+import array
+import bisect
+from concurrent import futures
 from collections import namedtuple
 from time import ctime
 from backrefs import bre
 from collections import deque
 from . import text_decode
+from . import pattern_info
+from . import aho_corasick
+from . import snapshot as _snapshot
+from . import encoding_cache as _encoding_cache
+from . import watch as _watch
+from . import ignore as _ignore
+from . import writer as _writer
+from . import journal as _journal
 from wcmatch import wcmatch
 from . import util
 try:
@@ -38,6 +58,8 @@ try:
     REGEX_SUPPORT = True
 except ImportError:  # pragma: no cover
     REGEX_SUPPORT = False
+# `numpy` is slow to import, so it is only found here and imported the first time bytes are indexed.
+NUMPY_SUPPORT = importlib.util.find_spec('numpy') is not None
 
 # Common regex flags (re|regex)
 IGNORECASE = 0x1  # (?i)
@@ -59,6 +81,7 @@ POSIX = 0x2000          # (?p)
 
 # `Rumcore` search related flags
 LITERAL = 0x10000           # Literal search
+TERMS = 0x4000              # Search for any of the literal terms in a newline separated list
 
 # `Rumcore` related flags
 BUFFER_INPUT = 0x20000      # Input is a buffer
@@ -73,6 +96,9 @@ TRUNCATE_LINES = 0x2000000  # Truncate context lines to 120 chars
 BACKUP = 0x4000000          # Backup files on replace
 BACKUP_FOLDER = 0x8000000   # Backup to folder
 FOLLOW_LINKS = 0x10000000   # Follow symlinks
+PIPELINE = 0x20000000       # Overlap directory walking, encoding detection, and searching
+BYTE_SEARCH = 0x40000000    # Search ASCII compatible files as bytes when the patterns allow it
+STREAM = 0x80000000         # Search large text files a window at a time
 
 # Fnmatch/Glob flags
 EXTMATCH = 0x100000000       # Match with extended patterns +(...) etc.
@@ -84,6 +110,11 @@ GLOBSTAR = 0x2000000000      # Use globstar (**) in full paths
 MATCHBASE = 0x4000000000     # Match base names when no slashes are present (full path)
 MINUSNEGATE = 0x8000000000   # Use - instead of ! for exclusion patterns.
 NUMRANGE = 0x10000000000     # ZSH style number ranges.
+IGNORE_FILES = 0x20000000000  # Skip what `.gitignore`, `.ignore`, and `.rummageignore` files ignore
+ENCODING_PRIORS = 0x40000000000  # Verify the encoding files like it share instead of detecting it
+BACKUP_LINK = 0x80000000000  # Clone or hard link files as backups instead of copying them
+BACKUP_JOURNAL = 0x100000000000  # Keep what replaces change in a journal for the run instead of backing up files
+TRANSACTION = 0x200000000000  # Replace every file at the end of the run, or none if a file fails or the run is stopped
 
 RE_MODE = 0
 BRE_MODE = 1
@@ -91,7 +122,7 @@ REGEX_MODE = 2
 BREGEX_MODE = 3
 
 SEARCH_MASK = 0x1FFFF
-FILE_MASK = 0x1FFFFFE0000
+FILE_MASK = 0x3FFFFFFE0000
 FNMATCH_FLAGS = 0x1FF00000000
 
 RE_MODES = (RE_MODE, BRE_MODE)
@@ -113,6 +144,64 @@ _U16LE = frozenset(('utf-16le', 'utf_16_le'))
 _U8 = frozenset(('u8', 'utf', 'utf8', 'utf_8', 'utf_8_sig', 'utf-8-sig'))
 
 RE_LINE_ENDINGS = re.compile(r'(?:\r\n|\r|\n)')
+RE_BYTE_LINE_ENDINGS = re.compile(br'(?:\r\n|\r|\n)')
+
+# Encodings where each character has exactly one encoding, so encoded literals can be searched for in the raw bytes
+RE_LITERAL_ENCODINGS = re.compile(r'^(?:ascii|utf-8(?:-sig)?|utf-(?:16|32)-(?:le|be)|latin-1)$')
+
+# Encodings that might be single byte codecs, which can be searched for in the raw bytes if no two bytes are
+# the same character. Multibyte codecs, like `cp932`, have characters with more than one encoding, so are excluded.
+RE_SINGLE_BYTE_ENCODINGS = re.compile(r'^(?:iso8859-\d+|cp\d+|mac-[\w-]+|koi8-\w+)$')
+
+# Encodings whose files can be searched as bytes
+RE_BYTE_ENCODINGS = re.compile(r'^(?:ascii|utf-8|iso8859-1|cp125[0-8])$')
+RE_NON_ASCII = re.compile(b'[\x80-\xff]')
+
+# Replace templates that expand the same from the raw bytes, as they only hold group references and escaped slashes
+RE_BYTE_TEMPLATE = re.compile(r'^(?:[^\\]|\\(?:[1-9][0-9]?|g<\w+>|\\))*$')
+RE_TEMPLATE_GROUP = re.compile(r'\\(?:([1-9][0-9]?)|g<(\w+)>|(\\))')
+
+# `UTF-8` continuation bytes, which don't start a new character
+UTF8_CONTINUATION = bytes(range(0x80, 0xc0))
+
+# Size of the chunks byte searched files are validated and measured in
+BYTE_CHUNK = 0x100000
+
+# Number of characters scanned for line endings at a time
+LINE_CHUNK = 0x40000
+
+# Text files at least this size are searched a window at a time when streaming
+STREAM_SIZE = 0x2000000
+
+# Files at least this size are patched in place when each replacement is as long as its match
+PATCH_SIZE = 0x1000000
+
+# Number of bytes decoded for each window when streaming
+STREAM_WINDOW = 0x400000
+
+# Number of characters windows overlap when streaming, which is the longest match that is sure to be found
+STREAM_OVERLAP = 0x10000
+
+# Number of files sent to a worker process at a time
+PARALLEL_BATCH = 32
+
+# Number of records a pipeline stage can queue up before it waits on the next stage
+PIPELINE_QUEUE = 256
+
+# Number of prepared files that can wait on the search stage, each of which holds its file open
+PIPELINE_OPEN = 32
+
+# Seconds between checks of everything that is watched when changes can't be waited on
+WATCH_INTERVAL = 1.0
+
+# Seconds to wait on changes at a time, so a watch can be stopped promptly
+WATCH_WAIT = 0.1
+
+# The private members of `wcmatch.WcMatch` that walking with `scandir` relies on, as of `wcmatch` 10 and 11
+WCMATCH_WALK_MEMBERS = ('_root_dir', '_skipped', '_valid_file', '_valid_folder', '_walk')
+
+# Search settings shared by all files searched within a worker process
+_WORKER = {}
 
 
 def get_exception():
@@ -269,6 +358,227 @@ if REGEX_SUPPORT:
         return regex.compile(regex.escape(pattern), flags)
 
 
+def _terms_pattern(pattern, rum_flags=0, binary=False):
+    """Prepare an automaton for the newline separated terms."""
+
+    return aho_corasick.AhoCorasick(pattern.split(b'\n' if binary else '\n'), bool(rum_flags & IGNORECASE))
+
+
+def read_terms(file_name):
+    """Read a term file, with a term on each line, into a newline separated term list for a `TERMS` search."""
+
+    with open(file_name, 'r', encoding='utf-8-sig') as f:
+        return '\n'.join(line for line in f.read().splitlines() if line)
+
+
+def get_journal_runs(location):
+    """Get the replace runs with journals in a location, newest first, as the run, its start time, and file count."""
+
+    return _journal.get_runs(location)
+
+
+def restore_journal_run(location, run):
+    """Restore the files a replace run changed from its journal, and return the files that couldn't be restored."""
+
+    return _journal.restore(location, run)
+
+
+def discard_journal_run(location, run):
+    """Discard the journal of a replace run."""
+
+    _journal.discard(location, run)
+
+
+def compile_search(pattern, flags=0, regex_mode=RE_MODE, binary=False):
+    """
+    Compile a search pattern with `rumcore` flags as a search would.
+
+    Compiled patterns are cached, so patterns that are validated or searched again are not compiled again.
+    """
+
+    return _compile_search(pattern, flags, regex_mode, binary)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_search(pattern, flags, regex_mode, binary):
+    """Compile a search pattern and cache it."""
+
+    if flags & TERMS:
+        return _terms_pattern(pattern, flags, binary)
+    elif flags & LITERAL:
+        if regex_mode in REGEX_MODES:
+            return _regex_literal_pattern(pattern, flags, binary)
+        return _re_literal_pattern(pattern, flags, binary)
+    elif regex_mode == BREGEX_MODE:
+        return _bregex_pattern(pattern, flags, binary)
+    elif regex_mode == REGEX_MODE:
+        return _regex_pattern(pattern, flags, binary)
+    elif regex_mode == BRE_MODE:
+        return _bre_pattern(pattern, flags, binary)
+    return _re_pattern(pattern, flags, binary)
+
+
+@functools.lru_cache(maxsize=128)
+def _get_required_literals(pattern, flags, regex_mode):
+    """Get the literals of which at least one must be in a file for the search pattern to match."""
+
+    # Checking a file for every term would take as long as searching it.
+    if flags & TERMS:
+        return None
+
+    try:
+        compiled = compile_search(pattern, flags, regex_mode)
+    except Exception:
+        # Let the search itself report bad patterns.
+        return None
+    return pattern_info.required_literals(compiled)
+
+
+@functools.lru_cache(maxsize=128)
+def _get_byte_pattern(pattern, flags, regex_mode):
+    """
+    Get the search pattern compiled for searching the raw bytes of ASCII compatible files.
+
+    Returns the pattern and whether it needs files without carriage returns,
+    or `None` if the pattern can't be used to search bytes.
+    """
+
+    if flags & TERMS:
+        # Case folding isn't limited to ASCII in text.
+        if flags & IGNORECASE:
+            return None
+        try:
+            byte_pattern = pattern.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+        return compile_search(byte_pattern, flags, regex_mode, True), b'\r' in byte_pattern
+
+    try:
+        compiled = compile_search(pattern, flags, regex_mode)
+    except Exception:
+        return None
+    safety = pattern_info.byte_safety(compiled)
+    if safety == pattern_info.BYTES_UNSAFE:
+        return None
+
+    # `backrefs` patterns have already been processed, so we can compile what they hold directly.
+    compiled = getattr(compiled, '_pattern', compiled)
+    try:
+        if REGEX_SUPPORT and isinstance(compiled, regex.Pattern):
+            byte_pattern = regex.compile(compiled.pattern.encode('ascii'), compiled.flags & ~regex.UNICODE)
+        else:
+            byte_pattern = re.compile(compiled.pattern.encode('ascii'), compiled.flags & ~re.UNICODE)
+    except Exception:
+        return None
+    return byte_pattern, safety == pattern_info.BYTES_NO_CR
+
+
+def _get_byte_template(template, codec):
+    """
+    Split a replace template of group references and escaped slashes into encoded text and groups.
+
+    Returns `None` if the template has other escapes or can't be encoded.
+    """
+
+    if RE_BYTE_TEMPLATE.match(template) is None:
+        return None
+    parts = []
+    index = 0
+    try:
+        for m in RE_TEMPLATE_GROUP.finditer(template):
+            parts.append(template[index:m.start()].encode(codec, 'strict'))
+            if m.group(3):
+                parts.append(b'\\')
+            else:
+                group = m.group(1) or m.group(2)
+                parts.append(int(group) if group.isdigit() else group)
+            index = m.end()
+        parts.append(template[index:].encode(codec, 'strict'))
+    except UnicodeEncodeError:
+        return None
+    return [part for part in parts if part != b'']
+
+
+@functools.lru_cache(maxsize=None)
+def _is_one_to_one(codec):
+    """Check that a codec decodes each byte on its own, and that no two bytes decode to the same character."""
+
+    chars = set()
+    for b in range(256):
+        decoder = codecs.getincrementaldecoder(codec)()
+        try:
+            char = decoder.decode(bytes([b]), False)
+        except UnicodeDecodeError:
+            # Bytes that don't decode send the file to the binary search.
+            continue
+        # A byte that decodes to nothing is the start of a longer sequence.
+        if len(char) != 1 or char in chars:
+            return False
+        chars.add(char)
+    return True
+
+
+@functools.lru_cache(maxsize=128)
+def _get_literal_finder(literals, encoding, binary_fallback):
+    """
+    Get a function that checks a raw byte buffer for any of the literals in the given encoding.
+
+    Returns `None` if the literals can't be reliably searched for in the encoding.
+    """
+
+    needles = set()
+    if encoding == 'bin':
+        try:
+            needles.update(literal.encode('ascii') for literal in literals)
+        except UnicodeEncodeError:
+            return None
+    else:
+        try:
+            codec = codecs.lookup(encoding).name
+        except LookupError:
+            return None
+        if RE_LITERAL_ENCODINGS.match(codec) is None and (
+            RE_SINGLE_BYTE_ENCODINGS.match(codec) is None or not _is_one_to_one(codec)
+        ):
+            return None
+        for literal in literals:
+            # A literal that can't be encoded can't be in the file.
+            try:
+                needles.add(literal.encode(codec))
+            except UnicodeEncodeError:
+                pass
+
+            # Files that fail to decode are searched as binary.
+            if binary_fallback:
+                try:
+                    needles.add(literal.encode('ascii'))
+                except UnicodeEncodeError:
+                    pass
+
+    if not needles:
+        return lambda buffer: False
+    elif len(needles) == 1:
+        needle = needles.pop()
+        return lambda buffer: buffer.find(needle) != -1
+    return re.compile(b'|'.join(re.escape(n) for n in sorted(needles, key=len, reverse=True))).search
+
+
+def _get_common_prefix(a, b):
+    """Get the length of the prefix two byte buffers share, comparing halves so the work is done in C."""
+
+    a = memoryview(a)
+    b = memoryview(b)
+    low = 0
+    high = min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
 class RummageException(Exception):
     """Rummage exception."""
 
@@ -280,6 +590,19 @@ class RummageTestException(Exception):
 class FileAttrRecord(namedtuple('FileAttrRecord', ['name', 'ext', 'size', 'modified', 'created', 'skipped', 'error'])):
     """File Attributes."""
 
+    def with_stat(self, st=None):
+        """
+        Get the record with the file's size and times filled in, optionally from a stat result that was retrieved.
+
+        Walked files only get their size and times when size or time limits need them,
+        so they are retrieved when they are displayed or searched.
+        """
+
+        if self.size is not None or self.name is None or self.skipped or self.error is not None:
+            return self
+        created, modified, size = util.get_stat(self.name, st)
+        return self._replace(size=size, modified=modified, created=created)
+
 
 class FileInfoRecord(namedtuple('FileInfoRecord', ['id', 'name', 'ext', 'size', 'modified', 'created', 'encoding'])):
     """A record for tracking file info."""
@@ -289,8 +612,10 @@ class FileRecord(namedtuple('FileRecord', ['info', 'match', 'error'])):
     """A record that reports file info, matching status, and errors."""
 
 
-class MatchRecord(namedtuple('MatchRecord', ['lineno', 'colno', 'match', 'lines', 'context'])):
-    """A record that contains match information: line number, context, etc."""
+class MatchRecord(
+    namedtuple('MatchRecord', ['lineno', 'colno', 'match', 'lines', 'context', 'term'], defaults=(None,))
+):
+    """A record that contains match information: line number, context, the term of a term list that matched, etc."""
 
 
 class BufferRecord(namedtuple('BufferRecord', ['content', 'error'])):
@@ -301,6 +626,10 @@ class ErrorRecord(namedtuple('ErrorRecord', ['error'])):
     """A record for non-file related errors."""
 
 
+class ChangeRecord(namedtuple('ChangeRecord', ['name', 'records', 'removed'])):
+    """A record of a watched file that changed, with the records that replace the ones previously reported."""
+
+
 class Search:
     """Search setup object."""
 
@@ -394,17 +723,260 @@ class ReplacePlugin:
         return m.group(0)
 
 
+class _CompiledSearch(namedtuple('_CompiledSearch', ['pattern', 'replace', 'expand', 'reverse'])):
+    """A search pattern compiled for text or binary files."""
+
+
+class _SearchPlanEntry:
+    """A search in the chain, compiled once for all the text files and once for all the binary files searched."""
+
+    def __init__(self, search, replace, flags, regex_mode):
+        """Initialize."""
+
+        self.search = search
+        self.replace = replace
+        self.flags = flags
+        self.regex_mode = regex_mode
+        self.literal = bool(flags & (LITERAL | TERMS))
+        self.is_plugin_replace = replace is not None and not isinstance(replace, (str, bytes))
+        self.format_replace = regex_mode in FORMAT_MODES and bool(flags & FORMATREPLACE)
+        self.compiled = {}
+
+    def _compile(self, binary):
+        """Compile the search pattern and replace template."""
+
+        pattern = self.search
+        replace = None if self.is_plugin_replace else self.replace
+        if binary:
+            try:
+                pattern = bytes(pattern, 'ascii')
+            except UnicodeEncodeError as e:
+                raise RummageException('Unicode chars in binary search pattern') from e
+            if replace is not None:
+                try:
+                    replace = bytes(replace, 'ascii')
+                except UnicodeEncodeError as e:
+                    raise RummageException('Unicode chars in binary replace pattern') from e
+
+        pattern = compile_search(pattern, self.flags, self.regex_mode, binary)
+
+        expand = None
+        if replace is not None and not self.literal:
+            if self.regex_mode == BREGEX_MODE:
+                expand = pattern.compile(replace, (bregex.FORMAT if bool(self.flags & FORMATREPLACE) else 0))
+            elif self.regex_mode == BRE_MODE:
+                expand = pattern.compile(replace, (bre.FORMAT if bool(self.flags & FORMATREPLACE) else 0))
+
+        if REGEX_SUPPORT and isinstance(pattern, (bregex._REGEX_TYPE, bregex.Bregex)):
+            reverse = bool(pattern.flags & regex.REVERSE)
+        else:
+            reverse = False
+
+        return _CompiledSearch(pattern, replace, expand, reverse)
+
+    def get(self, binary=False):
+        """Get the search compiled for text or binary files."""
+
+        compiled = self.compiled.get(binary)
+        if compiled is None:
+            compiled = self._compile(binary)
+            self.compiled[binary] = compiled
+        return compiled
+
+
+class _SearchPlan:
+    """The searches in a chain, compiled once for every file in a search instead of for each file."""
+
+    def __init__(self, search_obj, regex_mode=RE_MODE):
+        """Initialize."""
+
+        self.regex_mode = regex_mode
+        self.entries = [_SearchPlanEntry(search, replace, flags, regex_mode) for search, replace, flags in search_obj]
+
+    def __getitem__(self, index):
+        """Get entry item."""
+
+        return self.entries[index]
+
+    def __len__(self):
+        """Get length."""
+
+        return len(self.entries)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_numpy():
+    """Import `numpy`, or get `None` if it isn't available."""
+
+    if not NUMPY_SUPPORT:
+        return None
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+class _LineIndex:
+    r"""
+    Index of the line endings in a buffer, scanned a chunk at a time as lines are needed.
+
+    Each line ending is stored as the position of its last character, so `\r\n` is stored as the position of `\n`.
+    """
+
+    def __init__(self, content):
+        """Initialize."""
+
+        self.content = content
+        self.size = len(content)
+        self.is_bytes = not isinstance(content, str)
+        self.cr, self.lf = (b'\r', b'\n') if self.is_bytes else ('\r', '\n')
+        self.ends = array.array('q')
+        self.scanned = 0
+
+    def __len__(self):
+        """Get the number of line endings indexed so far."""
+
+        return len(self.ends)
+
+    def __getitem__(self, index):
+        """Get the position of a line ending."""
+
+        return self.ends[index]
+
+    def _scan(self):
+        """Index the line endings in the next chunk."""
+
+        start = self.scanned
+        end = min(start + LINE_CHUNK, self.size)
+        chunk = self.content[start:end]
+        # Don't split a `\r\n` between chunks.
+        if chunk[-1:] == self.cr and self.content[end:end + 1] == self.lf:
+            end += 1
+            chunk = self.content[start:end]
+        if self.is_bytes:
+            chunk = bytes(chunk)
+
+        if self.cr in chunk:
+            line_endings = RE_BYTE_LINE_ENDINGS if self.is_bytes else RE_LINE_ENDINGS
+            self.ends.extend(start + m.end() - 1 for m in line_endings.finditer(chunk))
+        elif self.is_bytes and _get_numpy() is not None:
+            numpy = _get_numpy()
+            found = numpy.flatnonzero(numpy.frombuffer(chunk, dtype=numpy.uint8) == ord(self.lf))
+            self.ends.frombytes((found + start).astype(numpy.int64).tobytes())
+        else:
+            append = self.ends.append
+            find = chunk.find
+            index = find(self.lf)
+            while index != -1:
+                append(start + index)
+                index = find(self.lf, index + 1)
+
+        self.scanned = end
+
+    def to_point(self, point):
+        """Index the line endings up to and including the given point."""
+
+        while self.scanned <= point and self.scanned < self.size:
+            self._scan()
+
+    def to_count(self, count):
+        """Index line endings until there are at least the given number of them or the buffer is done."""
+
+        while len(self.ends) < count and self.scanned < self.size:
+            self._scan()
+
+    def get_row(self, point):
+        """Get the line number the given point is on."""
+
+        self.to_point(point)
+        return bisect.bisect_left(self.ends, point) + 1
+
+
+def _get_read_encoding(encoding):
+    """Get the encoding to read a text file with."""
+
+    enc = encoding.encode
+    if enc == 'utf-8':
+        enc = 'utf-8-sig'
+    elif encoding.bom and enc.startswith('utf-16'):
+        enc = 'utf-16'
+    elif encoding.bom and enc.startswith('utf-32'):
+        enc = 'utf-32'
+    return enc
+
+
+class _FileMap:
+    """
+    A file that is opened and memory mapped once, so encoding detection and searching can share it.
+
+    Empty files can't be mapped, so their content is an empty byte string.
+    """
+
+    def __init__(self, name):
+        """Initialize."""
+
+        self.name = name
+        self.content = b''
+        # The map keeps its own handle to the file, so the file can be closed right away.
+        with open(name, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            if self.stat.st_size:
+                self.content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Close the memory map."""
+
+        if isinstance(self.content, mmap.mmap):
+            try:
+                self.content.close()
+            except BufferError:
+                # An abandoned match iterator still holds the buffer, the map will close when it is collected.
+                pass
+        self.content = b''
+
+
+def _decode_text(content, enc):
+    """Decode file content, translating newlines just as reading the file in text mode does."""
+
+    text = str(content, enc, 'strict')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+class _TextReader:
+    """Decode file content a chunk at a time, translating newlines just as reading the file in text mode does."""
+
+    def __init__(self, content, enc):
+        """Initialize."""
+
+        self.content = content
+        self.pos = 0
+        self.decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(enc)(errors='strict'), True)
+
+    def read(self, size):
+        """Decode the next `size` bytes, and return the text, or an empty string at the end."""
+
+        text = ''
+        end = len(self.content)
+        while not text and self.pos < end:
+            chunk = self.content[self.pos:self.pos + size]
+            self.pos += len(chunk)
+            text = self.decoder.decode(chunk, final=self.pos >= end)
+        return text
+
+
 class _RummageFileContent:
     """Either return a string or memory map file object."""
 
-    def __init__(self, name, size, encoding, file_content=None):
+    def __init__(self, name, encoding, file_content=None, file_map=None):
         """Initialize."""
         self.name = name
-        self.size = size
         self.encoding = encoding
-        self.file_obj = None
         self.string_buffer = file_content
-        self.file_map = None
+        self.file_map = file_map
+        self.owns_map = False
 
     def __enter__(self):
         """Return content of either a memory map file or string."""
@@ -412,45 +984,100 @@ class _RummageFileContent:
         return self.string_buffer if self.string_buffer else self._read_file()
 
     def __exit__(self, *args):
-        """Close file obj and memory map object if open."""
+        """Close the memory map if it isn't shared."""
 
-        if self.file_map is not None:
+        if self.owns_map:
             self.file_map.close()
-        if self.file_obj is not None:
-            self.file_obj.close()
 
     def _get_encoding(self):
         """Get the encoding."""
 
-        enc = self.encoding.encode
-        if enc == 'utf-8':
-            enc = 'utf-8-sig'
-        elif enc.startswith('utf-16'):
-            enc = 'utf-16'
-        elif enc.startswith('utf-32'):
-            enc = 'utf-32'
-        return enc
+        return _get_read_encoding(self.encoding)
 
     def _read_file(self):
         """Read the file in."""
 
+        if self.file_map is None:
+            try:
+                self.file_map = _FileMap(self.name)
+            except Exception as e:
+                raise RummageException("Could not access or read file.") from e
+            self.owns_map = True
+
         if self.encoding.encode != "bin":
             try:
-                self.file_obj = open(self.name, 'r', encoding=self._get_encoding(), errors='strict')
-                return self.file_obj.read()
+                return _decode_text(self.file_map.content, self._get_encoding())
             except Exception:
                 self.encoding = text_decode.Encoding("bin", None)
 
-        if self.file_obj is not None:
-            self.file_obj.close()
+        return self.file_map.content
+
+
+class _RummageByteContent:
+    """Search the raw bytes of an ASCII compatible file through its memory map."""
+
+    def __init__(self, file_map, encoding, codec, no_cr=False):
+        """Initialize."""
+
+        self.file_map = file_map
+        self.encoding = encoding
+        self.codec = codec
+        self.no_cr = no_cr
+        self.view = None
+        self.content = None
+
+    def open(self):
+        """
+        Map the file and verify it can be searched as bytes.
+
+        Returns `False` if the file doesn't decode with the encoding, or has carriage returns when
+        the search patterns can't handle them. The file should be decoded and searched as normal instead.
+        """
+
+        file_map = self.file_map.content
+        if not file_map:
+            self.content = b''
+            return True
+        self.view = memoryview(file_map)
+        self.content = self.view[len(codecs.BOM_UTF8):] if self.view[:3] == codecs.BOM_UTF8 else self.view
+
+        if self.no_cr and file_map.find(b'\r') != -1:
+            return False
+
+        if self.codec == 'ascii':
+            return RE_NON_ASCII.search(self.content) is None
+        elif self.codec != 'iso8859-1':
+            decoder = codecs.getincrementaldecoder(self.codec)(errors='strict')
+            try:
+                for start in range(0, len(self.content), BYTE_CHUNK):
+                    decoder.decode(self.content[start:start + BYTE_CHUNK])
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                return False
+        return True
+
+    def __enter__(self):
+        """Return the file content."""
+
+        return self.content
+
+    def __exit__(self, *args):
+        """Release the views of the memory map."""
+
+        self.close()
+
+    def close(self):
+        """Release the views of the memory map, which is closed by the file search that shares it."""
 
         try:
-            self.file_obj = open(self.name, "rb")
-            if self.size != 0:
-                self.file_map = mmap.mmap(self.file_obj.fileno(), 0, access=mmap.ACCESS_READ)
-            return self.file_obj.read() if self.file_map is None else self.file_map
-        except Exception as e:
-            raise RummageException("Could not access or read file.") from e
+            if isinstance(self.content, memoryview):
+                self.content.release()
+            if self.view is not None:
+                self.view.release()
+        except BufferError:
+            # An abandoned match iterator still holds the buffer, the view will be released when it is collected.
+            pass
+        self.content = self.view = self.file_map = None
 
 
 class _FileSearch:
@@ -461,24 +1088,39 @@ class _FileSearch:
     def __init__(
         self, search_obj, file_obj, file_id, flags, context, encoding,
         backup_location, max_count, file_content=None, regex_mode=RE_MODE,
-        encoding_options=None
+        encoding_options=None, stream_overlap=STREAM_OVERLAP, search_plan=None, encoding_cache=None,
+        encoding_priors=None, journal=None, transaction=None
     ):
         """Initialize the file search object."""
 
         self.abort = False
         self.encoding_options = encoding_options
+        self.encoding_cache = encoding_cache
+        self.encoding_priors = encoding_priors
+        self.journal = journal
+        self.transaction = transaction
         self.search_obj = search_obj
         if (regex_mode in REGEX_MODES and not REGEX_SUPPORT) or (RE_MODE > regex_mode > BREGEX_MODE):
             regex_mode = RE_MODE
         self.regex_mode = regex_mode
+        self.search_plan = _SearchPlan(search_obj, regex_mode) if search_plan is None else search_plan
         self.flags = flags
         self.boolean = bool(self.flags & BOOLEAN)
         self.count_only = bool(self.flags & COUNT_ONLY)
         self.truncate_lines = bool(self.flags & TRUNCATE_LINES)
         self.process_binary = bool(self.flags & PROCESS_BINARY)
+        self.byte_search = bool(self.flags & BYTE_SEARCH)
+        self.byte_codec = None
+        self.byte_skip = b''
+        self.byte_offset = (0, 0)
+        self.line_index = None
+        self.stream = bool(self.flags & STREAM)
+        self.stream_overlap = stream_overlap
         self.reverse = False
-        self.backup = bool(self.flags & BACKUP)
+        # Backups are kept in the journal instead when there is one.
+        self.backup = bool(self.flags & BACKUP) and journal is None
         self.backup2folder = bool(self.flags & BACKUP_FOLDER)
+        self.backup_link = bool(self.flags & BACKUP_LINK)
         self.backup_ext = ('.%s' % backup_location) if not self.backup2folder else DEFAULT_BAK
         self.backup_folder = backup_location if self.backup2folder else DEFAULT_FOLDER_BAK
         self.bom = None
@@ -487,6 +1129,10 @@ class _FileSearch:
         # Prepare search
         self.expand = None
         self.literal = False
+        self.is_plugin_replace = False
+        self.regex_format_replace = False
+        self.current_replace = None
+        self.text_offset = 0
         self.idx = file_id
         self.file_obj = file_obj
         self.max_count = max_count
@@ -495,6 +1141,8 @@ class _FileSearch:
         self.is_binary = False
         self.current_encoding = None
         self.is_unicode_buffer = self.file_content is not None and isinstance(self.file_content, str)
+        self.file_map = None
+        self.prepared = None
 
     def _get_binary_context(self, content, m):
         """Get context info for binary file."""
@@ -540,41 +1188,16 @@ class _FileSearch:
             col
         )
 
-    def _get_line_endings_to_point(self, point):
-        """Get line ending up to the given point."""
-        try:
-            while point > self.last_line:
-                lend = next(self.line_iter)
-                self.line_map.append(lend.end() - 1)
-                self.last_line = lend.end()
-        except StopIteration:
-            self.last_line = point
-            pass
-
-    def _get_line_endings_count(self, count):
-        """Get line ending up to the given point."""
-        found = 0
-        try:
-            for _x in range(count):
-                lend = next(self.line_iter)
-                self.line_map.append(lend.end() - 1)
-                self.last_line = lend.end()
-                found += 1
-        except StopIteration:
-            pass
-        return found
-
-    def _get_line_context(self, content, m):
-        """Get context info about the line."""
+    def _get_line_span(self, content, m):
+        """Get the start and end of the context lines, the lines of context, and the row and column of the match."""
 
         win_end = '\r\n'
 
         before, after = self.context
-        self._get_line_endings_to_point(m.start())
-        row = self._get_row(m.start())
+        line_index = self.line_index
+        row = line_index.get_row(m.start())
         col = m.start() + 1
         idx = row - 1
-        lines = len(self.line_map) - 1
         start = 0
         end = len(content)
 
@@ -588,43 +1211,45 @@ class _FileSearch:
         # map's index.  Set index to None, as it is invalid,
         # and recalculate actual before.
         if start_idx < 0:
-            before -= start_idx + 1
+            before = idx
             start_idx = None
 
-        # Extended beyond map's end
+        # Extended beyond map's end, so the context is every line left,
+        # counting a last line without a line ending unless it is the match's line.
+        line_index.to_count(end_idx + 1)
+        lines = len(line_index) - 1
         if lines < end_idx:
-            lines += self._get_line_endings_count(end_idx - lines)
-            if lines < end_idx:
-                after -= end_idx - lines
-                end_idx = None
+            unterminated = bool(content) and (lines == -1 or line_index[lines] != len(content) - 1)
+            after = max(lines - idx + unterminated, 0)
+            end_idx = None
 
         # Calculate column of cursor and actual start and end of context
         if lines != -1:
             col_start = idx - 1
-            col = m.start() - self.line_map[col_start] if col_start >= 0 else m.start() + 1
+            col = m.start() - line_index[col_start] if col_start >= 0 else m.start() + 1
             # \r\n combinations usually show up as one char in editors and displays.
             # Decrement the column if we are at a line's end with one of these.
             # We will verify any line to account for mixed line endings.
             if (
-                self.line_map and idx < len(self.line_map) and m.start() == self.line_map[idx] and
+                idx < len(line_index) and m.start() == line_index[idx] and
                 m.start() != 0 and content[m.start() - 1: m.start() + 1] == win_end
             ):
                 col -= 1
 
             if start_idx is not None:
-                start = self.line_map[start_idx] + 1
+                start = line_index[start_idx] + 1
             if end_idx is not None:
-                end = self.line_map[end_idx]
+                end = line_index[end_idx]
 
-        # Make the match start and match end relative to the context snippet
-        match_start = m.start() - start
-        match_end = match_start + m.end() - m.start()
+        return start, end, before, after, row, col
+
+    def _truncate_context(self, lines, match_start, match_end):
+        """Truncate long lines if desired."""
 
-        # Truncate long lines if desired
         if self.truncate_lines:
-            length = end - start
+            length = len(lines)
             if length > TRUNCATE_LENGTH:
-                end = start + TRUNCATE_LENGTH
+                lines = lines[:TRUNCATE_LENGTH]
                 length = TRUNCATE_LENGTH
 
             # Recalculate relative match start and end
@@ -633,37 +1258,111 @@ class _FileSearch:
             if match_end > length:
                 match_end = TRUNCATE_LENGTH
 
+        return lines, match_start, match_end
+
+    def _get_line_context(self, content, m):
+        """Get context info about the line."""
+
+        return self._get_span_context(content, m, *self._get_line_span(content, m))
+
+    def _get_stream_line_context(self, buffer, m, partial, eof):
+        """
+        Get context info about the line in a window of a streamed file.
+
+        Lines longer than a window can be cut off at either end of the window, and a line that is cut off
+        is left out of the context rather than shown in part. If `partial` is set, the window starts part way
+        into its first line, and if `eof` isn't, the window's last line may not have all been read yet.
+        """
+
+        start, end, before, after, row, col = self._get_line_span(buffer, m)
+
+        if partial and start == 0 and before:
+            start = buffer.index('\n') + 1
+            before -= 1
+
+        if not eof and end == len(buffer):
+            last = buffer.rfind('\n')
+            if last >= m.end():
+                # Only a last line with some of it read is counted.
+                if last + 1 < len(buffer):
+                    after -= 1
+                end = last
+
+        return self._get_span_context(buffer, m, start, end, before, after, row, col)
+
+    def _get_span_context(self, content, m, start, end, before, after, row, col):
+        """Get context info about the line from the span of the context lines."""
+
+        # Make the match start and match end relative to the context snippet
+        match_start = m.start() - start
+        match_end = match_start + m.end() - m.start()
+
+        lines, match_start, match_end = self._truncate_context(content[start:end], match_start, match_end)
+
         # Return the context snippet, where the match occurs,
         # and how many lines of context before and after,
         # and the row and column of match start.
         return (
-            content[start:end],
+            lines,
             (match_start, match_end),
             (before, after),
             row,
             col
         )
 
-    def _get_row(self, start):
-        """Get line number where result is found in file."""
+    def _get_char_count(self, content, start, end):
+        """Get the number of characters the given span of bytes decodes to with universal newlines."""
 
-        # Binary Search
-        mn = 0
-        mx = len(self.line_map) - 1
-        if mx == -1 or start <= self.line_map[mn]:
-            return mn + 1
+        count = 0
+        for index in range(start, end, BYTE_CHUNK):
+            chunk = bytes(content[index:min(index + BYTE_CHUNK, end)])
+            count += len(chunk.translate(None, self.byte_skip)) - chunk.count(b'\r\n')
+            # Don't count a `\r\n` split between chunks twice.
+            stop = index + len(chunk)
+            if stop < end and chunk[-1:] == b'\r' and content[stop:stop + 1] == b'\n':
+                count -= 1
+        return count
 
-        if start > self.line_map[-1]:
-            return mx + 2
+    def _get_char_offset(self, content, point):
+        """Get the character offset of a byte offset, carrying on from the last offset we looked up."""
 
-        while mx - mn != 1:
-            idx = mn + ((mx - mn) >> 1)
-            if start > self.line_map[idx]:
-                mn = idx
-            else:
-                mx = idx
+        if point < self.byte_offset[0]:
+            self.byte_offset = (0, 0)
+        last_point, last_offset = self.byte_offset
+        offset = last_offset + self._get_char_count(content, last_point, point)
+        self.byte_offset = (point, offset)
+        return offset
+
+    def _decode_bytes(self, content):
+        """Decode bytes as they would be read in as text."""
+
+        return RE_LINE_ENDINGS.sub('\n', bytes(content).decode(self.byte_codec, errors='replace'))
+
+    def _get_byte_line_context(self, content, m):
+        """Get context info about the line from the raw bytes, with positions in characters."""
+
+        start, end, before, after, row, col = self._get_line_span(content, m)
+
+        # Line ends point at the `\n` of `\r\n`, which is a single `\n` in text.
+        if start < end and content[end - 1:end] == b'\r' and content[end:end + 1] == b'\n':
+            end -= 1
 
-        return mx + 1
+        # Column and relative match positions are in characters just as they are when searching text.
+        col = self._get_char_count(content, m.start() - col + 1, m.start()) + 1
+        match_start = self._get_char_count(content, start, m.start())
+        match_end = match_start + self._get_char_count(content, m.start(), m.end())
+
+        lines, match_start, match_end = self._truncate_context(
+            self._decode_bytes(content[start:end]), match_start, match_end
+        )
+
+        return (
+            lines,
+            (match_start, match_end),
+            (before, after),
+            row,
+            col
+        )
 
     def expand_match(self, m):
         """Expand the match."""
@@ -679,112 +1378,242 @@ class _FileSearch:
         else:
             return m.expand(self.current_replace)
 
-    def _findall(self, file_content, search_pattern, replace_pattern, flags, file_info):
-        """Find all occurrences of search pattern in file."""
+    def _expand_bytes(self, m, template):
+        """Expand a replace template split by `_get_byte_template` with a match of the raw bytes."""
 
-        replace = None
-        pattern = None
+        return b''.join(part if isinstance(part, bytes) else bytes(m.group(part) or b'') for part in template)
 
-        if (
-            replace_pattern is not None and
-            not isinstance(replace_pattern, (str, bytes))
-        ):
-            replace_pattern = replace_pattern(file_info, flags)
-            self.is_plugin_replace = True
-        else:
-            self.is_plugin_replace = False
+    def _get_term(self, m):
+        """Get the term a term list search matched, or `None` for other searches."""
 
-        self.regex_format_replace = self.regex_mode in FORMAT_MODES and bool(flags & FORMATREPLACE)
+        term = getattr(m, 'term', None)
+        # Terms are only searched as bytes when they are ASCII.
+        return term.decode('ascii') if isinstance(term, bytes) else term
 
-        if self.is_binary:
-            try:
-                pattern = bytes(search_pattern, 'ascii')
-            except UnicodeEncodeError as e:
-                raise RummageException('Unicode chars in binary search pattern') from e
-            if replace_pattern is not None and not self.is_plugin_replace:
-                try:
-                    replace = bytes(replace_pattern, 'ascii')
-                except UnicodeEncodeError as e:
-                    raise RummageException('Unicode chars in binary replace pattern') from e
-        else:
-            pattern = search_pattern
-            replace = replace_pattern
+    def _use_entry(self, entry, file_info):
+        """Set up the replace of the search plan entry and get the entry compiled for the file."""
 
-        self.current_replace = replace
+        compiled = entry.get(self.is_binary)
 
-        if pattern is not None:
-            if bool(flags & LITERAL):
-                self.literal = True
-                if self.regex_mode in REGEX_MODES:
-                    pattern = _regex_literal_pattern(pattern, flags, self.is_binary)
-                else:
-                    pattern = _re_literal_pattern(pattern, flags, self.is_binary)
-            else:
-                self.literal = False
-                if self.regex_mode == BREGEX_MODE:
-                    pattern = _bregex_pattern(pattern, flags, self.is_binary)
-                    if replace is not None and not self.is_plugin_replace:
-                        self.expand = pattern.compile(replace, (bregex.FORMAT if bool(flags & FORMATREPLACE) else 0))
-                elif self.regex_mode == REGEX_MODE:
-                    pattern = _regex_pattern(pattern, flags, self.is_binary)
-                elif self.regex_mode == BRE_MODE:
-                    pattern = _bre_pattern(pattern, flags, self.is_binary)
-                    if replace is not None and not self.is_plugin_replace:
-                        self.expand = pattern.compile(replace, (bre.FORMAT if bool(flags & FORMATREPLACE) else 0))
-                else:
-                    pattern = _re_pattern(pattern, flags, self.is_binary)
+        self.is_plugin_replace = entry.is_plugin_replace
+        self.regex_format_replace = entry.format_replace
+        self.literal = entry.literal
+        self.expand = compiled.expand
+        self.reverse = compiled.reverse
 
-            if REGEX_SUPPORT and isinstance(pattern, (bregex._REGEX_TYPE, bregex.Bregex)):
-                self.reverse = bool(pattern.flags & regex.REVERSE)
-            else:
-                self.reverse = False
+        # Replace plugins are given the file they replace in, so they are created for each file.
+        self.current_replace = entry.replace(file_info, entry.flags) if self.is_plugin_replace else compiled.replace
+        return compiled
+
+    def _findall(self, file_content, entry, file_info):
+        """Find all occurrences of the search plan entry's pattern in file."""
 
-            self.text_offset = len(file_content) if self.reverse else 0
+        compiled = self._use_entry(entry, file_info)
 
-            yield from pattern.finditer(file_content)
+        self.text_offset = len(file_content) if self.reverse else 0
+
+        yield from compiled.pattern.finditer(file_content)
 
     def _update_buffer(self, content):
         """Update the buffer content."""
 
         return BufferRecord((b'' if self.is_binary else '').join(content), None)
 
-    def _update_file(self, file_name, content):
-        """Update the file content."""
+    def _backup_file(self, file_name, writer=None):
+        """
+        Back up the file before it is replaced.
+
+        When backups share the file's data, the file is cloned on file systems that support it. Otherwise,
+        if a writer is going to replace the file with a new one, the original file becomes the backup
+        through a hard link when the writer commits. The file is copied if neither can be done. Transactions
+        stage the backup next to where it goes, to be moved there when the transaction commits.
+        """
 
-        encoding = self.current_encoding
         if self.backup:
             if self.backup2folder:
                 dirname = os.path.join(os.path.dirname(file_name), self.backup_folder)
                 basename = os.path.basename(file_name)
-                backup = os.path.join(dirname, basename)
+                backup = os.path.join(dirname, basename) + '.bak'
                 if not os.path.exists(dirname):
                     os.makedirs(dirname)
-                shutil.copy2(file_name, backup + '.bak')
             else:
                 backup = file_name + self.backup_ext
-                shutil.copy2(file_name, backup)
 
-        if encoding.bom:
-            # Write the BOM first, then write in `UTF` format out in the specified order.
-            with open(file_name, 'wb') as f:
-                f.write(encoding.bom)
-            with open(file_name, 'a', encoding=encoding.encode, errors='strict') as f:
+            if self.transaction is not None:
+                # Earlier backups are only replaced once every file is swapped in, so a rollback keeps them.
+                writer.stage_backup(backup, self.backup_link)
+                return
+
+            if self.backup_link:
+                try:
+                    _writer.clone(file_name, backup)
+                    return
+                except OSError:
+                    pass
+                if writer is not None:
+                    writer.backup = backup
+                    return
+            shutil.copy2(file_name, backup)
+
+    def _get_write_encoding(self):
+        """Get the encoding to write replaced text in."""
+
+        # If a user is adding Unicode to ASCII,
+        # we write ASCII files out as `utf-8` to keep it from failing.
+        # We choose `utf-8` because it is compatible with ASCII,
+        # but we could just as easily have chosen `Latin-1` or `CP1252`.
+        enc = self.current_encoding.encode
+        return 'utf-8' if enc == 'ascii' else enc
+
+    def _update_file(self, file_name, content):
+        """
+        Update the file content.
+
+        The file's memory map is kept open until the new content is written, so the journal
+        can take just the span that changed from it.
+        """
+
+        encoding = self.current_encoding
+        with _writer.ReplaceWriter(file_name) as writer:
+            self._backup_file(file_name, writer)
+            if encoding.encode == 'bin':
+                # Write bin file.
                 while content:
-                    f.write(content.popleft())
-        elif encoding.encode == 'bin':
-            # Write bin file.
-            with open(file_name, 'wb') as f:
+                    writer.write(content.popleft())
+            else:
+                if encoding.bom:
+                    # Write the BOM first, then write in `UTF` format out in the specified order.
+                    writer.write(encoding.bom)
+                    enc = encoding.encode
+                else:
+                    enc = self._get_write_encoding()
+                # Newlines are written just as they would be by a file opened in text mode.
+                f = io.TextIOWrapper(writer.file, encoding=enc, errors='strict')
                 while content:
                     f.write(content.popleft())
+                f.flush()
+                f.detach()
+            original = self._read_changed(writer)
+            # The file can't be replaced while it is still mapped on some systems.
+            self.close()
+            replaced = self._commit(writer)
+
+        if original is not None:
+            st, start, length, data = original
+            self.journal.add(file_name, st, replaced, [(start, length, data)])
+
+    def _commit(self, writer):
+        """
+        Swap in the new content of the file, or give it to the transaction to swap in with the rest.
+
+        Returns the stat result of the new content.
+        """
+
+        if self.transaction is None:
+            writer.commit()
+            return os.stat(writer.name)
+        writer.prepare()
+        st = os.stat(writer.temp)
+        self.transaction.add(writer)
+        return st
+
+    def _read_original(self, spans):
+        """
+        Read the original bytes of the spans of the file that will be replaced, if they are kept in a journal.
+
+        The spans are read through the file's memory map, so only the bytes that are replaced are read.
+        Returns the file's stat result along with the bytes of each span.
+        """
+
+        if self.journal is None:
+            return None
+        file_map = self._get_file_map()
+        return file_map.stat, [bytes(file_map.content[start:end]) for start, end in spans]
+
+    def _read_changed(self, writer):
+        """
+        Read the original bytes of the span that new content written in whole changed, if they are kept in a journal.
+
+        The new content is compared with the original a chunk at a time from either end, so neither is read
+        in whole. Returns the file's stat result, where the span starts, its length in the new content,
+        and its original bytes.
+        """
+
+        if self.journal is None:
+            return None
+        writer.file.flush()
+        file_map = self._get_file_map()
+        content = file_map.content
+        size = len(content)
+        with open(writer.temp, 'rb') as f:
+            new_size = os.fstat(f.fileno()).st_size
+            limit = min(size, new_size)
+
+            start = 0
+            while start < limit:
+                chunk = f.read(min(BYTE_CHUNK, limit - start))
+                same = _get_common_prefix(chunk, content[start:start + len(chunk)])
+                start += same
+                if same < len(chunk):
+                    break
+
+            end = 0
+            while end < limit - start:
+                count = min(BYTE_CHUNK, limit - start - end)
+                f.seek(new_size - end - count)
+                chunk = f.read(count)
+                same = _get_common_prefix(chunk[::-1], content[size - end - count:size - end][::-1])
+                end += same
+                if same < count:
+                    break
+
+        return file_map.stat, start, new_size - end - start, bytes(content[start:size - end])
+
+    def _patch_file(self, file_name, edits, size, original=None):
+        """
+        Update the file by replacing byte spans of it.
+
+        The spans between the edits are copied from the original as they are. Large files where each
+        replacement is as long as its match are patched in place instead, as rewriting them costs far more.
+        The original bytes of the spans are given if they are kept in a journal.
+        """
+
+        if not self.is_binary:
+            # Replacements expanded from the raw bytes are already encoded.
+            enc = self._get_write_encoding()
+            edits = [
+                (start, end, replace.encode(enc, 'strict') if isinstance(replace, str) else replace)
+                for start, end, replace in edits
+            ]
+
+        if (
+            self.transaction is None and size >= PATCH_SIZE and
+            all(len(replace) == end - start for start, end, replace in edits)
+        ):
+            # Patching changes the file itself, so a backup can't just be another name for it.
+            self._backup_file(file_name)
+            _writer.patch(file_name, edits, size)
+            replaced = os.stat(file_name)
         else:
-            # If a user is adding Unicode to ASCII,
-            # we write ASCII files out as `utf-8` to keep it from failing.
-            # We choose `utf-8` because it is compatible with ASCII,
-            # but we could just as easily have chosen `Latin-1` or `CP1252`.
-            enc = encoding.encode
-            with open(file_name, 'w', encoding=('utf-8' if enc == 'ascii' else enc), errors='strict') as f:
-                while content:
-                    f.write(content.popleft())
+            with _writer.ReplaceWriter(file_name) as writer:
+                self._backup_file(file_name, writer)
+                offset = 0
+                for start, end, replace in edits:
+                    writer.copy(offset, start)
+                    writer.write(replace)
+                    offset = end
+                writer.copy(offset, size)
+                replaced = self._commit(writer)
+
+        if original is not None:
+            # Keep where each span is in the replaced file, which moves with the lengths of the replacements before it.
+            st, data = original
+            spans = []
+            shift = 0
+            for (start, end, replace), text in zip(edits, data, strict=True):
+                spans.append((start + shift, len(replace), text))
+                shift += len(replace) - (end - start)
+            self.journal.add(file_name, st, replaced, spans)
 
     def _get_file_info(self, file_obj):
         """Create file info record."""
@@ -796,6 +1625,9 @@ class _FileSearch:
         try:
             self.current_encoding = text_decode.Encoding('bin', None)
             self.is_binary = False
+            if not string_buffer and file_obj.size is None:
+                # The file is opened to be searched anyway, so its size and times come from the open file.
+                file_obj = file_obj.with_stat(self._get_file_map().stat)
             if string_buffer:
                 self.current_encoding = text_decode.Encoding('unicode' if self.is_unicode_buffer else 'bin', None)
                 self.is_binary = not self.is_unicode_buffer
@@ -804,7 +1636,7 @@ class _FileSearch:
                     self.current_encoding = text_decode.Encoding('bin', None)
                     self.is_binary = True
                 elif self.encoding.startswith(('utf-8', 'utf-16', 'utf-32')):
-                    bom = text_decode.inspect_bom(file_obj.name)
+                    bom = text_decode.has_bom(self._get_file_map().content[:4])
                     if bom and bom.encode.startswith(self.encoding):
                         self.current_encoding = bom
                     else:
@@ -812,10 +1644,7 @@ class _FileSearch:
                 else:
                     self.current_encoding = text_decode.Encoding(self.encoding, None)
             else:
-                # Guess encoding and decode file
-                encoding = text_decode.guess(
-                    file_obj.name, verify=False, encoding_options=self.encoding_options
-                )
+                encoding = self._guess_encoding(file_obj.name)
                 if encoding is not None:
                     if encoding.encode == "bin":
                         self.is_binary = True
@@ -823,30 +1652,404 @@ class _FileSearch:
         except Exception:
             error = get_exception()
 
-        file_info = FileInfoRecord(
-            self.idx,
-            file_obj.name,
-            os.path.splitext(file_obj.name)[1].lower().lstrip('.'),
-            file_obj.size,
-            file_obj.modified,
-            file_obj.created,
-            self.current_encoding.encode.upper()
-        )
+        file_info = FileInfoRecord(
+            self.idx,
+            file_obj.name,
+            os.path.splitext(file_obj.name)[1].lower().lstrip('.'),
+            file_obj.size,
+            file_obj.modified,
+            file_obj.created,
+            self.current_encoding.encode.upper()
+        )
+
+        return file_info, error
+
+    def _guess_encoding(self, name):
+        """Guess the encoding from the same mapping the file will be searched through, unless it is cached."""
+
+        file_map = self._get_file_map()
+        if self.encoding_cache is not None:
+            encoding = self.encoding_cache.get(file_map.stat)
+            if encoding is not None:
+                return text_decode.Encoding(*encoding)
+
+        if self.encoding_priors is not None:
+            encoding = self.encoding_priors.guess(file_map.content, name, self.encoding_options)
+        else:
+            encoding = text_decode.mguess(
+                file_map.content,
+                os.path.splitext(name)[1].lower(),
+                verify=False,
+                encoding_options=self.encoding_options
+            )
+        if encoding is not None and self.encoding_cache is not None:
+            self.encoding_cache.set(file_map.stat, encoding)
+        return encoding
+
+    def _get_file_map(self):
+        """Open and memory map the file the first time it is needed, so it is only opened once."""
+
+        if self.file_map is None:
+            try:
+                self.file_map = _FileMap(self.file_obj.name)
+            except Exception as e:
+                raise RummageException("Could not access or read file.") from e
+        return self.file_map
+
+    def close(self):
+        """Close the file's memory map."""
+
+        if self.file_map is not None:
+            self.file_map.close()
+            self.file_map = None
+
+    def prepare(self):
+        """Gather the file info and detect the encoding ahead of the search."""
+
+        self.prepared = self._get_file_info(self.file_obj)
+
+    def _get_prepared_info(self):
+        """Get the file info, preparing it now if it wasn't done ahead of time."""
+
+        if self.prepared is None:
+            self.prepare()
+        return self.prepared
+
+    def _is_possible_match(self, file_info):
+        """
+        Check the raw file for the literals the search patterns require.
+
+        This allows us to skip decoding and searching files that cannot match.
+        """
+
+        # Buffers are already in memory, and `UTF` files without a BOM or byte order are read in the native byte order.
+        encoding = self.current_encoding
+        if (
+            self.file_content is not None or file_info.size is None or
+            (encoding.encode in ('utf-16', 'utf-32') and not encoding.bom)
+        ):
+            return True
+
+        literals = set()
+        for pattern, _replace, flags in self.search_obj:
+            required = _get_required_literals(pattern, flags, self.regex_mode)
+            if required is None:
+                return True
+            literals.update(required)
+
+        finder = _get_literal_finder(
+            frozenset(literals), encoding.encode, not self.is_binary and self.process_binary
+        )
+        if finder is None:
+            return True
+        if file_info.size == 0:
+            return False
+
+        return bool(finder(self._get_file_map().content))
+
+    def _get_byte_content(self):
+        """
+        Get the file content as raw bytes along with the search patterns compiled for bytes.
+
+        Returns `None` if the file or search patterns don't allow searching the file as bytes.
+        """
+
+        if not self.byte_search or self.file_content is not None or self.is_binary:
+            return None
+
+        try:
+            codec = codecs.lookup(self.current_encoding.encode).name
+        except LookupError:
+            return None
+        if RE_BYTE_ENCODINGS.match(codec) is None:
+            return None
+
+        patterns = []
+        no_cr = False
+        for pattern, _, flags in self.search_obj:
+            byte_pattern = _get_byte_pattern(pattern, flags, self.regex_mode)
+            if byte_pattern is None:
+                return None
+            patterns.append(byte_pattern[0])
+            no_cr = no_cr or byte_pattern[1]
+
+        content = _RummageByteContent(self._get_file_map(), self.current_encoding, codec, no_cr)
+        try:
+            usable = content.open()
+        except Exception:
+            usable = False
+        if not usable:
+            content.close()
+            return None
+
+        self.byte_codec = codec
+        self.byte_skip = UTF8_CONTINUATION if codec == 'utf-8' else b''
+        self.byte_offset = (0, 0)
+        return content, patterns
+
+    def _get_byte_replace(self, file_info):
+        """
+        Get the file content as raw bytes along with the search pattern and replace template for bytes.
+
+        Only the matches of the raw bytes are expanded, so the rest of the file is never decoded. Replace
+        plugins and `backrefs` templates need text matches, and templates with escapes other than group
+        references could expand differently from bytes, so those are replaced from the text instead.
+        Returns `None` if the file or search can't be replaced as bytes.
+        """
+
+        if len(self.search_plan) > 1:
+            # Chained replaces search the text of the previous replace.
+            return None
+        entry = self.search_plan[0]
+        if entry.is_plugin_replace:
+            return None
+
+        template = None
+        if not entry.literal:
+            if entry.format_replace or self.regex_mode not in (RE_MODE, REGEX_MODE):
+                return None
+            try:
+                template = _get_byte_template(entry.replace, codecs.lookup(self.current_encoding.encode).name)
+            except LookupError:
+                return None
+            if template is None:
+                return None
+
+        byte_content = self._get_byte_content()
+        if byte_content is None:
+            return None
+        content, patterns = byte_content
+        self._use_entry(entry, file_info)
+        return content, patterns[0], template
+
+    def _get_whole_encoding(self, file_info):
+        """
+        Get the encoding to read the file in whole with.
+
+        Text files too large to detect in whole are detected from samples, but are still too large to decode
+        in whole, so they are read as binary unless they are streamed or searched as bytes instead.
+        """
+
+        if (
+            self.file_content is None and not self.is_binary and
+            file_info.size is not None and file_info.size >= text_decode.MAX_GUESS_SIZE
+        ):
+            return text_decode.Encoding('bin', None)
+        return self.current_encoding
+
+    def _get_stream_patterns(self, file_info):
+        """
+        Get the search patterns if the file should be searched a window at a time.
+
+        Returns `None` if the file should be read in whole.
+        """
+
+        if (
+            not self.stream or self.file_content is not None or self.is_binary or
+            file_info.size is None or file_info.size < STREAM_SIZE
+        ):
+            return None
+
+        patterns = []
+        for entry in self.search_plan:
+            compiled = entry.get()
+            # Reverse searches need the whole file.
+            if compiled.reverse:
+                return None
+            patterns.append(compiled.pattern)
+        return patterns
+
+    def _search_stream(self, file_info, patterns):
+        """
+        Search a large text file a window at a time, so only a window of it is in memory at once.
+
+        Windows overlap by the stream overlap, and matches that start in the overlap are left for the next
+        window. Just enough text before each window is kept so lines, columns, and context stay correct.
+        Each window is searched for every pattern in the chain, so the file is only read and decoded once,
+        and the patterns' matches are reported a window at a time instead of a pattern at a time.
+
+        Returns `True` if the file failed to decode before anything was found, and should be handled as binary.
+        """
+
+        file_record_sent = False
+        overlap = max(self.stream_overlap, 1)
+        with_lines = not self.boolean and not self.count_only
+        before, after = self.context
+
+        # When stopping after a number of matches, search for one pattern at a time,
+        # so matches are found in the same order they are when the file is read in whole.
+        passes = [patterns] if self.max_count is None else [[pattern] for pattern in patterns]
+
+        for group in passes:
+            buffer = ''
+            base = 0
+            base_row = 0
+            col_offset = 0
+            positions = [0] * len(group)
+            empty_ats = [-1] * len(group)
+            eof = False
+
+            try:
+                reader = _TextReader(self._get_file_map().content, _get_read_encoding(self.current_encoding))
+                while not eof:
+                    chunk = reader.read(STREAM_WINDOW)
+                    eof = not chunk
+                    buffer += chunk
+                    limit = len(buffer) - overlap
+
+                    # Read in the rest of the lines that matches in this window need for context,
+                    # but never more than another window, so huge lines can't pull in the whole file.
+                    if with_lines:
+                        while (
+                            not eof and len(buffer) < limit + overlap + STREAM_WINDOW and
+                            buffer.count('\n', max(limit, 0)) <= after
+                        ):
+                            chunk = reader.read(STREAM_WINDOW)
+                            eof = not chunk
+                            buffer += chunk
+
+                    self.line_index = _LineIndex(buffer)
+
+                    for index, pattern in enumerate(group):
+                        pos = positions[index]
+                        last_end = pos
+
+                        for m in pattern.finditer(buffer, pos):
+                            # Leave matches that could run past the window for the next window.
+                            if not eof and m.start() >= limit:
+                                break
+                            if m.start() == m.end() and base + m.start() == empty_ats[index]:
+                                continue
+                            last_end = m.end()
+
+                            if with_lines:
+                                lines, match, context, row, col = self._get_stream_line_context(
+                                    buffer, m, col_offset > 0, eof
+                                )
+                                if row == 1:
+                                    col += col_offset
+                                row += base_row
+                            else:
+                                row = 1
+                                col = 1
+                                match = (base + m.start(), base + m.end())
+                                lines = None
+                                context = (0, 0)
+
+                            file_record_sent = True
+
+                            yield FileRecord(
+                                file_info,
+                                MatchRecord(
+                                    row,          # line number
+                                    col,          # column number
+                                    match,        # Position of match
+                                    lines,        # Line(s) in which match is found
+                                    context,      # Number of lines shown before and after matched line(s)
+                                    self._get_term(m)  # The term of a term list that matched
+                                ),
+                                None
+                            )
+
+                            if self.boolean:
+                                return False
+
+                            # Have we exceeded the maximum desired matches?
+                            if self.max_count is not None:
+                                self.max_count -= 1
+
+                                if self.max_count == 0:
+                                    return False
+
+                            if self.abort:
+                                return False
+
+                            if m.start() == m.end():
+                                empty_ats[index] = base + m.end()
 
-        return file_info, error
+                        # Where this pattern picks up in the next window.
+                        positions[index] = max(limit, last_end, pos)
+
+                    if eof:
+                        break
+
+                    # Keep the overlap and the lines before it that are needed for context.
+                    keep = min(positions)
+                    start = max(keep - overlap, 0)
+                    if with_lines:
+                        line_start = keep
+                        for _ in range(before + 1):
+                            line_start = buffer.rfind('\n', 0, line_start)
+                            if line_start == -1:
+                                break
+                        start = min(start, max(line_start + 1, keep - STREAM_WINDOW, 0))
+
+                    # Track where we are in the file for what we drop.
+                    newline = buffer.rfind('\n', 0, start)
+                    col_offset = col_offset + start if newline == -1 else start - newline - 1
+                    base_row += buffer.count('\n', 0, start)
+                    base += start
+                    buffer = buffer[start:]
+                    positions = [position - start for position in positions]
+            except UnicodeDecodeError as e:
+                if file_record_sent:
+                    raise RummageException("Could not decode file.") from e
+                return True
+            finally:
+                self.line_index = None
+
+        if not file_record_sent:
+            yield FileRecord(file_info, None, None)
+        return False
 
     def kill(self):
         """Kill process."""
 
         self.abort = True
 
+    def _get_patch_offset(self, content):
+        """
+        Get where the content starts in the file if positions in the content are also byte positions in the file.
+
+        This allows the file to be updated by replacing just the matched bytes.
+        Returns `None` if the whole file needs to be written out.
+        """
+
+        if len(self.search_obj) > 1:
+            # Chained replaces search the text of the previous replace.
+            return None
+        elif isinstance(content, str):
+            try:
+                codec = codecs.lookup(self.current_encoding.encode).name
+            except LookupError:
+                return None
+            # ASCII text has the same bytes in all ASCII compatible encodings,
+            # as long as no newlines were translated when the file was read.
+            bom = len(self.current_encoding.bom) if self.current_encoding.bom else 0
+            if (
+                RE_BYTE_ENCODINGS.match(codec) is None or not content.isascii() or
+                len(content) + bom != self.file_map.stat.st_size
+            ):
+                return None
+            return bom
+        return 0
+
+    def _count_replace(self):
+        """Count a replaced match against the max count, and return whether the max count was reached."""
+
+        if self.max_count is None:
+            return False
+        self.max_count -= 1
+        return self.max_count == 0
+
     def search_and_replace(self):
         """Search and replace."""
 
         text = deque()
+        edits = []
         is_buffer = True if self.file_content else False
 
-        file_info, error = self._get_file_info(self.file_obj)
+        file_info, error = self._get_prepared_info()
 
         if error is not None:
             if is_buffer:
@@ -858,9 +2061,15 @@ class _FileSearch:
             try:
                 file_record_sent = False
 
-                rum_content = _RummageFileContent(
-                    file_info.name, file_info.size, self.current_encoding, self.file_content
-                )
+                byte_pattern = template = None
+                rum_content = None if is_buffer else self._get_byte_replace(file_info)
+                if rum_content is not None:
+                    rum_content, byte_pattern, template = rum_content
+                else:
+                    rum_content = _RummageFileContent(
+                        file_info.name, self._get_whole_encoding(file_info), self.file_content,
+                        self._get_file_map() if self.file_content is None else None
+                    )
                 self.file_content = None
 
                 with rum_content as rum_buff:
@@ -874,14 +2083,18 @@ class _FileSearch:
 
                     if not skip:
 
-                        pattern, replace, flags = self.search_obj[0]
-                        if REGEX_SUPPORT and isinstance(pattern, bregex._REGEX_TYPE):
-                            self.reverse = bool(pattern.flags & regex.REVERSE)
+                        if byte_pattern is not None:
+                            # Positions in the bytes are positions in the file, after any BOM.
+                            offset = len(rum_content.view) - len(rum_buff) if rum_content.view is not None else 0
+                            matches = byte_pattern.finditer(rum_buff)
                         else:
-                            self.reverse = False
-
-                        for m in self._findall(rum_buff, pattern, replace, flags, file_info):
-                            if self.reverse:
+                            offset = None if is_buffer else self._get_patch_offset(rum_buff)
+                            matches = self._findall(rum_buff, self.search_plan[0], file_info)
+                        for m in matches:
+                            if offset is not None:
+                                replace = self.expand_match(m) if template is None else self._expand_bytes(m, template)
+                                edits.append((m.start(0) + offset, m.end(0) + offset, replace))
+                            elif self.reverse:
                                 text.appendleft(rum_buff[m.end(0):self.text_offset])
                                 text.appendleft(self.expand_match(m))
                                 self.text_offset = m.start(0)
@@ -890,23 +2103,34 @@ class _FileSearch:
                                 text.append(self.expand_match(m))
                                 self.text_offset = m.end(0)
 
+                            if byte_pattern is not None:
+                                position = (
+                                    self._get_char_offset(rum_buff, m.start()), self._get_char_offset(rum_buff, m.end())
+                                )
+                            else:
+                                position = (m.start(), m.end())
+
                             yield FileRecord(
                                 file_info,
                                 MatchRecord(
                                     0,                     # line number
                                     0,                     # column number
-                                    (m.start(), m.end()),  # Position of match
+                                    position,              # Position of match
                                     None,                  # Line(s) in which match is found
-                                    (0, 0)                 # Number of lines shown before and after matched line(s)
+                                    (0, 0),                # Number of lines shown before and after matched line(s)
+                                    self._get_term(m)      # The term of a term list that matched
                                 ),
                                 None
                             )
 
                             file_record_sent = True
 
-                            if self.abort:
+                            if self._count_replace() or self.abort:
                                 break
 
+                        if self.reverse:
+                            edits.reverse()
+
                         # Grab the rest of the file if we found things to replace.
                         if not self.abort and (text or len(self.search_obj) > 1):
                             if self.reverse:
@@ -916,14 +2140,14 @@ class _FileSearch:
 
                 # Additional chained replaces
                 count = 1
-                if not skip and not self.abort and len(self.search_obj) > 1:
+                if not skip and not self.abort and self.max_count != 0 and len(self.search_obj) > 1:
 
-                    for pattern, replace, flags in self.search_obj[1:]:
+                    for entry in self.search_plan[1:]:
 
                         text2 = (b'' if self.is_binary else '').join(text)
                         text = deque()
 
-                        for m in self._findall(text2, pattern, replace, flags, file_info):
+                        for m in self._findall(text2, entry, file_info):
                             if self.reverse:
                                 text.appendleft(text2[m.end(0):self.text_offset])
                                 text.appendleft(self.expand_match(m))
@@ -940,14 +2164,15 @@ class _FileSearch:
                                     0,                     # column number
                                     (m.start(), m.end()),  # Position of match
                                     None,                  # Line(s) in which match is found
-                                    (0, 0)                 # Number of lines shown before and after matched line(s)
+                                    (0, 0),                # Number of lines shown before and after matched line(s)
+                                    self._get_term(m)      # The term of a term list that matched
                                 ),
                                 None
                             )
 
                             file_record_sent = True
 
-                            if self.abort:
+                            if self._count_replace() or self.abort:
                                 break
 
                         count += 1
@@ -959,10 +2184,17 @@ class _FileSearch:
                             else:
                                 text.append(text2[self.text_offset:])
 
-                        if self.abort:
+                        if self.abort or self.max_count == 0:
                             break
 
-                if not self.abort and text:
+                if not self.abort and edits:
+                    # Only the matched bytes change, the rest is copied from the file as it is.
+                    size = self.file_map.stat.st_size
+                    original = self._read_original([(start, end) for start, end, _ in edits])
+                    # The file can't be replaced while it is still mapped on some systems.
+                    self.close()
+                    self._patch_file(file_info.name, edits, size, original)
+                elif not self.abort and text:
                     # Update the file or buffer depending on what is being used.
                     # For a buffer, we will actually return the content via a `BufferRecord`.
                     if is_buffer:
@@ -991,16 +2223,33 @@ class _FileSearch:
     def search(self):
         """Search target file or buffer returning a generator of results."""
 
-        file_info, error = self._get_file_info(self.file_obj)
+        file_info, error = self._get_prepared_info()
         if error is not None:
             yield FileRecord(file_info, None, error)
         elif not self.is_binary or self.process_binary:
 
             try:
                 file_record_sent = False
-                rum_content = _RummageFileContent(
-                    file_info.name, file_info.size, self.current_encoding, self.file_content
-                )
+                if not self._is_possible_match(file_info):
+                    yield FileRecord(file_info, None, None)
+                    return
+
+                byte_patterns = None
+                rum_content = self._get_byte_content()
+                if rum_content is not None:
+                    rum_content, byte_patterns = rum_content
+                else:
+                    encoding = self._get_whole_encoding(file_info)
+                    stream_patterns = self._get_stream_patterns(file_info)
+                    if stream_patterns is not None:
+                        if not (yield from self._search_stream(file_info, stream_patterns)):
+                            return
+                        # The file doesn't decode, so handle it as binary just as we would if we read it in whole.
+                        encoding = text_decode.Encoding('bin', None)
+                    rum_content = _RummageFileContent(
+                        file_info.name, encoding, self.file_content,
+                        self._get_file_map() if self.file_content is None else None
+                    )
                 self.file_content = None
                 with rum_content as rum_buff:
 
@@ -1013,22 +2262,25 @@ class _FileSearch:
                         file_info = file_info._replace(encoding=self.current_encoding.encode.upper())
 
                     if not skip:
-                        self.line_map = []
-                        self.last_line = False
-                        self.line_iter = None
-                        get_context = self._get_binary_context if self.is_binary else self._get_line_context
+                        # Lines are indexed once for every pattern in the chain.
+                        self.line_index = _LineIndex(rum_buff)
+                        if byte_patterns is not None:
+                            get_context = self._get_byte_line_context
+                        elif self.is_binary:
+                            get_context = self._get_binary_context
+                        else:
+                            get_context = self._get_line_context
 
-                        for pattern, replace, flags in self.search_obj:
+                        for index, entry in enumerate(self.search_plan):
                             if hasattr(rum_buff, 'seek'):
                                 rum_buff.seek(0)
 
-                            if (
-                                self.line_iter is None and not self.boolean and
-                                not self.count_only and not self.is_binary
-                            ):
-                                self.line_iter = RE_LINE_ENDINGS.finditer(rum_buff)
+                            if byte_patterns is not None:
+                                matches = byte_patterns[index].finditer(rum_buff)
+                            else:
+                                matches = self._findall(rum_buff, entry, file_info)
 
-                            for m in self._findall(rum_buff, pattern, replace, flags, file_info):
+                            for m in matches:
 
                                 if not self.boolean and not self.count_only:
                                     # Get line related context.
@@ -1037,6 +2289,9 @@ class _FileSearch:
                                     row = 1
                                     col = 1
                                     match = (m.start(), m.end())
+                                    if byte_patterns is not None:
+                                        start = self._get_char_offset(rum_buff, m.start())
+                                        match = (start, start + self._get_char_count(rum_buff, m.start(), m.end()))
                                     lines = None
                                     context = (0, 0)
 
@@ -1049,7 +2304,8 @@ class _FileSearch:
                                         col,          # column number
                                         match,        # Position of match
                                         lines,        # Line(s) in which match is found
-                                        context       # Number of lines shown before and after matched line(s)
+                                        context,      # Number of lines shown before and after matched line(s)
+                                        self._get_term(m)  # The term of a term list that matched
                                     ),
                                     None
                                 )
@@ -1067,9 +2323,15 @@ class _FileSearch:
                                 if self.abort:
                                     break
 
-                            if self.abort:
+                            # Match iterators hold on to the buffer we are searching.
+                            matches = None
+
+                            # The rest of the chain doesn't need searching if we're done with the file.
+                            if self.abort or (self.boolean and file_record_sent) or self.max_count == 0:
                                 break
 
+                        self.line_index = None
+
                 if not file_record_sent:
                     yield FileRecord(file_info, None, None)
             except Exception:
@@ -1097,6 +2359,80 @@ class _FileSearch:
                 None,
                 get_exception()
             )
+        finally:
+            self.close()
+
+
+def _init_worker(
+    search_params, flags, context, encoding, backup_location, regex_mode, encoding_options, stream_overlap,
+    encoding_cache, journal, transaction
+):
+    """Store the search settings in the worker process."""
+
+    _WORKER['search_params'] = search_params
+    _WORKER['search_plan'] = _SearchPlan(search_params, regex_mode)
+    _WORKER['flags'] = flags
+    _WORKER['context'] = context
+    _WORKER['encoding'] = encoding
+    _WORKER['backup_location'] = backup_location
+    _WORKER['regex_mode'] = regex_mode
+    _WORKER['encoding_options'] = encoding_options
+    _WORKER['stream_overlap'] = stream_overlap
+    # Encodings detected in the worker are sent back, as only the main process saves the cache.
+    _WORKER['encoding_cache'] = (
+        _encoding_cache.EncodingCache(encoding_cache, encoding_options, track=True) if encoding_cache else None
+    )
+    _WORKER['encoding_priors'] = text_decode.EncodingPriors() if flags & ENCODING_PRIORS else None
+    _WORKER['journal'] = _journal.JournalWriter(journal) if journal else None
+    # Replaced files are sent back to be swapped in, as only the main process knows if the run succeeded.
+    _WORKER['transaction'] = _writer.Transaction() if transaction else None
+
+
+def _search_batch(batch, max_count):
+    """
+    Search a batch of files in a worker process.
+
+    Returns a list of record lists, one per file, in the order the files were given,
+    along with the encodings that were added to the encoding cache and the replaced files left to swap in.
+    """
+
+    results = []
+    for file_id, file_attr in batch:
+        searcher = _FileSearch(
+            _WORKER['search_params'],
+            file_attr,
+            file_id,
+            _WORKER['flags'],
+            _WORKER['context'],
+            _WORKER['encoding'],
+            _WORKER['backup_location'],
+            max_count,
+            None,
+            _WORKER['regex_mode'],
+            _WORKER['encoding_options'],
+            _WORKER['stream_overlap'],
+            _WORKER['search_plan'],
+            _WORKER['encoding_cache'],
+            _WORKER['encoding_priors'],
+            _WORKER['journal'],
+            _WORKER['transaction']
+        )
+        records = list(searcher.run())
+        results.append(records)
+
+        # No need to search the rest of the batch if we've found enough.
+        if max_count is not None:
+            max_count -= sum(1 for rec in records if rec.error is None and rec.match is not None)
+            if max_count <= 0:
+                break
+
+    cache = _WORKER['encoding_cache']
+    transaction = _WORKER['transaction']
+    return (
+        results,
+        cache.pop_added() if cache is not None else [],
+        transaction.pop_pending() if transaction is not None else []
+    )
 
 
 class _DirWalker(wcmatch.WcMatch):
@@ -1104,7 +2440,8 @@ class _DirWalker(wcmatch.WcMatch):
 
     def on_init(
         self, file_regex_match=False, folder_regex_exclude_match=False, size=None, modified=None, created=None,
-        backup_location='', backup_to_folder=False, regex_mode=RE_MODE, regex_ver=0
+        backup_location='', backup_to_folder=False, regex_mode=RE_MODE, regex_ver=0, walkers=1, snapshot=None,
+        ignore_files=False
     ):
         self.file_regex_match = file_regex_match
         self.folder_regex_exclude_match = folder_regex_exclude_match
@@ -1115,7 +2452,23 @@ class _DirWalker(wcmatch.WcMatch):
         self.size = (size[0], size[1]) if size is not None else size
         self.modified = modified
         self.created = created
+        # Files only need to be stat'ed during the walk when they are limited by size or time.
+        self.need_stat = self.size is not None or self.modified is not None or self.created is not None
+        self.walkers = max(walkers, 1)
+        self.snapshot = snapshot
+        # Walking with `scandir` replaces the walk of `wcmatch`, so if the private members it relies on change,
+        # `wcmatch` walks instead, without folder snapshots or walker threads.
+        self.scandir_walk = all(hasattr(self, name) for name in WCMATCH_WALK_MEMBERS)
+        # Folders that were walked, so they can be watched.
+        self.folders = set()
+        # The file being validated is tracked per thread, as folders can be walked by several threads.
+        self.current = threading.local()
+        self.skip_lock = threading.Lock()
         self.case_sensitive = wcmatch._wcparse.get_case(self.flags)
+        self.ignore_files = ignore_files
+        # The rules of the ignore files that apply in each folder, so each ignore file is only read once.
+        self.ignore_rules = {}
+        self.folder_ignore_rules = {}
 
         self.backup2folder = backup_to_folder
         if backup_location:
@@ -1179,11 +2532,11 @@ class _DirWalker(wcmatch.WcMatch):
         if self.modified is None:
             mod_okay = True
         else:
-            mod_okay = self._compare_value(self.modified, self.modified_time)
+            mod_okay = self._compare_value(self.modified, self.current.modified_time)
         if self.created is None:
             cre_okay = True
         else:
-            cre_okay = self._compare_value(self.created, self.created_time)
+            cre_okay = self._compare_value(self.created, self.current.created_time)
         if mod_okay and cre_okay:
             times_okay = True
         return times_okay
@@ -1195,7 +2548,7 @@ class _DirWalker(wcmatch.WcMatch):
         if self.size is None:
             size_okay = True
         else:
-            size_okay = self._compare_value(self.size, self.current_size)
+            size_okay = self._compare_value(self.size, self.current.size)
         return size_okay
 
     def _is_backup(self, name, directory=False):
@@ -1210,14 +2563,51 @@ class _DirWalker(wcmatch.WcMatch):
                 if name == self.backup_folder:
                     is_backup = True
         else:
-            if self.backup_ext and not self.backup2folder:
-                if util.platform() == "windows":  # pragma: no cover
-                    name = name.lower()
-                if name.endswith(self.backup_ext):
-                    is_backup = True
+            if util.platform() == "windows":  # pragma: no cover
+                name = name.lower()
+            if self.backup_ext and not self.backup2folder and name.endswith(self.backup_ext):
+                is_backup = True
+            elif name.endswith(_writer.TEMP_SUFFIX):
+                # The new content of a file being replaced.
+                is_backup = True
 
         return is_backup
 
+    def _read_ignore_rules(self, folder):
+        """Get the rules of the ignore files that apply in a folder, outermost first."""
+
+        rules = self.folder_ignore_rules.get(folder)
+        if rules is not None:
+            return rules
+
+        root = os.path.normpath(self._root_dir)
+        if folder != root and folder.startswith(os.path.join(root, '')):
+            rules = self._read_ignore_rules(os.path.dirname(folder))
+        else:
+            # The ignore files of the folders above the root apply too, up to the root of the Git work tree.
+            rules = ()
+            work_tree = _ignore.get_work_tree(folder)
+            parent = os.path.dirname(folder)
+            if work_tree is not None and work_tree != folder and parent != folder:
+                rules = self._read_ignore_rules(parent) if parent != work_tree else self._get_folder_rules(parent)
+
+        self.folder_ignore_rules[folder] = rules + self._get_folder_rules(folder)
+        return self.folder_ignore_rules[folder]
+
+    def _get_folder_rules(self, folder):
+        """Get the rules of the ignore files in just the given folder."""
+
+        rules = _ignore.read_rules(folder, not self.case_sensitive)
+        return ((folder, rules),) if rules is not None else ()
+
+    def _is_ignored(self, base, name, folder=False):
+        """Check if a file or folder is ignored by the ignore files."""
+
+        rules = self.ignore_rules.get(base)
+        if rules is None:
+            rules = self.ignore_rules[base] = self._read_ignore_rules(os.path.normpath(base))
+        return _ignore.is_ignored(rules, os.path.join(base, name), folder)
+
     def compare_file(self, filename):
         """Compare filename."""
 
@@ -1234,12 +2624,222 @@ class _DirWalker(wcmatch.WcMatch):
         else:
             return super().compare_directory(directory)
 
+    def _scan(self, base):
+        """
+        Get the folders and files in a folder as directory entries.
+
+        With a snapshot, the listing of a folder that hasn't changed since the last search is reused.
+        """
+
+        entries = None
+        if self.snapshot is not None:
+            st = os.stat(base)
+            entries = self.snapshot.get_listing(base, st)
+
+        if entries is None:
+            with os.scandir(base) as it:
+                entries = list(it)
+            if self.snapshot is not None:
+                self.snapshot.set_listing(base, st, entries)
+
+        dirs = []
+        files = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            (dirs if is_dir else files).append(entry)
+        return dirs, files
+
+    def _walk_folder(self, base, walk):
+        """
+        Walk the folders and files in a folder.
+
+        The sub-folders that should be walked are added to `walk`.
+        """
+
+        try:
+            dirs, files = self._scan(base)
+        except OSError:
+            # Just as `os.walk`, skip folders that can't be read.
+            return
+        self.folders.add(base)
+
+        # Remove child folders based on exclude rules
+        for entry in dirs:
+            try:
+                if self._valid_folder(base, entry.name):
+                    # Symlinked folders are only walked when following links.
+                    if self.follow_links or not entry.is_symlink():
+                        walk.append(entry.path)
+            except Exception:
+                value = self.on_error(base, entry.name)
+                if value is not None:  # pragma: no cover
+                    yield value
+
+            if self.is_aborted():  # pragma: no cover
+                return
+
+        # Only search files that are in the include rules
+        for entry in files:
+            self.current.entry = entry
+            try:
+                valid = self._valid_file(base, entry.name)
+            except Exception:
+                valid = False
+                value = self.on_error(base, entry.name)
+                if value is not None:
+                    yield value
+
+            if valid:
+                yield self.on_match(base, entry.name)
+            else:
+                with self.skip_lock:
+                    self._skipped += 1
+                value = self.on_skip(base, entry.name)
+                if value is not None:
+                    yield value
+
+            if self.is_aborted():
+                break
+        self.current.entry = None
+
+    def _walk(self):
+        """
+        Walk the directory just as `wcmatch` does, but with `scandir` directly.
+
+        `os.walk` only gives us names, so the stat data `scandir` caches on each entry would be lost
+        and every file would need another `stat`. Folders are walked in the same order `os.walk` walks them.
+        """
+
+        if not self.scandir_walk:
+            yield from super()._walk()
+            return
+
+        self._base_len = len(self._root_dir)
+
+        if self.walkers > 1:
+            yield from self._walk_parallel()
+            return
+
+        stack = [self._root_dir]
+        while stack and not self.is_aborted():
+            walk = []
+            yield from self._walk_folder(stack.pop(), walk)
+            stack.extend(reversed(walk))
+
+    def _walk_parallel(self):
+        """
+        Walk the directory with a pool of threads, so waiting on the file system for one folder overlaps the others.
+
+        Each thread walks folders from its own stack, depth first, and pushes the sub-folders it finds on it.
+        A thread that runs out of folders steals the oldest folder from another thread's stack, which is the
+        one nearest the top of the tree, so it likely holds the most work. Folders are reported as they are
+        walked, so the order of the folders can change from walk to walk, but each folder's files are
+        reported together in the same order a serial walk reports them.
+        """
+
+        stacks = [deque() for _ in range(self.walkers)]
+        stacks[0].append(self._root_dir)
+        results = queue.Queue(PIPELINE_QUEUE)
+        stop = threading.Event()
+        idle = threading.Condition()
+        pending = 1
+        done = object()
+
+        def put(item):
+            """Report results unless the walk was stopped."""
+
+            while not stop.is_set() and not self.is_aborted():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except queue.Full:  # noqa: PERF203
+                    pass
+
+        def get_folder(index):
+            """Get a folder from the thread's stack or steal one from another thread."""
+
+            try:
+                return stacks[index].pop()
+            except IndexError:
+                pass
+            for offset in range(1, self.walkers):
+                try:
+                    return stacks[(index + offset) % self.walkers].popleft()
+                except IndexError:  # noqa: PERF203
+                    pass
+            return None
+
+        def run(index):
+            """Walk folders until there are none left to walk."""
+
+            nonlocal pending
+            try:
+                while not stop.is_set() and not self.is_aborted():
+                    base = get_folder(index)
+                    if base is None:
+                        # Wait for other threads to find more folders, or for all of them to finish.
+                        with idle:
+                            if not pending:
+                                break
+                            idle.wait(0.1)
+                        continue
+
+                    walk = []
+                    records = []
+                    try:
+                        records = list(self._walk_folder(base, walk))
+                    finally:
+                        with idle:
+                            stacks[index].extend(reversed(walk))
+                            pending += len(walk) - 1
+                            idle.notify_all()
+                    if records:
+                        put(records)
+            finally:
+                put(done)
+
+        threads = [threading.Thread(target=run, args=(index,), daemon=True) for index in range(self.walkers)]
+        for thread in threads:
+            thread.start()
+        try:
+            running = len(threads)
+            while running and not self.is_aborted():
+                try:
+                    item = results.get(timeout=0.1)
+                except queue.Empty:  # noqa: PERF203
+                    continue
+                if item is done:
+                    running -= 1
+                    continue
+                for record in item:
+                    yield record
+                    if self.is_aborted():
+                        break
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
     def on_validate_file(self, base, name):
         """Validate file override."""
 
+        if not self.scandir_walk:
+            self.folders.add(base)
         valid = not self._is_backup(name)
+        if valid and self.ignore_files:
+            valid = not self._is_ignored(base, name)
         fullname = os.path.join(base, name)
-        self.created_time, self.modified_time, self.current_size = util.get_stat(fullname)
+        current = self.current
+        if self.need_stat and valid:
+            entry = getattr(current, 'entry', None)
+            st = entry.stat() if entry is not None and entry.name == name else None
+            current.created_time, current.modified_time, current.size = util.get_stat(fullname, st)
+        else:
+            # The size and times are retrieved when they are needed for display or searching.
+            current.created_time, current.modified_time, current.size = None, None, None
         if valid:
             valid = self._is_size_okay(fullname)
         if valid:
@@ -1249,7 +2849,13 @@ class _DirWalker(wcmatch.WcMatch):
     def on_validate_directory(self, base, name):
         """Validate folder override."""
 
-        return not self._is_backup(name, True)
+        if not self.scandir_walk:
+            self.folders.add(base)
+        valid = not self._is_backup(name, True)
+        if valid and self.ignore_files:
+            # Ignored folders are pruned, so nothing in them is walked.
+            valid = name != _ignore.GIT_FOLDER and not self._is_ignored(base, name, True)
+        return valid
 
     def on_skip(self, base, name):
         """On skip."""
@@ -1283,9 +2889,9 @@ class _DirWalker(wcmatch.WcMatch):
         return FileAttrRecord(
             f,
             os.path.splitext(f)[1].lower().lstrip('.'),
-            self.current_size,
-            self.modified_time,
-            self.created_time,
+            self.current.size,
+            self.current.modified_time,
+            self.current.created_time,
             False,
             None
         )
@@ -1298,13 +2904,18 @@ class Rummage:
         self, target, searches, file_pattern=None, folder_exclude=None, limit=1000,
         flags=0, context=(0, 0), max_count=None, encoding=None, size=None,
         modified=None, created=None, backup_location=None, regex_mode=RE_MODE,
-        encoding_options=None
+        encoding_options=None, workers=None, stream_overlap=None, walkers=None, snapshot=None,
+        encoding_cache=None, journal=None
     ):
         """Initialize Rummage object."""
 
         self.abort = False
+        self.stream_overlap = STREAM_OVERLAP if stream_overlap is None else stream_overlap
         self.searcher = None
         self.path_walker = None
+        self.workers = (os.cpu_count() or 1) if workers == 0 else (workers or 1)
+        # Walking is spent waiting on the file system, so it can use more threads than there are CPUs.
+        self.walkers = min(32, (os.cpu_count() or 1) + 4) if walkers == 0 else (walkers or 1)
         if (regex_mode in REGEX_MODES and not REGEX_SUPPORT) or (RE_MODE > regex_mode > BREGEX_MODE):
             regex_mode = RE_MODE
         self.regex_mode = regex_mode
@@ -1314,6 +2925,7 @@ class Rummage:
         self.encoding_options = encoding_options
 
         self.search_params = searches
+        self.search_plan = _SearchPlan(searches, regex_mode)
         self.file_flags = flags & FILE_MASK
 
         # `wcmatch` flags
@@ -1352,6 +2964,7 @@ class Rummage:
             self.backup_location = DEFAULT_FOLDER_BAK if bool(self.file_flags & BACKUP_FOLDER) else DEFAULT_BAK
 
         self.buffer_input = bool(self.file_flags & BUFFER_INPUT)
+        self.pipeline = bool(self.file_flags & PIPELINE)
         self.current_encoding = None
         self.idx = -1
         self.records = -1
@@ -1363,6 +2976,49 @@ class Rummage:
         self.is_binary = False
         self.files = deque()
         self.setup_error = None
+        # The ID of each file that was searched, so the files can be watched.
+        self.searched = {}
+        self.watcher = None
+
+        # Searches that change files or stop early can't reuse the results of a previous search.
+        self.snapshot = None
+        self.snapshot_files = {}
+        if snapshot and not self.buffer_input and not searches.is_replace() and self.max is None and len(searches):
+            self.snapshot = _snapshot.Snapshot(
+                snapshot,
+                (
+                    self.target, file_pattern, folder_exclude, limit, self.file_flags, context, self.encoding,
+                    size, modified, created, self.backup_location, regex_mode, encoding_options,
+                    self.stream_overlap, [tuple(search) for search in searches]
+                )
+            )
+
+        # The encodings of files are kept, and only detected again once a file changes.
+        self.encoding_cache_file = None
+        self.encoding_cache = None
+        if encoding_cache and not self.buffer_input and self.encoding is None:
+            self.encoding_cache_file = encoding_cache
+            self.encoding_cache = _encoding_cache.EncodingCache(encoding_cache, encoding_options)
+        self.encoding_priors = (
+            text_decode.EncodingPriors() if self.file_flags & ENCODING_PRIORS and self.encoding is None else None
+        )
+
+        # Replaces can keep what they change in one journal for the run, which can be restored or discarded as a whole.
+        self.journal_run = None
+        self.journal = None
+        if (
+            journal and searches.is_replace() and not self.buffer_input and
+            self.file_flags & BACKUP and self.file_flags & BACKUP_JOURNAL
+        ):
+            self.journal_run = _journal.new_run()
+            self.journal = _journal.JournalWriter(os.path.join(journal, self.journal_run))
+
+        # Transactional replaces swap in every replaced file once the run is done, so a run that fails or is stopped
+        # leaves every file as it was.
+        self.transaction = None
+        self.transaction_failed = False
+        if self.file_flags & TRANSACTION and searches.is_replace() and not self.buffer_input:
+            self.transaction = _writer.Transaction()
 
         try:
             # Initialize search objects:
@@ -1383,16 +3039,19 @@ class Rummage:
                     backup_location=self.backup_location if bool(self.file_flags & BACKUP) else None,
                     backup_to_folder=bool(self.file_flags & BACKUP_FOLDER),
                     regex_mode=self.regex_mode,
-                    regex_ver=0 if flags & VERSION1 else 1
+                    regex_ver=0 if flags & VERSION1 else 1,
+                    walkers=self.walkers,
+                    snapshot=self.snapshot,
+                    ignore_files=bool(self.file_flags & IGNORE_FILES)
                 )
             elif not self.buffer_input and os.path.isfile(self.target):
                 try:
-                    c_time, m_time = util.get_stat(self.target)
+                    c_time, m_time, size = util.get_stat(self.target)
                     self.files.append(
                         FileAttrRecord(
                             self.target,
                             os.path.splitext(self.target)[1].lower().lstrip('.'),
-                            os.path.getsize(self.target),
+                            size,
                             m_time,
                             c_time,
                             False,
@@ -1465,6 +3124,13 @@ class Rummage:
         if self.path_walker:
             self.path_walker.kill()
 
+    def _stop_walking(self):
+        """Stop once the current file is done, as when the max count is reached."""
+
+        self.abort = True
+        if self.path_walker:
+            self.path_walker.kill()
+
     def _get_next_file(self):
         """Get the next file from the file crawler results."""
 
@@ -1472,38 +3138,344 @@ class Rummage:
         file_info = self.files.popleft()
         return file_info
 
+    def _get_searcher(self, file_info, file_id, content_buffer=None):
+        """Create a file searcher."""
+
+        return _FileSearch(
+            self.search_params,
+            file_info,
+            file_id,
+            self.file_flags,
+            self.context,
+            self.encoding,
+            self.backup_location,
+            self.max,
+            content_buffer,
+            self.regex_mode,
+            self.encoding_options,
+            self.stream_overlap,
+            self.search_plan,
+            self.encoding_cache,
+            self.encoding_priors,
+            self.journal,
+            self.transaction
+        )
+
+    def _run_searcher(self):
+        """Run the current file searcher and count the records."""
+
+        records = []
+        for rec in self.searcher.run():
+            if rec.error is None:
+                self.records += 1
+                if self.max is not None and rec.match is not None:
+                    self.max -= 1
+            elif self.transaction is not None:
+                self.transaction_failed = True
+            if self.snapshot is not None:
+                records.append(rec)
+            yield rec
+
+            if self.max is not None and self.max == 0:
+                # The searcher stops at the max count itself, and a replace must still write what it reported.
+                self._stop_walking()
+
+        self._set_snapshot_records(records)
+
+    def _get_snapshot_records(self, file_id, file_info):
+        """
+        Get the records of a file from the snapshot if the file hasn't changed since the last search.
+
+        Returns the file info with its size and times filled in,
+        along with the records, or `None` if the file must be searched.
+        """
+
+        try:
+            st = os.stat(file_info.name)
+        except OSError:
+            # Let the search report it.
+            return file_info, None
+        created, modified, size = util.get_stat(file_info.name, st)
+        file_info = file_info._replace(size=size, modified=modified, created=created)
+        self.snapshot_files[file_id] = (file_info.name, st)
+
+        records = self.snapshot.get_records(file_info.name, st)
+        if records is not None:
+            records = [rec._replace(info=rec.info._replace(id=file_id)) for rec in records]
+        return file_info, records
+
+    def _set_snapshot_records(self, records):
+        """Keep the records of a searched file in the snapshot."""
+
+        if self.snapshot is None or self.abort or not records:
+            return
+        file = self.snapshot_files.pop(records[0].info.id, None)
+        # Files with errors are searched again next time.
+        if file is not None and all(rec.error is None for rec in records):
+            self.snapshot.set_records(file[0], file[1], records)
+
+    def _get_records(self, records):
+        """Report the records of a file from the snapshot and count them."""
+
+        for rec in records:
+            self.records += 1
+            yield rec
+
+            if self.abort:
+                break
+
     def search_file(self, content_buffer=None):
         """Search file."""
 
         file_info = self._get_next_file()
         if file_info is not None:
+            if self.snapshot is not None:
+                file_info, records = self._get_snapshot_records(self.idx, file_info)
+                if records is not None:
+                    yield from self._get_records(records)
+                    return
+            self.searcher = self._get_searcher(file_info, self.idx, content_buffer)
+            yield from self._run_searcher()
+
+    def _is_parallel(self):
+        """Check if the files can be searched in worker processes."""
+
+        if self.workers < 2 or self.buffer_input:
+            return False
+
+        # Workers replace in files before their records are reported, so a count to stop at or a kill would come
+        # too late. Only transactions, which swap in what was reported once the run is done, can replace in them.
+        if self.search_params.is_replace() and (self.transaction is None or self.max is not None):
+            return False
+
+        # Replace plugins that are loaded on the fly can't be sent to another process.
+        try:
+            pickle.dumps(self.search_params)
+        except Exception:
+            return False
+        return True
+
+    def _get_batch_results(self, future):
+        """Gather the records of a batch searched by a worker process."""
+
+        results, encodings, pending = future.result()
+        if self.encoding_cache is not None:
+            self.encoding_cache.update(encodings)
+        if self.transaction is not None:
+            self.transaction.update(pending)
+
+        for records in results:
+            self.idx += 1
+            for rec in records:
+                if rec.error is None:
+                    self.records += 1
+                    if self.max is not None and rec.match is not None:
+                        self.max -= 1
+                elif self.transaction is not None:
+                    self.transaction_failed = True
+                yield rec
+
+                if self.max is not None and self.max == 0:
+                    self.kill()
+                    break
 
-            self.searcher = _FileSearch(
+            if self.abort:
+                break
+            self._set_snapshot_records(records)
+
+    def walk_files_parallel(self):
+        """
+        Crawl the directory and search the files with a pool of worker processes.
+
+        Files are sent to the workers in batches, and the results are gathered in the order
+        the batches were sent, so the per file ordering is the same from run to run.
+        """
+
+        pending = deque()
+        batch = []
+        file_id = -1
+        max_pending = self.workers * 2
+
+        executor = futures.ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(
                 self.search_params,
-                file_info,
-                self.idx,
                 self.file_flags,
                 self.context,
                 self.encoding,
                 self.backup_location,
-                self.max,
-                content_buffer,
                 self.regex_mode,
-                self.encoding_options
+                self.encoding_options,
+                self.stream_overlap,
+                self.encoding_cache_file,
+                self.journal.folder if self.journal is not None else None,
+                self.transaction is not None
             )
-            for rec in self.searcher.run():
-                if rec.error is None:
+        )
+
+        try:
+            for f in self.path_walker.imatch():
+                if isinstance(f, FileAttrRecord) and f.skipped:
+                    self.idx += 1
                     self.records += 1
-                    if self.max is not None and rec.match is not None:
-                        self.max -= 1
-                yield rec
+                    self.skipped += 1
+                    yield f
+                elif f.error:
+                    self.idx += 1
+                    self.records += 1
+                    yield f
+                else:
+                    file_id += 1
+                    records = None
+                    if self.snapshot is not None:
+                        f, records = self._get_snapshot_records(file_id, f)
+                    if records is not None:
+                        self.idx += 1
+                        yield from self._get_records(records)
+                    else:
+                        batch.append((file_id, f))
+
+                if self.abort:
+                    break
+
+                if len(batch) >= PARALLEL_BATCH:
+                    pending.append(executor.submit(_search_batch, batch, self.max))
+                    batch = []
+
+                    # Don't let the walker get too far ahead of the workers.
+                    while len(pending) >= max_pending and not self.abort:
+                        yield from self._get_batch_results(pending.popleft())
+
+            if batch and not self.abort:
+                pending.append(executor.submit(_search_batch, batch, self.max))
+
+            while pending and not self.abort:
+                yield from self._get_batch_results(pending.popleft())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self.transaction is not None:
+                # Files replaced in batches that were never gathered aren't swapped in.
+                leftover = _writer.Transaction()
+                for future in pending:
+                    if not future.cancelled() and future.exception() is None:
+                        leftover.update(future.result()[2])
+                leftover.rollback()
+
+    def _pipeline_put(self, q, item, stop):
+        """Put an item in a pipeline queue, waiting while the queue is full unless we are stopped."""
+
+        while not self.abort and not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:  # noqa: PERF203
+                pass
+        return False
 
-                if self.max is not None and self.max == 0:
-                    self.kill()
+    def _pipeline_stage(self, source, process=None, size=PIPELINE_QUEUE):
+        """
+        Run a pipeline stage in a thread and return a generator of its results.
+
+        Each item from the source is optionally processed and sent through a bounded queue.
+        When the queue is full, the stage waits, which applies backpressure to the previous stage.
+        """
+
+        q = queue.Queue(size)
+        stop = threading.Event()
+        done = object()
+
+        def run():
+            """Run the stage."""
+
+            try:
+                for item in source:
+                    if process is not None:
+                        item = process(item)
+                    if not self._pipeline_put(q, item, stop):
+                        break
+            except Exception:
+                self._pipeline_put(q, ErrorRecord(get_exception()), stop)
+            finally:
+                close = getattr(source, 'close', None)
+                if close is not None:
+                    close()
+                self._pipeline_put(q, done, stop)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while not self.abort:
+                try:
+                    item = q.get(timeout=0.1)
+                except queue.Empty:  # noqa: PERF203
+                    continue
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def walk_files_pipeline(self):
+        """
+        Crawl the directory and search the files with a staged pipeline.
+
+        The directory walker runs in one thread, file info gathering and encoding detection
+        run in another, and the searching happens in the calling thread. Each stage is connected
+        by a bounded queue, so I/O latency is hidden behind the searching.
+        """
+
+        file_id = -1
+
+        def prepare(f):
+            """Detect the encoding of walked files."""
+
+            nonlocal file_id
+            file_id += 1
+            if isinstance(f, FileAttrRecord) and not f.skipped and not f.error:
+                if self.snapshot is not None:
+                    f, records = self._get_snapshot_records(file_id, f)
+                    if records is not None:
+                        return records
+                searcher = self._get_searcher(f, file_id)
+                searcher.prepare()
+                return searcher
+            return f
+
+        # Prepared files are held open for the search, so fewer of them are queued up.
+        for item in self._pipeline_stage(self._pipeline_stage(self.path_walker.imatch()), prepare, PIPELINE_OPEN):
+            if isinstance(item, _FileSearch):
+                self.idx += 1
+                item.max_count = self.max
+                self.searcher = item
+                yield from self._run_searcher()
+            elif isinstance(item, list):
+                # The records of an unchanged file from the snapshot.
+                self.idx += 1
+                yield from self._get_records(item)
+            else:
+                self.idx += 1
+                self.records += 1
+                if isinstance(item, FileAttrRecord) and item.skipped:
+                    self.skipped += 1
+                yield item
+
+            if self.abort:
+                break
 
     def walk_files(self):
         """Crawl the directory."""
 
+        if self._is_parallel():
+            yield from self.walk_files_parallel()
+            return
+
+        if self.pipeline:
+            yield from self.walk_files_pipeline()
+            return
+
         folder_limit = 100
 
         for f in self.path_walker.imatch():
@@ -1546,6 +3518,18 @@ class Rummage:
         Return the results of each file via a generator.
         """
 
+        for result in self._find():
+            # Remember the files that were searched, so they can be watched.
+            info = getattr(result, 'info', None)
+            if info is not None:
+                self.searched[info.name] = info.id
+            elif isinstance(result, FileAttrRecord) and not result.skipped and result.error is None:
+                self.searched[result.name] = self.idx
+            yield result
+
+    def _find(self):
+        """Find the files and search them."""
+
         self.alive = True
         self.idx = -1
         self.skipped = 0
@@ -1553,36 +3537,267 @@ class Rummage:
         if self.setup_error:
             yield self.setup_error
         else:
-            if len(self.files):
-                # Single target
-                if len(self.search_params):
-                    # Search the file
-                    for result in self.search_file(self.target if self.buffer_input else None):
-                        yield result
-                else:
-                    # Single file with no search pattern, so just return the file
-                    self.records += 1
-                    yield self._get_next_file()
-            else:
-                # Directory to crawl
-                if len(self.search_params):
-                    # Crawl directory and search files.
-                    try:
-                        for result in self.walk_files():
+            # A run that doesn't finish, as when the generator is closed early, never swaps in its files.
+            finished = False
+            try:
+                if len(self.files):
+                    # Single target
+                    if len(self.search_params):
+                        # Search the file
+                        for result in self.search_file(self.target if self.buffer_input else None):
                             yield result
-                    except Exception:  # pragma: no cover
-                        yield ErrorRecord(get_exception())
-                else:
-                    # No search pattern, so just return files that *would* be searched.
-                    for f in self.path_walker.imatch():
-                        self.idx += 1
+                    else:
+                        # Single file with no search pattern, so just return the file
                         self.records += 1
-                        if isinstance(f, FileAttrRecord) and f.skipped:
-                            self.skipped += 1
-                        yield f
+                        yield self._get_next_file()
+                else:
+                    # Directory to crawl
+                    if len(self.search_params):
+                        # Crawl directory and search files.
+                        try:
+                            for result in self.walk_files():
+                                yield result
+                        except Exception:  # pragma: no cover
+                            self.transaction_failed = True
+                            yield ErrorRecord(get_exception())
+                    else:
+                        # No search pattern, so just return files that *would* be searched.
+                        for f in self.path_walker.imatch():
+                            self.idx += 1
+                            self.records += 1
+                            if isinstance(f, FileAttrRecord) and f.skipped:
+                                self.skipped += 1
+                            elif isinstance(f, FileAttrRecord):
+                                try:
+                                    f = f.with_stat()
+                                except Exception:
+                                    f = FileAttrRecord(f.name, None, None, None, None, False, get_exception())
+                            yield f
+                            if self.abort:
+                                break
+
                         if self.abort:
-                            break
+                            self.files.clear()
+                        self.skipped = self.path_walker.get_skipped()
+
+                finished = True
+            finally:
+                if not finished and self.transaction is not None:
+                    self.transaction.rollback()
+                    self._discard_journal()
+
+            if self.transaction is not None:
+                yield from self._finish_transaction()
 
-                    if self.abort:
-                        self.files.clear()
-                    self.skipped = self.path_walker.get_skipped()
+            if self.snapshot is not None and not self.abort:
+                try:
+                    self.snapshot.save()
+                except Exception:
+                    yield ErrorRecord(get_exception())
+
+            if self.encoding_cache is not None:
+                try:
+                    self.encoding_cache.save()
+                except Exception:
+                    yield ErrorRecord(get_exception())
+
+    def _finish_transaction(self):
+        """
+        Swap in every replaced file, or none of them if a file failed or the run was stopped.
+
+        Reaching the maximum match count stops the run too, but it is a run that finished, so it is committed.
+        """
+
+        if self.transaction_failed or (self.abort and self.max != 0):
+            self.transaction.rollback()
+            self._discard_journal()
+            return
+
+        try:
+            self.transaction.commit()
+        except _writer.CleanupError:
+            # Every file was replaced, so the run's journal is still their backup.
+            yield ErrorRecord(get_exception())
+        except Exception:
+            # The files that were swapped in have been put back.
+            self.transaction_failed = True
+            self._discard_journal()
+            yield ErrorRecord(get_exception())
+
+    def _discard_journal(self):
+        """Discard the run's journal, as the files it keeps backups of were never replaced."""
+
+        if self.journal is not None:
+            shutil.rmtree(self.journal.folder, ignore_errors=True)
+
+    def _watch_folder(self, path, st=None):
+        """Watch a folder, falling back to polling if the folder can't be watched by other means."""
+
+        self.watch_folders[path] = _snapshot.fingerprint(st) if st is not None else None
+        try:
+            self.watcher.add_folder(path)
+        except OSError as e:
+            if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                # Likely out of `inotify` watches.
+                self.watcher.close()
+                self.watcher = _watch.PollWatcher(self.watch_interval)
+
+    def _unwatch_folder(self, path, callback):
+        """Stop watching a folder that is gone, along with everything in it."""
+
+        prefix = os.path.join(path, '')
+        for folder in [f for f in self.watch_folders if f == path or f.startswith(prefix)]:
+            del self.watch_folders[folder]
+            self.watcher.remove_folder(folder)
+        for name in [f for f in self.watch_files if f.startswith(prefix)]:
+            del self.watch_files[name]
+            callback(ChangeRecord(name, [], True))
+
+    def _get_watch_file(self, path):
+        """Get the file record of a watched file, or `None` if the file isn't one that is searched."""
+
+        base, name = os.path.split(path)
+        if self.path_walker is None:
+            return FileAttrRecord(path, os.path.splitext(name)[1].lower().lstrip('.'), None, None, None, False, None) \
+                if path == self.target else None
+        if base not in self.watch_folders:
+            return None
+        self.path_walker.current.entry = None
+        if not self.path_walker._valid_file(base, name):
+            return None
+        return self.path_walker.on_match(base, name)
+
+    def _search_watch_file(self, file_info, file_id):
+        """Search a file that changed while watching."""
+
+        if not len(self.search_params):
+            try:
+                return [file_info.with_stat()]
+            except Exception:
+                return [FileAttrRecord(file_info.name, None, None, None, None, False, get_exception())]
+
+        self.searcher = self._get_searcher(file_info, file_id)
+        return list(self.searcher.run())
+
+    def _check_watch_folder(self, path, st, pending, callback):
+        """Check a watched folder, or a folder that might need to be, and queue up anything new in it."""
+
+        fp = self.watch_folders.get(path, False)
+        if fp is not False and (st is None or (fp is not None and fp[2] != st.st_ino)):
+            # The folder is gone, or it was replaced.
+            self._unwatch_folder(path, callback)
+            fp = False
+        if st is None or (fp is not None and fp == _snapshot.fingerprint(st)):
+            return
+
+        if fp is False:
+            # A new folder.
+            if self.path_walker is None:
+                return
+            base, name = os.path.split(path)
+            if base not in self.watch_folders or (not self.path_walker.follow_links and os.path.islink(path)):
+                return
+            if not self.path_walker._valid_folder(base, name):
+                return
+
+        # Watch the folder before listing it, so nothing is missed.
+        self._watch_folder(path, st)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    child = os.path.join(path, entry.name)
+                    if child not in self.watch_folders and child not in self.watch_files:
+                        pending.append(child)
+        except OSError:
+            pass
+
+    def _check_watch_file(self, path, st, callback):
+        """Search a watched file, or a file that might need to be, if it changed."""
+
+        file_id, fp = self.watch_files.get(path, (None, None))
+        if file_id is not None and fp is not None and fp == _snapshot.fingerprint(st):
+            return
+
+        file_info = self._get_watch_file(path)
+        if file_info is None:
+            # The file is no longer one that is searched, such as when it grew past the size limit.
+            if file_id is not None:
+                del self.watch_files[path]
+                callback(ChangeRecord(path, [], True))
+            return
+
+        if file_id is None:
+            self.watch_id += 1
+            file_id = self.watch_id
+        records = self._search_watch_file(file_info, file_id)
+        if not self.abort:
+            self.watch_files[path] = (file_id, _snapshot.fingerprint(st))
+            callback(ChangeRecord(path, records, False))
+
+    def _check_watch(self, changed, callback):
+        """Check the paths that changed, and report the files that changed."""
+
+        pending = deque(changed)
+        while pending and not self.abort:
+            path = pending.popleft()
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+
+            if path in self.watch_folders or (st is not None and stat.S_ISDIR(st.st_mode)):
+                if path in self.watch_files:
+                    del self.watch_files[path]
+                    callback(ChangeRecord(path, [], True))
+                self._check_watch_folder(path, st, pending, callback)
+            elif st is not None:
+                self._check_watch_file(path, st, callback)
+            elif path in self.watch_files:
+                del self.watch_files[path]
+                callback(ChangeRecord(path, [], True))
+
+    def watch(self, callback, interval=WATCH_INTERVAL, poll=False):
+        """
+        Watch the files and folders that were searched, and search files again as they change.
+
+        This is meant to be called after `find` has finished. Created and modified files are searched,
+        and each change is sent to `callback` as a `ChangeRecord` with the records that replace the file's
+        previous records. Deleted files, and files that no longer qualify to be searched, are reported as removed.
+        Changes are waited on with `inotify` on Linux, otherwise, or if `poll` is enabled, everything is checked
+        every `interval` seconds. Watching continues until the search is killed.
+        """
+
+        if self.search_params.is_replace():
+            raise RummageException("Replace searches can't be watched.")
+        if self.abort or self.buffer_input or self.setup_error is not None:
+            return
+
+        self.watch_interval = interval
+        self.watch_id = self.idx
+        self.watch_folders = {}
+        self.watch_files = {}
+        self.watcher = _watch.get_watcher(interval, poll)
+        try:
+            folders = self.path_walker.folders if self.path_walker is not None else (os.path.dirname(self.target),)
+            for folder in folders:
+                folder = os.path.normpath(folder)
+                try:
+                    self._watch_folder(folder, os.stat(folder))
+                except OSError:
+                    self.watch_folders[folder] = None
+            for name, file_id in self.searched.items():
+                try:
+                    fp = _snapshot.fingerprint(os.stat(name))
+                except OSError:
+                    fp = None
+                self.watch_files[name] = (file_id, fp)
+
+            changed = [name for name, (file_id, fp) in self.watch_files.items() if fp is None]
+            while not self.abort:
+                if changed is None:
+                    changed = list(self.watch_folders) + list(self.watch_files)
+                if changed:
+                    self._check_watch(changed, callback)
+                changed = self.watcher.read(WATCH_WAIT)
+        finally:
+            self.watcher.close()
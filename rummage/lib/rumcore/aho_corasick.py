@@ -0,0 +1,330 @@
+"""
+Aho-Corasick.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+# The only character that doesn't lower case to a single character.
+DOTTED_CAPITAL_I = 'İ'
+
+BYTE_FOLD = bytes(range(256)).lower()
+
+# Short term lists are quicker to search with an alternation of the terms, as the regular expression engine runs in C,
+# but it tries each term in turn where a term could start, so it slows down as the term list grows.
+ALTERNATION_LIMIT = 100
+
+
+class TermMatch:
+    """A match of one of the terms that acts enough like a regular expression match for a search."""
+
+    __slots__ = ('_span', 'endpos', 'index', 'pos', 're', 'string', 'term')
+
+    def __init__(self, automaton, string, pos, endpos, index, span):
+        """Initialize."""
+
+        self.re = automaton
+        self.string = string
+        self.pos = pos
+        self.endpos = endpos
+        self.term = automaton.terms[index]
+        self.index = index
+        self._span = span
+
+    def _check_group(self, group):
+        """Terms have no groups but the whole match."""
+
+        if group != 0:
+            raise IndexError('no such group')
+
+    def start(self, group=0):
+        """Get the start of the match."""
+
+        self._check_group(group)
+        return self._span[0]
+
+    def end(self, group=0):
+        """Get the end of the match."""
+
+        self._check_group(group)
+        return self._span[1]
+
+    def span(self, group=0):
+        """Get the span of the match."""
+
+        self._check_group(group)
+        return self._span
+
+    def group(self, *groups):
+        """Get the matched text."""
+
+        for group in groups:
+            self._check_group(group)
+        text = self.string[self._span[0]:self._span[1]]
+        return text if len(groups) < 2 else (text,) * len(groups)
+
+    def __getitem__(self, group):
+        """Get the matched text."""
+
+        return self.group(group)
+
+    def groups(self, default=None):
+        """Terms have no groups."""
+
+        return ()
+
+    def groupdict(self, default=None):
+        """Terms have no named groups."""
+
+        return {}
+
+    @property
+    def lastindex(self):
+        """Terms have no groups."""
+
+        return None
+
+    @property
+    def lastgroup(self):
+        """Terms have no groups."""
+
+        return None
+
+    def __repr__(self):
+        """Representation."""
+
+        return '<%s object; span=%r, match=%r>' % (self.__class__.__name__, self._span, self.group())
+
+
+class AhoCorasick:
+    """
+    Search for many literal terms at once.
+
+    The automaton's transitions are kept in flat arrays: the labels of a state's transitions are sorted and
+    stored next to each other, so a state is just a range of the label and target arrays, and each transition
+    is found with a binary search. This keeps large term lists compact.
+
+    Like an alternation of the terms sorted longest first, matches are found leftmost first, then longest,
+    and don't overlap.
+    """
+
+    def __init__(self, terms, ignorecase=False):
+        """Build the automaton."""
+
+        unique = {}
+        for term in terms:
+            if term and term not in unique:
+                unique[term] = len(unique)
+        self.terms = tuple(unique)
+        self.ignorecase = ignorecase
+        self.binary = bool(self.terms) and isinstance(self.terms[0], bytes)
+        if any(isinstance(term, bytes) != self.binary for term in self.terms):
+            raise TypeError('Terms must all be bytes or all be str')
+
+        # Build the trie.
+        trie = [{}]
+        found = [-1]
+        depth = [0]
+        self.lookup = {}
+        for index, term in enumerate(self.terms):
+            key = self._fold(term)
+            self.lookup.setdefault(key, index)
+            state = 0
+            for code in self._codes(key):
+                target = trie[state].get(code)
+                if target is None:
+                    target = len(trie)
+                    trie[state][code] = target
+                    trie.append({})
+                    found.append(-1)
+                    depth.append(depth[state] + 1)
+                state = target
+            # Terms that only differ by case are the same term when ignoring case, so the first one is reported.
+            if found[state] == -1:
+                found[state] = index
+
+        # Link each state to the state of its longest proper suffix in the trie,
+        # and to the state of the longest term that is a suffix of it.
+        fail = [0] * len(trie)
+        link = [0] * len(trie)
+        queue = deque(trie[0].values())
+        while queue:
+            state = queue.popleft()
+            for code, target in trie[state].items():
+                suffix = fail[state]
+                while suffix and code not in trie[suffix]:
+                    suffix = fail[suffix]
+                suffix = trie[suffix].get(code, 0)
+                fail[target] = suffix
+                link[target] = suffix if found[suffix] != -1 else link[suffix]
+                queue.append(target)
+
+        # Flatten the transitions.
+        self.offsets = array('l', [0])
+        self.labels = array('l')
+        self.targets = array('l')
+        for transitions in trie:
+            for code in sorted(transitions):
+                self.labels.append(code)
+                self.targets.append(transitions[code])
+            self.offsets.append(len(self.labels))
+        self.fail = array('l', fail)
+        self.link = array('l', link)
+        self.found = array('l', found)
+        self.depth = array('l', depth)
+
+        # Jump over text that can't start a term instead of walking the automaton through it.
+        first = sorted(trie[0])
+        if not first:
+            self.skip = re.compile(b'(?!)' if self.binary else '(?!)')
+        elif self.binary:
+            self.skip = re.compile(
+                b'[' + b''.join(re.escape(bytes([c])) for c in first) + b']',
+                re.IGNORECASE if ignorecase else 0
+            )
+        else:
+            self.skip = re.compile('[' + ''.join(re.escape(chr(c)) for c in first) + ']')
+
+        self.alternation = None
+        if len(self.lookup) <= ALTERNATION_LIMIT:
+            keys = sorted(self.lookup, key=len, reverse=True)
+            self.alternation = re.compile(
+                (b'|' if self.binary else '|').join(re.escape(key) for key in keys),
+                re.IGNORECASE if self.binary and ignorecase else 0
+            )
+
+    def __len__(self):
+        """Get the number of terms."""
+
+        return len(self.terms)
+
+    def __repr__(self):
+        """Representation."""
+
+        return '%s(%d terms, ignorecase=%r)' % (self.__class__.__name__, len(self.terms), self.ignorecase)
+
+    def _codes(self, term):
+        """Get the character codes of a term."""
+
+        return term if self.binary else map(ord, term)
+
+    def _fold(self, text):
+        """Fold the case of text without changing its length."""
+
+        if not self.ignorecase:
+            return text
+        elif self.binary:
+            return text.lower()
+        elif DOTTED_CAPITAL_I in text:
+            return DOTTED_CAPITAL_I.join(part.lower() for part in text.split(DOTTED_CAPITAL_I))
+        return text.lower()
+
+    def _spans(self, text, pos, endpos):
+        """Find the spans of the terms in the text along with the index of the term found."""
+
+        offsets = self.offsets
+        labels = self.labels
+        targets = self.targets
+        fail = self.fail
+        link = self.link
+        found = self.found
+        depth = self.depth
+        skip = self.skip.search
+        is_str = not self.binary
+        # Text is folded up front, but bytes, which may be a memory map, are folded as they are read.
+        table = BYTE_FOLD if self.binary and self.ignorecase else None
+
+        if self.alternation is not None:
+            lookup = self.lookup
+            for m in self.alternation.finditer(text, pos, endpos):
+                key = m.group()
+                yield m.start(), m.end(), lookup[key if table is None else key.lower()]
+            return
+
+        i = pos
+        while i < endpos:
+            m = skip(text, i, endpos)
+            if m is None:
+                return
+            i = m.start()
+
+            state = 0
+            best = None
+            while i < endpos:
+                code = text[i]
+                if is_str:
+                    code = ord(code)
+                elif table is not None:
+                    code = table[code]
+
+                while True:
+                    lo = offsets[state]
+                    hi = offsets[state + 1]
+                    j = bisect_left(labels, code, lo, hi)
+                    if j < hi and labels[j] == code:
+                        state = targets[j]
+                        break
+                    if not state:
+                        break
+                    state = fail[state]
+                i += 1
+
+                # The longest term ending here is the only one that can start before the others.
+                term_state = state if found[state] != -1 else link[state]
+                if term_state:
+                    start = i - depth[term_state]
+                    if best is None or start <= best[0]:
+                        best = (start, i, found[term_state])
+
+                # Stop when no term that is still being matched can start at or before the best match.
+                if best is not None:
+                    if i - depth[state] > best[0]:
+                        break
+                elif not state:
+                    break
+
+            if best is not None:
+                yield best
+                i = best[1]
+
+    def finditer(self, string, pos=0, endpos=None):
+        """Find all the non-overlapping matches of the terms."""
+
+        if not self.terms:
+            return
+        length = len(string)
+        endpos = length if endpos is None else max(min(endpos, length), 0)
+        pos = min(max(pos, 0), endpos)
+        text = string
+        if self.ignorecase and not self.binary:
+            text = self._fold(string[:endpos])
+        for start, end, index in self._spans(text, pos, endpos):
+            yield TermMatch(self, string, pos, endpos, index, (start, end))
+
+    def search(self, string, pos=0, endpos=None):
+        """Find the first match of the terms."""
+
+        return next(self.finditer(string, pos, endpos), None)
+
+    def findall(self, string, pos=0, endpos=None):
+        """Find the text of all the non-overlapping matches of the terms."""
+
+        return [m.group() for m in self.finditer(string, pos, endpos)]
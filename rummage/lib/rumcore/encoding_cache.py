@@ -0,0 +1,136 @@
+"""
+Encoding cache.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+VERSION = 1
+
+# Number of files whose encodings are kept, the least recently used are dropped first
+MAX_ENTRIES = 100000
+
+
+def get_key(st):
+    """Get the key of a file from its stat result, which changes when the file does."""
+
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class EncodingCache:
+    """
+    The detected encodings of files, kept on disk between searches.
+
+    Files are keyed by their device, inode, size, and modification time, so the encoding of a file
+    is detected again as soon as it changes. The cache is only used with the same encoding options
+    it was built with, as they change what is detected.
+
+    Files modified after the cache was loaded are not kept, as a change in the same clock tick
+    as the detection could otherwise go unnoticed.
+
+    With `track`, the encodings that are added are tracked, so a cache in a worker process can send them on.
+    """
+
+    def __init__(self, file_name, options, max_entries=MAX_ENTRIES, track=False):
+        """Initialize."""
+
+        self.file_name = file_name
+        self.options = repr(sorted((options or {}).items()))
+        self.max_entries = max_entries
+        self.time = time.time_ns()
+        self.lock = threading.Lock()
+        self.changed = False
+        self.added = [] if track else None
+        self.entries = self._load()
+
+    def _load(self):
+        """Load the cache, if there is a usable one."""
+
+        try:
+            with open(self.file_name, 'rb') as f:
+                data = pickle.load(f)
+        except Exception:
+            return OrderedDict()
+        if not isinstance(data, dict) or data.get('version') != VERSION or data.get('options') != self.options:
+            return OrderedDict()
+        return OrderedDict(data['entries'])
+
+    def get(self, st):
+        """Get the encoding of a file from its stat result, or `None` if it isn't known."""
+
+        key = get_key(st)
+        with self.lock:
+            encoding = self.entries.get(key)
+            if encoding is not None:
+                self.entries.move_to_end(key)
+        return encoding
+
+    def set(self, st, encoding):
+        """Keep the encoding of a file."""
+
+        if st.st_mtime_ns >= self.time:
+            return
+        self.update([(get_key(st), tuple(encoding))])
+
+    def update(self, entries):
+        """Keep the encodings of files by their keys."""
+
+        with self.lock:
+            for key, encoding in entries:
+                self.entries[key] = encoding
+                self.entries.move_to_end(key)
+                if self.added is not None:
+                    self.added.append((key, encoding))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.changed = self.changed or bool(entries)
+
+    def pop_added(self):
+        """Get and forget the encodings that were added, so they can be sent on to another cache."""
+
+        with self.lock:
+            added = self.added or []
+            if self.added is not None:
+                self.added = []
+        return added
+
+    def save(self):
+        """Save the cache if it changed."""
+
+        with self.lock:
+            if not self.changed:
+                return
+            data = {'version': VERSION, 'options': self.options, 'entries': list(self.entries.items())}
+            self.changed = False
+
+        location = os.path.dirname(self.file_name)
+        if location:
+            os.makedirs(location, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=location or None, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.file_name)
+        except Exception:
+            os.remove(temp)
+            raise
@@ -0,0 +1,231 @@
+"""
+Ignore files.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import os
+import re
+
+# Ignore files in the order they are read, so the rules of the later ones win.
+IGNORE_FILES = ('.gitignore', '.ignore', '.rummageignore')
+
+# Git's own folder, which is never part of what Git tracks.
+GIT_FOLDER = '.git'
+
+
+def _translate_class(pattern, i):
+    """Translate the character class starting at `i`, and return it along with where it ends, or `None`."""
+
+    j = i + 1
+    negate = j < len(pattern) and pattern[j] in '!^'
+    if negate:
+        j += 1
+    # A `]` right at the start is part of the class.
+    if j < len(pattern) and pattern[j] == ']':
+        j += 1
+    while j < len(pattern) and pattern[j] != ']':
+        j += 1
+    if j >= len(pattern):
+        return None, i
+
+    content = pattern[i + 1 + negate:j]
+    chars = []
+    k = 0
+    while k < len(content):
+        c = content[k]
+        if c == '\\' and k + 1 < len(content):
+            k += 1
+            chars.append(re.escape(content[k]))
+        elif c == '-' and chars and k + 1 < len(content):
+            chars.append('-')
+        else:
+            chars.append(re.escape(c))
+        k += 1
+    # Like wildcards, classes never match a path separator.
+    return '(?!/)[%s%s]' % ('^' if negate else '', ''.join(chars)), j + 1
+
+
+def _translate(pattern):
+    """Translate a Git wildcard pattern to a regular expression."""
+
+    result = []
+    i = 0
+    length = len(pattern)
+    while i < length:
+        c = pattern[i]
+        if c == '*':
+            j = i
+            while j < length and pattern[j] == '*':
+                j += 1
+            if j - i == 2 and (i == 0 or pattern[i - 1] == '/') and (j == length or pattern[j] == '/'):
+                if j == length:
+                    # `foo/**` matches everything in `foo`.
+                    result.append('.*')
+                else:
+                    # `**/` matches any number of folders, even none.
+                    result.append('(?:.*/)?')
+                    j += 1
+            else:
+                result.append('[^/]*')
+            i = j
+            continue
+        elif c == '?':
+            result.append('[^/]')
+        elif c == '[':
+            value, end = _translate_class(pattern, i)
+            if value is not None:
+                result.append(value)
+                i = end
+                continue
+            result.append(re.escape(c))
+        elif c == '\\' and i + 1 < length:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return ''.join(result)
+
+
+def parse_rule(line):
+    """
+    Parse a line of an ignore file.
+
+    Returns the regular expression, whether the rule negates, and whether the rule only applies to folders,
+    or `None` if the line has no rule.
+    """
+
+    line = line.rstrip('\r\n')
+    if not line or line.startswith('#'):
+        return None
+
+    # Trailing spaces are dropped, unless they are escaped.
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    folder_only = line.endswith('/')
+    if folder_only:
+        line = line[:-1]
+    if not line:
+        return None
+
+    # A rule with a slash anywhere but the end is relative to the ignore file's folder,
+    # otherwise, it matches names at any depth.
+    anchored = '/' in line
+    if line.startswith('/'):
+        line = line[1:]
+    pattern = _translate(line)
+    if not anchored:
+        pattern = '(?:.*/)?' + pattern
+    return pattern, negate, folder_only
+
+
+class IgnoreRules:
+    """
+    The rules of the ignore files in a folder.
+
+    All the rules are compiled into one pattern, with the rules in reverse, so the first alternative
+    that matches is the last matching rule, which is the one that decides.
+    """
+
+    def __init__(self, lines, ignorecase=False):
+        """Initialize."""
+
+        rules = [rule for rule in (parse_rule(line) for line in lines) if rule is not None]
+        self.negate = [negate for _, negate, _ in rules]
+        flags = re.IGNORECASE if ignorecase else 0
+        self.folder_pattern = self._compile(rules, flags, True)
+        self.file_pattern = self._compile(rules, flags, False)
+
+    def __len__(self):
+        """Get the number of rules."""
+
+        return len(self.negate)
+
+    def _compile(self, rules, flags, folder):
+        """Compile the rules that apply to files or folders."""
+
+        alternatives = [
+            '(?P<_%d>%s)' % (index, pattern)
+            for index, (pattern, _, folder_only) in reversed(list(enumerate(rules)))
+            if folder or not folder_only
+        ]
+        return re.compile('|'.join(alternatives), flags) if alternatives else None
+
+    def match(self, path, folder=False):
+        """
+        Match a path relative to the rules' folder.
+
+        Returns `True` if the path is ignored, `False` if it is explicitly not ignored, or `None` if no rule matched.
+        """
+
+        pattern = self.folder_pattern if folder else self.file_pattern
+        m = pattern.fullmatch(path) if pattern is not None else None
+        if m is None:
+            return None
+        return not self.negate[int(m.lastgroup[1:])]
+
+
+def read_rules(folder, ignorecase=False):
+    """Read the rules of the ignore files in a folder, or get `None` if there are none."""
+
+    lines = []
+    for name in IGNORE_FILES:
+        try:
+            with open(os.path.join(folder, name), 'r', encoding='utf-8', errors='replace') as f:
+                lines.extend(f)
+        except OSError:  # noqa: PERF203
+            pass
+    rules = IgnoreRules(lines, ignorecase) if lines else None
+    return rules if rules else None
+
+
+def get_work_tree(folder):
+    """Get the root of the Git work tree a folder is in, or `None`."""
+
+    current = os.path.abspath(folder)
+    while True:
+        if os.path.exists(os.path.join(current, GIT_FOLDER)):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def is_ignored(rules, path, folder=False):
+    """
+    Check if a path is ignored by the rules of the folders it is in.
+
+    `rules` is a sequence of the folders the path is in, with the rules of each, outermost first.
+    The rules of the innermost folder with a matching rule decide.
+    """
+
+    for base, folder_rules in reversed(rules):
+        relative = path[len(base):].lstrip(os.sep)
+        if os.sep != '/':  # pragma: no cover
+            relative = relative.replace(os.sep, '/')
+        ignored = folder_rules.match(relative, folder)
+        if ignored is not None:
+            return ignored
+    return False
@@ -0,0 +1,186 @@
+"""
+Journal.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import os
+import pickle
+import shutil
+import struct
+import threading
+import time
+import zlib
+from . import writer as _writer
+
+VERSION = 1
+SUFFIX = '.journal'
+
+# Each record is its compressed size followed by the compressed record.
+HEADER = struct.Struct('<Q')
+
+
+class JournalError(Exception):
+    """A file can't be restored from a journal."""
+
+
+def fingerprint(st):
+    """Get the fingerprint of a file from its stat result."""
+
+    return (st.st_size, st.st_mtime_ns)
+
+
+def new_run():
+    """Get the name of a new run, which is when it started."""
+
+    return str(time.time_ns())
+
+
+class JournalWriter:
+    """
+    Keep the backups of the files a replace run changes in a journal.
+
+    Instead of a copy of each file, the journal keeps the original bytes of each span that was replaced,
+    where the span is in the replaced file, and the fingerprint of the file before and after it was replaced.
+    Records are compressed and added as each file is replaced, so what was replaced is kept even if the run
+    is stopped part way through.
+
+    A run's journal is a folder, in which each process that replaces files writes its own file.
+    """
+
+    def __init__(self, folder):
+        """Initialize."""
+
+        self.folder = folder
+        self.file_name = os.path.join(folder, '%d%s' % (os.getpid(), SUFFIX))
+        self.lock = threading.Lock()
+
+    def add(self, name, original, replaced, spans):
+        """
+        Add the backup of a replaced file.
+
+        `original` and `replaced` are the stat results of the file before and after it was replaced,
+        and `spans` are the start, length, and original bytes of each span in the replaced file that changed.
+        """
+
+        record = zlib.compress(
+            pickle.dumps(
+                (VERSION, os.path.abspath(name), fingerprint(original), fingerprint(replaced), spans),
+                pickle.HIGHEST_PROTOCOL
+            )
+        )
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self.file_name, 'ab') as f:
+                f.write(HEADER.pack(len(record)) + record)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _iter_records(folder, load=True):
+    """Get the records of a run, stopping at a record that was cut off in each file."""
+
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(SUFFIX):
+            continue
+        with open(os.path.join(folder, name), 'rb') as f:
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                size = HEADER.unpack(header)[0]
+                if not load:
+                    f.seek(size, os.SEEK_CUR)
+                    yield None
+                    continue
+                try:
+                    record = pickle.loads(zlib.decompress(f.read(size)))
+                except Exception:
+                    break
+                if record[0] != VERSION:
+                    break
+                yield record[1:]
+
+
+def get_runs(location):
+    """Get the runs with journals in a location, newest first, as the run, when it started, and how many files."""
+
+    runs = []
+    try:
+        names = os.listdir(location)
+    except OSError:
+        return runs
+    for run in names:
+        folder = os.path.join(location, run)
+        if run.isdigit() and os.path.isdir(folder):
+            runs.append((run, int(run) / 1e9, sum(1 for _ in _iter_records(folder, False))))
+    runs.sort(key=lambda r: int(r[0]), reverse=True)
+    return runs
+
+
+def _restore_file(name, original, replaced, spans):
+    """Put the original spans back in a replaced file."""
+
+    st = os.stat(name)
+    if fingerprint(st) != replaced:
+        raise JournalError('File changed since it was replaced: %s' % name)
+    if st.st_size + sum(len(data) - length for _, length, data in spans) != original[0]:
+        raise JournalError('Journal does not match the file: %s' % name)
+
+    with _writer.ReplaceWriter(name) as writer:
+        offset = 0
+        for start, length, data in spans:
+            writer.copy(offset, start)
+            writer.write(data)
+            offset = start + length
+        writer.copy(offset, st.st_size)
+        writer.commit()
+    os.utime(name, ns=(st.st_atime_ns, original[1]))
+
+
+def _try_restore_file(name, original, replaced, spans):
+    """Restore a replaced file, returning the error if it can't be restored."""
+
+    try:
+        _restore_file(name, original, replaced, spans)
+    except Exception as e:
+        return e
+    return None
+
+
+def restore(location, run):
+    """
+    Restore the files a run replaced.
+
+    Files that changed since the run are left as they are. Returns each file that couldn't be restored
+    along with the error, and discards the run's journal if every file was restored.
+    """
+
+    errors = []
+    for record in _iter_records(os.path.join(location, run)):
+        error = _try_restore_file(*record)
+        if error is not None:
+            errors.append((record[0], error))
+    if not errors:
+        discard(location, run)
+    return errors
+
+
+def discard(location, run):
+    """Discard a run's journal, keeping the files as the run left them."""
+
+    shutil.rmtree(os.path.join(location, run))
@@ -0,0 +1,445 @@
+"""
+Pattern Info.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import re
+try:
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse
+try:
+    import regex
+    from regex import _regex_core
+    REGEX_SUPPORT = True
+except ImportError:  # pragma: no cover
+    REGEX_SUPPORT = False
+
+# Give up on a pattern if it would take more literals than this to describe it.
+MAX_LITERALS = 64
+
+# Whether a pattern can be run over the raw bytes of a file
+BYTES_UNSAFE = 0
+BYTES_SAFE = 1
+BYTES_NO_CR = 2
+
+# Files are read with universal newlines, so these never show up in the text as written in the pattern.
+_NEWLINES = frozenset(('\r', '\n'))
+
+_RE_REPEATS = tuple(
+    op for op in (
+        getattr(sre_parse, 'MAX_REPEAT', None),
+        getattr(sre_parse, 'MIN_REPEAT', None),
+        getattr(sre_parse, 'POSSESSIVE_REPEAT', None)
+    ) if op is not None
+)
+_RE_ATOMIC = getattr(sre_parse, 'ATOMIC_GROUP', None)
+
+
+def _re_node(op, av):
+    """Convert a `re` parse tree node."""
+
+    if op == sre_parse.LITERAL:
+        return ('lit', chr(av))
+    elif op == sre_parse.SUBPATTERN:
+        add_flags, subpattern = av[1], av[-1]
+        if add_flags & re.IGNORECASE:
+            return None
+        return ('seq', [_re_tree(subpattern)])
+    elif op == sre_parse.BRANCH:
+        return ('alt', [_re_tree(b) for b in av[1]])
+    elif op in _RE_REPEATS:
+        return ('seq', [_re_tree(av[2])]) if av[0] >= 1 else None
+    elif _RE_ATOMIC is not None and op == _RE_ATOMIC:
+        return ('seq', [_re_tree(av)])
+    elif op == sre_parse.ASSERT:
+        return ('seq', [_re_tree(av[1])])
+    return None
+
+
+def _re_tree(subpattern):
+    """Convert a `re` sub pattern."""
+
+    return ('seq', [_re_node(op, av) for op, av in subpattern])
+
+
+def _re_literals(pattern):
+    """Get the required literals of a `re` pattern."""
+
+    if pattern.flags & re.IGNORECASE or not isinstance(pattern.pattern, str):
+        return None
+
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern', None)
+    if state is not None and state.flags & re.IGNORECASE:
+        return None
+    return _required(_re_tree(parsed))
+
+
+if REGEX_SUPPORT:
+    def _regex_node(node):
+        """Convert a `regex` parse tree node."""
+
+        if isinstance(node, _regex_core.Fuzzy):
+            return None
+        elif isinstance(node, _regex_core.Sequence):
+            items = []
+            for item in node.items:
+                if isinstance(item, _regex_core.String) and not item.case_flags & regex.IGNORECASE:
+                    items.extend(('lit', chr(c)) for c in item.characters)
+                else:
+                    items.append(_regex_node(item))
+            return ('seq', items)
+        elif isinstance(node, _regex_core.StringSet):
+            return None
+        elif isinstance(node, _regex_core.Branch):
+            return ('alt', [_regex_node(b) for b in node.branches])
+        elif isinstance(node, _regex_core.Character):
+            if type(node) is not _regex_core.Character or not node.positive or node.zerowidth:
+                return None
+            return None if node.case_flags & regex.IGNORECASE else ('lit', chr(node.value))
+        elif isinstance(node, _regex_core.String):
+            if node.case_flags & regex.IGNORECASE:
+                return None
+            return ('seq', [('lit', chr(c)) for c in node.characters])
+        elif isinstance(node, (_regex_core.Group, _regex_core.Atomic)):
+            return ('seq', [_regex_node(node.subpattern)])
+        elif isinstance(node, _regex_core.GreedyRepeat):
+            return ('seq', [_regex_node(node.subpattern)]) if node.min_count >= 1 else None
+        elif isinstance(node, _regex_core.LookAround):
+            return ('seq', [_regex_node(node.subpattern)]) if node.positive else None
+        return None
+
+    def _regex_literals(pattern):
+        """Get the required literals of a `regex` pattern."""
+
+        if pattern.flags & regex.IGNORECASE or not isinstance(pattern.pattern, str):
+            return None
+
+        # Compiled flags already include any global inline flags, so the pattern parses in one pass.
+        source = _regex_core.Source(pattern.pattern)
+        info = _regex_core.Info(pattern.flags, source.char_type, {})
+        source.ignore_space = bool(info.flags & regex.VERBOSE)
+        parsed = _regex_core._parse_pattern(source, info)
+        if info.flags & regex.IGNORECASE:
+            return None
+        return _required(_regex_node(parsed))
+
+
+def _best(candidates):
+    """Pick the candidate set whose shortest literal is the longest."""
+
+    best = None
+    best_key = None
+    for candidate in candidates:
+        key = (min(len(c) for c in candidate), -len(candidate))
+        if best_key is None or key > best_key:
+            best = candidate
+            best_key = key
+    return best
+
+
+def _required(node):
+    """
+    Get a set of literals of which at least one must be present in any match of the given node.
+
+    Returns `None` if nothing can be said about the node.
+    """
+
+    if node is None:
+        return None
+
+    kind, value = node
+    if kind == 'lit':
+        return None if value in _NEWLINES else frozenset((value,))
+    elif kind == 'alt':
+        literals = set()
+        for branch in value:
+            required = _required(branch)
+            if required is None:
+                return None
+            literals.update(required)
+            if len(literals) > MAX_LITERALS:
+                return None
+        return frozenset(literals)
+
+    # Sequence: runs of adjacent literals are required as is; anything else is a candidate of its own.
+    candidates = []
+    run = []
+    for item in value:
+        if item is not None and item[0] == 'lit' and item[1] not in _NEWLINES:
+            run.append(item[1])
+            continue
+        if run:
+            candidates.append(frozenset((''.join(run),)))
+            run = []
+        required = _required(item)
+        if required is not None:
+            candidates.append(required)
+    if run:
+        candidates.append(frozenset((''.join(run),)))
+    return _best(candidates)
+
+
+class _ByteUnsafe(Exception):
+    """Pattern cannot be run over bytes."""
+
+
+class _ByteCheck:
+    """
+    Check whether a pattern matches the same over ASCII compatible bytes as it does over the decoded text.
+
+    That holds when everything the pattern consumes is ASCII, as the bytes of non-ASCII characters
+    will then never match, and every match starts and ends on a character boundary.
+    """
+
+    def __init__(self, unicode):
+        """Initialize."""
+
+        self.unicode = unicode
+        self.newlines = False
+        # `re` parses `^` the same with or without `MULTILINE`, and only compiles it to a line anchor with it.
+        self.multiline = False
+
+    def char(self, value):
+        """Check a character."""
+
+        if value >= 128:
+            raise _ByteUnsafe
+        if value in (10, 13):
+            self.newlines = True
+
+    def char_range(self, lower, upper):
+        """Check a character range."""
+
+        self.char(upper)
+        if lower <= 13 and upper >= 10:
+            self.newlines = True
+
+    def case(self, ignorecase):
+        """Unicode case folding can match non-ASCII characters."""
+
+        if ignorecase and self.unicode:
+            raise _ByteUnsafe
+
+    def re_category(self, category):
+        """Check a `re` category."""
+
+        if self.unicode or category not in _RE_BYTE_CATEGORIES:
+            raise _ByteUnsafe
+        if category == sre_parse.CATEGORY_SPACE:
+            self.newlines = True
+
+    def re_at(self, at):
+        """Check a `re` anchor."""
+
+        if at in (sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY):
+            if self.unicode:
+                raise _ByteUnsafe
+        elif at in (sre_parse.AT_BEGINNING_LINE, sre_parse.AT_END, sre_parse.AT_END_LINE):
+            self.newlines = True
+        elif at == sre_parse.AT_BEGINNING and self.multiline:
+            self.newlines = True
+        elif at not in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING, sre_parse.AT_END_STRING):
+            raise _ByteUnsafe
+
+    def re_set(self, items):
+        """Check a `re` character set."""
+
+        for op, av in items:
+            if op == sre_parse.LITERAL:
+                self.char(av)
+            elif op in _RE_RANGES:
+                self.char_range(*av)
+            elif op == sre_parse.CATEGORY:
+                self.re_category(av)
+            else:
+                raise _ByteUnsafe
+
+    def re_width(self, subpattern):
+        """Check a `re` sub pattern and get its minimum width."""
+
+        width = 0
+        for op, av in subpattern:
+            if op == sre_parse.LITERAL:
+                self.char(av)
+                width += 1
+            elif op == sre_parse.IN:
+                self.re_set(av)
+                width += 1
+            elif op == sre_parse.CATEGORY:
+                self.re_category(av)
+                width += 1
+            elif op == sre_parse.AT:
+                self.re_at(av)
+            elif op == sre_parse.SUBPATTERN:
+                self.case(av[1] & re.IGNORECASE)
+                width += self.re_width(av[-1])
+            elif op == sre_parse.BRANCH:
+                width += min(self.re_width(b) for b in av[1])
+            elif op in _RE_REPEATS:
+                width += av[0] * self.re_width(av[2])
+            elif _RE_ATOMIC is not None and op == _RE_ATOMIC:
+                width += self.re_width(av)
+            elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                self.re_width(av[1])
+            elif op == sre_parse.GROUPREF:
+                pass
+            elif op == sre_parse.GROUPREF_EXISTS:
+                width += min(self.re_width(av[1]), self.re_width(av[2]) if av[2] is not None else 0)
+            else:
+                raise _ByteUnsafe
+        return width
+
+    if REGEX_SUPPORT:
+        def regex_width(self, node):
+            """Check a `regex` node and get its minimum width."""
+
+            if isinstance(node, _regex_core.Sequence):
+                return sum(self.regex_width(item) for item in node.items)
+            elif isinstance(node, _regex_core.StringSet):
+                raise _ByteUnsafe
+            elif isinstance(node, _regex_core.Branch):
+                return min(self.regex_width(b) for b in node.branches)
+            elif isinstance(node, (_regex_core.Group, _regex_core.Atomic)):
+                return self.regex_width(node.subpattern)
+            elif isinstance(node, _regex_core.GreedyRepeat):
+                return node.min_count * self.regex_width(node.subpattern)
+            elif isinstance(node, _regex_core.LookAround):
+                self.regex_width(node.subpattern)
+                return 0
+            elif isinstance(node, _regex_core.Conditional):
+                return min(self.regex_width(node.yes_item), self.regex_width(node.no_item))
+            elif isinstance(node, _regex_core.String):
+                self.case(node.case_flags & regex.IGNORECASE)
+                for c in node.characters:
+                    self.char(c)
+                return len(node.characters)
+            elif type(node) in (_regex_core.Character, _regex_core.Property, _regex_core.SetUnion):
+                self.regex_set_item(node)
+                return 1
+            elif isinstance(node, _regex_core.RefGroup):
+                self.case(node.case_flags & regex.IGNORECASE)
+                return 0
+            elif isinstance(node, _regex_core.Boundary):
+                # Default word boundaries are only used with the `WORD` flag.
+                if self.unicode or type(node) is not _regex_core.Boundary:
+                    raise _ByteUnsafe
+                return 0
+            elif isinstance(node, (_regex_core.StartOfLine, _regex_core.EndOfLine, _regex_core.EndOfStringLine)):
+                self.newlines = True
+                return 0
+            elif isinstance(node, (_regex_core.StartOfString, _regex_core.EndOfString)):
+                return 0
+            raise _ByteUnsafe
+
+        def regex_set_item(self, node):
+            """Check a `regex` character, property, or set."""
+
+            if not node.positive or node.zerowidth:
+                raise _ByteUnsafe
+            self.case(node.case_flags & regex.IGNORECASE)
+            if type(node) is _regex_core.Character:
+                self.char(node.value)
+            elif type(node) is _regex_core.Range:
+                self.char_range(node.lower, node.upper)
+            elif type(node) is _regex_core.Property:
+                if node.encoding != _regex_core.ASCII_ENCODING or node.value not in _REGEX_BYTE_PROPERTIES:
+                    raise _ByteUnsafe
+                if node.value == _REGEX_BYTE_PROPERTIES[-1]:
+                    self.newlines = True
+            elif type(node) is _regex_core.SetUnion:
+                for item in node.items:
+                    self.regex_set_item(item)
+            else:
+                raise _ByteUnsafe
+
+
+_RE_RANGES = tuple(
+    op for op in (getattr(sre_parse, 'RANGE', None), getattr(sre_parse, 'RANGE_UNI_IGNORE', None)) if op is not None
+)
+_RE_BYTE_CATEGORIES = (sre_parse.CATEGORY_DIGIT, sre_parse.CATEGORY_WORD, sre_parse.CATEGORY_SPACE)
+if REGEX_SUPPORT:
+    # The `\d`, `\w`, and `\s` properties (in that order).
+    _REGEX_BYTE_PROPERTIES = tuple(
+        item.value for item in _regex_core._parse_pattern(
+            _regex_core.Source(r'\d\w\s'), _regex_core.Info(regex.ASCII, chr, {})
+        ).items
+    )
+
+
+def byte_safety(pattern):
+    """
+    Check whether the compiled pattern can be run over the raw bytes of an ASCII compatible file.
+
+    Returns `BYTES_SAFE` if it can, `BYTES_NO_CR` if it can only when the file has no carriage returns
+    (files are read with universal newlines, so line endings differ between the bytes and the text),
+    or `BYTES_UNSAFE` if it can't.
+    """
+
+    pattern = getattr(pattern, '_pattern', pattern)
+
+    try:
+        if REGEX_SUPPORT and isinstance(pattern, regex.Pattern):
+            if pattern.flags & (regex.WORD | regex.REVERSE) or not isinstance(pattern.pattern, str):
+                return BYTES_UNSAFE
+            check = _ByteCheck(not pattern.flags & regex.ASCII)
+            source = _regex_core.Source(pattern.pattern)
+            info = _regex_core.Info(pattern.flags, source.char_type, {})
+            source.ignore_space = bool(info.flags & regex.VERBOSE)
+            check.case(info.flags & regex.IGNORECASE)
+            width = check.regex_width(_regex_core._parse_pattern(source, info))
+        elif isinstance(pattern, re.Pattern):
+            if not isinstance(pattern.pattern, str):
+                return BYTES_UNSAFE
+            check = _ByteCheck(not pattern.flags & re.ASCII)
+            parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+            state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern', None)
+            check.case((pattern.flags | state.flags) & re.IGNORECASE)
+            check.multiline = bool((pattern.flags | state.flags) & re.MULTILINE)
+            width = check.re_width(parsed)
+        else:
+            return BYTES_UNSAFE
+    except Exception:
+        return BYTES_UNSAFE
+
+    # Empty matches could land in the middle of a character.
+    if width < 1:
+        return BYTES_UNSAFE
+    return BYTES_NO_CR if check.newlines else BYTES_SAFE
+
+
+def required_literals(pattern):
+    """
+    Get literals that must be present in the text for the compiled pattern to match.
+
+    At least one of the returned literals will be found in any text the pattern matches.
+    Returns `None` when the pattern has no such literals or is too complicated to analyze.
+    """
+
+    # Unwrap `backrefs` patterns.
+    pattern = getattr(pattern, '_pattern', pattern)
+
+    try:
+        if REGEX_SUPPORT and isinstance(pattern, regex.Pattern):
+            return _regex_literals(pattern)
+        elif isinstance(pattern, re.Pattern):
+            return _re_literals(pattern)
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,165 @@
+"""
+Snapshot.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+VERSION = 1
+
+
+def fingerprint(st):
+    """Get the fingerprint of a file or folder from its stat result."""
+
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _get_listing(entries):
+    """Get the name of each directory entry and whether it is a folder or a link, or `None` if one can't be read."""
+
+    try:
+        return [(entry.name, entry.is_dir(), entry.is_symlink()) for entry in entries]
+    except OSError:
+        # Don't keep a listing we can't reproduce.
+        return None
+
+
+class FolderEntry:
+    """A directory entry from a folder listing kept in a snapshot, which acts like an `os.DirEntry`."""
+
+    __slots__ = ('_is_dir', '_is_symlink', '_stat', 'name', 'path')
+
+    def __init__(self, base, name, is_dir, is_symlink):
+        """Initialize."""
+
+        self.name = name
+        self.path = os.path.join(base, name)
+        self._is_dir = is_dir
+        self._is_symlink = is_symlink
+        self._stat = None
+
+    def is_dir(self):
+        """Check if the entry is a folder or a link to one."""
+
+        return self._is_dir
+
+    def is_symlink(self):
+        """Check if the entry is a link."""
+
+        return self._is_symlink
+
+    def stat(self):
+        """Get the stat result of the entry, following links."""
+
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+class Snapshot:
+    """
+    A snapshot of a search's folder listings and per file results, kept on disk between runs of the same search.
+
+    Snapshots are kept in a folder and named by a hash of the search root and settings, so only a rerun
+    of the same search uses them. A rerun builds a new snapshot from what it walks and searches, so files
+    and folders that are gone are dropped.
+
+    Listings and results are only reused when the folder or file was last modified before the previous run
+    started, as a change in the same clock tick as a run could otherwise go unnoticed.
+    """
+
+    def __init__(self, location, key):
+        """Initialize."""
+
+        self.key = repr(key)
+        self.file_name = os.path.join(location, hashlib.sha1(self.key.encode('utf-8')).hexdigest() + '.snapshot')
+        self.time = time.time_ns()
+        self.folders = {}
+        self.files = {}
+        self.previous = self._load()
+
+    def _load(self):
+        """Load the previous snapshot, if there is a usable one."""
+
+        try:
+            with open(self.file_name, 'rb') as f:
+                previous = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(previous, dict) or previous.get('version') != VERSION or previous.get('key') != self.key:
+            return None
+        return previous
+
+    def _get_previous(self, kind, path, st):
+        """Get what the previous snapshot has for a file or folder if it hasn't changed since then."""
+
+        if self.previous is None:
+            return None
+        value = self.previous[kind].get(path)
+        if value is None or value[0] != fingerprint(st) or st.st_mtime_ns >= self.previous['time']:
+            return None
+        return value
+
+    def get_listing(self, path, st):
+        """Get the listing of a folder as directory entries if the folder hasn't changed."""
+
+        value = self._get_previous('folders', path, st)
+        if value is None:
+            return None
+        self.folders[path] = value
+        return [FolderEntry(path, name, is_dir, is_symlink) for name, is_dir, is_symlink in value[1]]
+
+    def set_listing(self, path, st, entries):
+        """Keep the listing of a folder from its directory entries."""
+
+        listing = _get_listing(entries)
+        if listing is not None:
+            self.folders[path] = (fingerprint(st), listing)
+
+    def get_records(self, path, st):
+        """Get the search records of a file if the file hasn't changed."""
+
+        value = self._get_previous('files', path, st)
+        if value is None:
+            return None
+        self.files[path] = value
+        return value[1]
+
+    def set_records(self, path, st, records):
+        """Keep the search records of a file."""
+
+        self.files[path] = (fingerprint(st), records)
+
+    def save(self):
+        """Save the snapshot, replacing the previous one."""
+
+        location = os.path.dirname(self.file_name)
+        os.makedirs(location, exist_ok=True)
+        data = {'version': VERSION, 'key': self.key, 'time': self.time, 'folders': self.folders, 'files': self.files}
+        fd, temp = tempfile.mkstemp(dir=location, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.file_name)
+        except Exception:
+            os.remove(temp)
+            raise
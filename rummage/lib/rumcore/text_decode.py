@@ -19,10 +19,13 @@ CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFT
 IN THE SOFTWARE.
 """
 import codecs
+import io
+import mmap
 import os
 import re
 import functools
-from collections import namedtuple
+import threading
+from collections import Counter, namedtuple
 try:
     from cchardet import UniversalDetector as CCDetect
     from chardet import UniversalDetector as CDetect
@@ -32,8 +35,18 @@ except ImportError:  # pragma: no cover
     DetectEncoding = CDetect
     CCDetect = None
 
-# 30 MB: maybe this should be lower for Python?
+# 30 MB: files this size or larger are detected from samples instead of in whole.
 MAX_GUESS_SIZE = 31457280
+
+# Size of each of the samples taken from the start, middle, and end of a very large file
+SAMPLE_WINDOW = 65536
+
+# Number of files in a folder with an extension that must be detected with the same encoding
+# before other files like them are only verified with it.
+PRIOR_THRESHOLD = 5
+
+# Share of those files the encoding must have been detected for
+PRIOR_CONFIDENCE = 0.9
 MIN_GUESS_SIZE = 512
 
 MIN_CONFIDENCE = 0.5
@@ -44,6 +57,11 @@ CONFIDENCE_MAP = {
 CHARDET_DEFAULT = 0
 CHARDET_PYTHON = 1
 CHARDET_CLIB = 2
+CHARDET_FAST = 3
+
+# Number of bytes at the start of a file that `CHARDET_FAST` looks at,
+# which can be changed with the `detect_budget` encoding option.
+DETECT_BUDGET = 65536
 
 # Middle endian encodings
 # Python won't really be able to process these,
@@ -305,6 +323,159 @@ def _simple_detect(m):
     return encoding
 
 
+def _detect_utf16_32(content):
+    """
+    Detect `UTF-16` and `UTF-32` without a BOM from where the null bytes fall.
+
+    Text that is mostly ASCII has a null in every other byte in `UTF-16`,
+    and at least three nulls in every four bytes in `UTF-32`.
+    """
+
+    size = len(content) - len(content) % 4
+    if size < 4:
+        return None
+    content = content[:size]
+
+    encoding = None
+    quarter = size // 4
+    quarters = [content[i::4].count(0) for i in range(4)]
+    if quarters[3] == quarter and quarters[2] >= quarter * 0.9 and quarters[0] < quarter:
+        encoding = 'utf-32-le'
+    elif quarters[0] == quarter and quarters[1] >= quarter * 0.9 and quarters[3] < quarter:
+        encoding = 'utf-32-be'
+    else:
+        half = size // 2
+        even = quarters[0] + quarters[2]
+        odd = quarters[1] + quarters[3]
+        if odd >= half * 0.7 and even <= half * 0.1:
+            encoding = 'utf-16-le'
+        elif even >= half * 0.7 and odd <= half * 0.1:
+            encoding = 'utf-16-be'
+
+    if encoding is not None:
+        try:
+            codecs.getincrementaldecoder(encoding)(errors='strict').decode(content)
+        except UnicodeDecodeError:
+            encoding = None
+    return Encoding(encoding, None) if encoding is not None else None
+
+
+def _fast_detect(content, complete):
+    """
+    Detect the encoding from a bounded sample of the content.
+
+    `complete` is whether the sample is all of the content. The sample is checked for `UTF-16` and `UTF-32`,
+    then decoded as `UTF-8` by Python's decoder, and only given to `chardet` if neither fits.
+    `chardet` never reads past the sample.
+    """
+
+    encoding = _detect_utf16_32(content)
+
+    if encoding is None and _is_binary(content[:1024]):
+        encoding = Encoding('bin', None)
+
+    if encoding is None:
+        try:
+            # A character cut off at the end of the sample isn't an error unless the sample is everything.
+            codecs.getincrementaldecoder('utf-8')(errors='strict').decode(content, complete)
+            # ASCII is only certain if we've seen all of it, but `UTF-8` can read ASCII either way.
+            encoding = Encoding('ascii' if complete and content.isascii() else 'utf-8', None)
+        except UnicodeDecodeError:
+            pass
+
+    if encoding is None:
+        detector = DetectEncoding()
+        for start in range(0, len(content), 4096):
+            detector.feed(content[start:start + 4096])
+            if detector.done:
+                break
+        detector.close()
+        result = detector.result
+
+        enc = result['encoding'] if result is not None else None
+        if enc is not None and result['confidence'] >= CONFIDENCE_MAP.get(enc, MIN_CONFIDENCE):
+            encoding = Encoding(enc, None)
+        else:
+            encoding = Encoding('bin', None)
+    return encoding
+
+
+def _get_samples(bfr, step):
+    """
+    Get samples from the middle and end of a file's content.
+
+    The samples start at a multiple of `step` bytes, so they are aligned to the characters of
+    encodings with a fixed character size.
+    """
+
+    size = len(bfr)
+    middle = max(size // 2 - SAMPLE_WINDOW // 2, 0) // step * step
+    tail = max(size - SAMPLE_WINDOW, 0) // step * step
+    return [bfr[middle:middle + SAMPLE_WINDOW], bfr[tail:]]
+
+
+def _verify_samples(samples, encoding, skip):
+    """
+    Check that samples from the middle and end of the content decode with the encoding.
+
+    Samples can start part way into a character, so up to `skip` bytes may be skipped at the start of each.
+    The last sample is the end of the content, so it must end with a whole character.
+    """
+
+    for index, sample in enumerate(samples):
+        final = index == len(samples) - 1
+        for start in range(skip + 1):
+            try:
+                codecs.getincrementaldecoder(encoding)(errors='strict').decode(sample[start:], final)
+                break
+            except UnicodeDecodeError:  # noqa: PERF203
+                pass
+        else:
+            return False
+    return True
+
+
+def _sample_detect(bfr, ext, encoding_options):
+    """
+    Detect the encoding of very large content from samples of its start, middle, and end.
+
+    The start is detected just as `CHARDET_FAST` does, and the encoding is only accepted
+    if the samples of the middle and end decode with it too. The cost stays the same no
+    matter how large the content is.
+    """
+
+    encoding = has_bom(bfr[:4])
+
+    if encoding is None:
+        encoding = _is_binary_ext(ext, encoding_options)
+
+    if encoding is None:
+        head = bfr[:SAMPLE_WINDOW]
+        encoding = _special_encode_check(head[:1024], ext, encoding_options)
+        if encoding is None:
+            encoding = _fast_detect(head, False)
+
+    if encoding.encode != 'bin':
+        try:
+            codec = codecs.lookup(encoding.encode).name
+        except LookupError:
+            codec = None
+        if codec is None:
+            encoding = Encoding('bin', None)
+        else:
+            step = 4 if codec.startswith('utf-32') else 2 if codec.startswith('utf-16') else 1
+            # Other multi-byte encodings can't be aligned, but no character is longer than 4 bytes.
+            if not _verify_samples(_get_samples(bfr, step), codec, 3 if step == 1 else 0):
+                encoding = Encoding('bin', None)
+    return encoding
+
+
+def _get_detect_budget(encoding_options):
+    """Get the number of bytes `CHARDET_FAST` looks at."""
+
+    return max(encoding_options.get('detect_budget', DETECT_BUDGET), 1024)
+
+
 def has_bom(content):
     """Check for `UTF8`, `UTF16`, and `UTF32` BOMs."""
 
@@ -356,6 +527,12 @@ def _detect_encoding(f, ext, file_size, encoding_options=None):
         if encoding is None and file_size == 0:
             encoding = Encoding('ascii', None)
 
+        # Only look at the start of the file if we are told to be quick about it.
+        if encoding is None and encoding_options.get('chardet_mode', CHARDET_DEFAULT) == CHARDET_FAST:
+            budget = _get_detect_budget(encoding_options)
+            sample = header + f.read(budget - len(header))
+            encoding = _fast_detect(sample, len(sample) >= file_size)
+
         # Check start of file if there is a high likely hood of being a binary file.
         if encoding is None and _is_binary(header):
             encoding = Encoding('bin', None)
@@ -404,6 +581,9 @@ def _detect_bfr_encoding(bfr, buffer_size, encoding_options=None):
     """Guess using `chardet`."""
 
     encoding = has_bom(bfr[:4])
+    if encoding is None and encoding_options.get('chardet_mode', CHARDET_DEFAULT) == CHARDET_FAST:
+        budget = _get_detect_budget(encoding_options)
+        encoding = _fast_detect(bfr[:budget], buffer_size <= budget)
     if encoding is None:
         header = bfr[:1024]
         if encoding is None and _is_binary(header):
@@ -481,7 +661,10 @@ def guess(filename, verify=True, verify_blocks=1, verify_block_size=4096, encodi
                     if not verify_encode(f, encoding.encode, verify_blocks, verify_block_size):
                         encoding = Encoding('bin', None)
         else:
-            encoding = Encoding('bin', None)
+            # The file is too big to detect in whole, so detect it from samples.
+            with open(filename, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    encoding = _sample_detect(m, ext, encoding_options)
     except Exception:  # pragma: no cover
         pass
 
@@ -489,6 +672,132 @@ def guess(filename, verify=True, verify_blocks=1, verify_block_size=4096, encodi
     return encoding
 
 
+def mguess(bfr, ext, verify=True, verify_blocks=1, verify_block_size=4096, encoding_options=None):
+    """
+    Guess the encoding of a file from its memory mapped content.
+
+    The BOM, header, and `chardet` input are all read from the mapping, so a file that
+    is about to be searched doesn't have to be opened again just to detect its encoding.
+    """
+
+    encoding = None
+
+    if encoding_options is None:
+        encoding_options = {}
+
+    try:
+        file_size = len(bfr)
+        if not _is_very_large(file_size):
+            f = bfr if isinstance(bfr, mmap.mmap) else io.BytesIO(bfr)
+            encoding = _detect_encoding(f, ext, file_size, encoding_options)
+
+            if verify and encoding.encode != 'bin':
+                if not verify_encode(f, encoding.encode, verify_blocks, verify_block_size):
+                    encoding = Encoding('bin', None)
+            f.seek(0)
+        else:
+            encoding = _sample_detect(bfr, ext, encoding_options)
+    except Exception:  # pragma: no cover
+        pass
+
+    return encoding
+
+
+def _verify_prior(bfr, encoding, encoding_options):
+    """
+    Verify that the start of the content decodes with an encoding predicted for it.
+
+    Returns the encoding, or `None` if the content should be detected instead. Content that is
+    only ASCII at the start may not be ASCII after it, so it is reported as `UTF-8`, which reads ASCII.
+    Single-byte encodings decode any content, so content that looks binary is always detected, just as
+    it is when there is no prediction.
+    """
+
+    budget = _get_detect_budget(encoding_options)
+    sample = bfr[:budget]
+    complete = len(bfr) <= budget
+    if not sample or (encoding.bom and not sample.startswith(encoding.bom)):
+        return None
+    # Only `UTF-16` and `UTF-32` text has null bytes, and those are verified by decoding.
+    if not encoding.encode.startswith(('utf-16', 'utf-32')) and _is_binary(sample[:1024]):
+        return None
+    if encoding.encode == 'ascii':
+        if not sample.isascii():
+            return None
+        return encoding if complete else Encoding('utf-8', None)
+    try:
+        codecs.getincrementaldecoder(encoding.encode)(errors='strict').decode(sample, complete)
+    except (UnicodeDecodeError, LookupError):
+        return None
+    return encoding
+
+
+class EncodingPriors:
+    """
+    Learn the encodings files share during a search, so the encodings of similar files don't have to be detected.
+
+    Files in the same folder with the same extension usually share an encoding. Once enough of them are
+    detected with the same encoding, the encoding is only verified for the next one, and the file is
+    detected as usual if it doesn't verify. Binary files, and file types with their own detection,
+    are always detected.
+    """
+
+    def __init__(self, threshold=PRIOR_THRESHOLD, confidence=PRIOR_CONFIDENCE):
+        """Initialize."""
+
+        self.threshold = threshold
+        self.confidence = confidence
+        self.priors = {}
+        self.lock = threading.Lock()
+        self.verified = 0
+
+    def _predict(self, key):
+        """Predict the encoding of a file from the files like it that were detected."""
+
+        with self.lock:
+            counts = self.priors.get(key)
+            if counts is None:
+                return None
+            encoding, count = counts.most_common(1)[0]
+            if count < self.threshold or count < sum(counts.values()) * self.confidence:
+                return None
+        return encoding
+
+    def _learn(self, key, encoding):
+        """Count the encoding a file was detected with."""
+
+        with self.lock:
+            self.priors.setdefault(key, Counter())[encoding] += 1
+
+    def guess(self, bfr, name, encoding_options=None):
+        """Guess the encoding of a file's content, only verifying it if the files like it share an encoding."""
+
+        if encoding_options is None:
+            encoding_options = {}
+
+        folder, ext = os.path.split(name)
+        ext = os.path.splitext(ext)[1].lower()
+        if not len(bfr) or any(
+            ext in encoding_options.get(kind, DEFAULT_ENCODING_OPTIONS[kind])
+            for kind in ('bin', 'python', 'html', 'xml')
+        ):
+            return mguess(bfr, ext, verify=False, encoding_options=encoding_options)
+
+        key = (folder, ext)
+        predicted = self._predict(key)
+        if predicted is not None:
+            encoding = _verify_prior(bfr, predicted, encoding_options)
+            if encoding is not None:
+                with self.lock:
+                    self.verified += 1
+                return encoding
+
+        encoding = mguess(bfr, ext, verify=False, encoding_options=encoding_options)
+        if encoding is not None and encoding.encode != 'bin':
+            self._learn(key, encoding)
+        return encoding
+
+
 def sguess(bfr, encoding_options=None):
     """Guess the encoding of the buffer."""
 
@@ -505,7 +814,7 @@ def sguess(bfr, encoding_options=None):
             else:
                 encoding = _detect_bfr_encoding(bfr, buffer_size, encoding_options)
         else:
-            encoding = Encoding('bin', None)
+            encoding = _sample_detect(bfr, '', encoding_options)
 
     except Exception:  # pragma: no cover
         pass
@@ -20,10 +20,11 @@ def platform():
     return _PLATFORM
 
 
-def get_stat(pth):
-    """Get file status."""
+def get_stat(pth, st=None):
+    """Get file status, optionally from a stat result that was already retrieved."""
 
-    st = os.stat(pth)
+    if st is None:
+        st = os.stat(pth)
     try:
         st_ctime = st.st_birthtime if platform() != "windows" else st.st_ctime
     except AttributeError:
@@ -0,0 +1,219 @@
+"""
+Watch.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+
+WATCH_EVENTS = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+# `struct inotify_event`, which is followed by the name of the file, padded with nulls.
+EVENT = struct.Struct('iIII')
+
+EVENT_BUFFER = 0x10000
+
+# Changes come in bursts, such as a file being written a block at a time,
+# so events are gathered until things settle before they are reported.
+SETTLE_TIME = 0.05
+
+_LIBC = None
+
+
+def _get_libc():
+    """Get the C library if it has `inotify`."""
+
+    global _LIBC
+
+    if _LIBC is None:
+        _LIBC = False
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                _LIBC = libc
+            except (OSError, AttributeError):
+                pass
+    return _LIBC or None
+
+
+class InotifyWatcher:
+    """
+    Watch folders for changes with Linux's `inotify`.
+
+    Files are watched through the folders they are in. `read` returns the paths of the files and folders
+    that changed, or `None` if events were lost and everything must be checked.
+    """
+
+    def __init__(self):
+        """Initialize."""
+
+        self.libc = _get_libc()
+        if self.libc is None:
+            raise OSError('inotify is not available')
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+        self.folders = {}
+        self.paths = {}
+
+    def _raise(self, path=None):
+        """Raise the error of the last call."""
+
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), path)
+
+    def add_folder(self, path):
+        """Watch a folder."""
+
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_EVENTS)
+        if wd < 0:
+            self._raise(path)
+        self.folders[path] = wd
+        self.paths[wd] = path
+
+    def remove_folder(self, path):
+        """Stop watching a folder."""
+
+        wd = self.folders.pop(path, None)
+        if wd is not None and self.paths.pop(wd, None) is not None:
+            # This fails if the folder is gone, as the watch went with it.
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def _parse(self, data, changed):
+        """Add the paths of the events in the data to the changed paths, and return if events were lost."""
+
+        lost = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                lost = True
+                continue
+            folder = self.paths.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                # The folder is gone, or it is no longer watched.
+                del self.paths[wd]
+                if self.folders.get(folder) == wd:
+                    del self.folders[folder]
+            changed.add(os.path.join(folder, os.fsdecode(name)) if name else folder)
+        return lost
+
+    def read(self, timeout):
+        """Wait up to `timeout` seconds for changes, and return the changed paths."""
+
+        changed = set()
+        lost = False
+        end = time.monotonic() + timeout
+        wait = timeout
+        while select.select([self.fd], [], [], wait)[0]:
+            try:
+                data = os.read(self.fd, EVENT_BUFFER)
+            except BlockingIOError:
+                data = b''
+            lost |= self._parse(data, changed)
+
+            # Keep gathering until there's a pause, but don't keep the caller waiting on a file that is always changing.
+            wait = min(SETTLE_TIME, end - time.monotonic())
+            if wait <= 0:
+                break
+        return None if lost else changed
+
+    def close(self):
+        """Stop watching."""
+
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        self.folders.clear()
+        self.paths.clear()
+
+
+class PollWatcher:
+    """
+    Watch folders for changes by checking everything every so often, for when `inotify` isn't available.
+
+    `read` returns `None` each time everything should be checked.
+    """
+
+    def __init__(self, interval):
+        """Initialize."""
+
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def add_folder(self, path):
+        """Folders are checked when everything is."""
+
+    def remove_folder(self, path):
+        """Folders are checked when everything is."""
+
+    def read(self, timeout):
+        """Wait up to `timeout` seconds, and return `None` if it is time to check everything."""
+
+        remaining = self.last + self.interval - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        if remaining > 0:
+            time.sleep(remaining)
+        self.last = time.monotonic()
+        return None
+
+    def close(self):
+        """Stop watching."""
+
+
+def get_watcher(interval, poll=False):
+    """Get an `inotify` watcher if we can, otherwise get a polling watcher."""
+
+    if not poll:
+        try:
+            return InotifyWatcher()
+        except OSError:
+            pass
+    return PollWatcher(interval)
@@ -0,0 +1,461 @@
+"""
+Writer.
+
+Licensed under MIT
+Copyright (c) 2013 - 2015 Isaac Muse <isaacmuse@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+IN THE SOFTWARE.
+"""
+import errno
+import hashlib
+import mmap
+import os
+import shutil
+import stat
+import tempfile
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+TEMP_SUFFIX = '.rum-tmp'
+
+# The most of a file's name kept in the names of its temporary files, so they fit where the name itself just fits.
+TEMP_NAME_LENGTH = 32
+
+# Linux's `ioctl` to make a file share the data of another, on file systems that support it.
+FICLONE = 0x40049409
+
+# The most we copy in one call, so a copy that can't be done in the kernel never needs much memory.
+COPY_CHUNK = 0x1000000
+
+# Errors that mean a way of copying isn't supported for the files, rather than that the copy failed.
+UNSUPPORTED = frozenset(
+    code for code in (
+        getattr(errno, name, None) for name in ('ENOSYS', 'EXDEV', 'EINVAL', 'EOPNOTSUPP', 'ENOTSUP', 'ENOTSOCK')
+    ) if code is not None
+)
+
+
+def _copy_file_range(src, dst, offset, count):
+    """Copy a range with `copy_file_range`, which can share the data on file systems that support it."""
+
+    return os.copy_file_range(src, dst, min(count, COPY_CHUNK), offset)
+
+
+def _sendfile(src, dst, offset, count):
+    """Copy a range with `sendfile`, which still copies in the kernel."""
+
+    return os.sendfile(dst, src, offset, min(count, COPY_CHUNK))
+
+
+def _read_write(src, dst, offset, count):
+    """Copy a range by reading it in and writing it out."""
+
+    os.lseek(src, offset, os.SEEK_SET)
+    data = memoryview(os.read(src, min(count, COPY_CHUNK)))
+    written = 0
+    while written < len(data):
+        written += os.write(dst, data[written:])
+    return written
+
+
+COPY_METHODS = tuple(
+    method for method, name in (
+        (_copy_file_range, 'copy_file_range'),
+        (_sendfile, 'sendfile'),
+        (_read_write, 'read')
+    ) if hasattr(os, name)
+)
+
+
+class CleanupError(Exception):
+    """Every file of a transaction was replaced, but what was kept of the originals couldn't all be put in place."""
+
+
+def _get_pages(edits):
+    """Get the spans of whole pages that edits in order touch, with touching spans joined."""
+
+    pages = []
+    for start, end, _ in edits:
+        start -= start % mmap.PAGESIZE
+        if pages and start <= pages[-1][1]:
+            pages[-1][1] = max(pages[-1][1], end)
+        else:
+            pages.append([start, end])
+    return pages
+
+
+def patch(name, edits, size):
+    """
+    Patch a file in place, where each edit replaces a span with content of the same length.
+
+    The file is changed through a writable memory map, and only the pages that changed are flushed,
+    so the cost is that of the edits rather than that of the file.
+    """
+
+    with open(name, 'r+b') as f:
+        if os.fstat(f.fileno()).st_size != size:
+            raise OSError(errno.EIO, 'File changed while it was being replaced', name)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as m:
+            for start, end, data in edits:
+                m[start:end] = data
+            for start, end in _get_pages(edits):
+                m.flush(start, end - start)
+
+
+def _get_temp_prefix(base):
+    """
+    Get the start of the name of a temporary file for a file, with as much of the file's name as fits.
+
+    Long names are cut short, and a hash of the whole name keeps names that start the same apart.
+    """
+
+    if len(base) > TEMP_NAME_LENGTH:
+        digest = hashlib.sha1(os.fsencode(base)).hexdigest()[:12]
+        return '.%s.%s.' % (base[:TEMP_NAME_LENGTH], digest)
+    return '.%s.' % base
+
+
+def _get_temp_name(name):
+    """Get a name next to a file to put something under before it is renamed to the file."""
+
+    folder, base = os.path.split(name)
+    return os.path.join(folder, '%s%d%s' % (_get_temp_prefix(base), os.getpid(), TEMP_SUFFIX))
+
+
+def clone(src, dst):
+    """
+    Clone a file, so the clone shares the file's data until either is changed.
+
+    Only file systems that share data between files support it, such as Btrfs and XFS,
+    others raise `OSError`. Like `shutil.copy2`, the file's times and mode are kept.
+    """
+
+    if fcntl is None or not hasattr(fcntl, 'ioctl'):  # pragma: no cover
+        raise OSError(errno.EOPNOTSUPP, 'Files cannot be cloned', src)
+
+    temp = _get_temp_name(dst)
+    try:
+        with open(src, 'rb') as f, open(temp, 'wb') as c:
+            fcntl.ioctl(c.fileno(), FICLONE, f.fileno())
+        shutil.copystat(src, temp)
+        os.replace(temp, dst)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+
+
+def link(src, dst):
+    """Give a file another name, replacing what has the name."""
+
+    temp = _get_temp_name(dst)
+    try:
+        os.remove(temp)
+    except OSError:
+        pass
+    os.link(src, temp)
+    try:
+        os.replace(temp, dst)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def _sync_folder(folder):
+    """Sync a folder, so renames in it survive a crash."""
+
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        # Folders can't be opened on Windows, where the rename is synced with the file system's journal.
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _remove(name):
+    """Remove a file if it is there."""
+
+    try:
+        os.remove(name)
+    except OSError:
+        pass
+
+
+class ReplaceWriter:
+    """
+    Write the new content of a file to a temporary file next to it, and swap it in once it is complete.
+
+    The temporary file is synced to disk before it is renamed over the original, so a failure or a crash
+    leaves either the original or the new file, and never a partly written one. Unchanged spans can be copied
+    straight from the original, so they never pass through Python when the kernel can copy them.
+
+    Nothing replaces the original unless `commit` is called, so leaving the context without committing
+    discards the new content. If `backup` is set, the original becomes the backup when it is replaced,
+    so it is kept without copying it, unless a backup was staged under another name to be moved there instead.
+    """
+
+    def __init__(self, name):
+        """Initialize."""
+
+        # Replace the file a link points to, not the link.
+        self.name = os.path.realpath(name)
+        folder, base = os.path.split(self.name)
+        fd, self.temp = tempfile.mkstemp(dir=folder, prefix=_get_temp_prefix(base), suffix=TEMP_SUFFIX)
+        self.file = os.fdopen(fd, 'wb')
+        self.source = None
+        self.methods = list(COPY_METHODS)
+        self.backup = None
+        self.staged_backup = None
+
+    def __enter__(self):
+        """Enter."""
+
+        return self
+
+    def __exit__(self, *args):
+        """Discard the new content if it wasn't committed."""
+
+        self.discard()
+
+    def write(self, data):
+        """Write new content."""
+
+        self.file.write(data)
+
+    def copy(self, start, end):
+        """Copy a span of the original file."""
+
+        if start >= end:
+            return
+        if self.source is None:
+            self.source = os.open(self.name, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+
+        # Copies write at the file's position, so flush what is buffered first.
+        self.file.flush()
+        dst = self.file.fileno()
+        offset = start
+        while offset < end:
+            try:
+                copied = self.methods[0](self.source, dst, offset, end - offset)
+            except OSError as e:
+                if e.errno not in UNSUPPORTED or len(self.methods) == 1:
+                    raise
+                self.methods.pop(0)
+                continue
+            if not copied:
+                raise OSError(errno.EIO, 'File changed while it was being replaced', self.name)
+            offset += copied
+        # Catch the buffered file up with where the copy left the file's position.
+        self.file.seek(0, os.SEEK_END)
+
+    def prepare(self):
+        """Sync the new content to disk, ready to be swapped in, and give it the original's mode and owner."""
+
+        if self.file.closed:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self._close_source()
+
+        st = os.stat(self.name)
+        os.chmod(self.temp, stat.S_IMODE(st.st_mode))
+        if hasattr(os, 'chown'):
+            try:
+                os.chown(self.temp, st.st_uid, st.st_gid)
+            except OSError:
+                # Only the owner or a privileged user can give the file to someone else.
+                pass
+
+    def commit(self):
+        """Sync the new content to disk and swap it in for the original."""
+
+        self.prepare()
+        if self.staged_backup is not None:
+            os.replace(self.staged_backup, self.backup)
+            self.staged_backup = None
+        elif self.backup is not None:
+            self._backup(os.stat(self.name))
+
+        os.replace(self.temp, self.name)
+        self.temp = None
+        _sync_folder(os.path.dirname(self.name))
+
+    def _backup(self, st):
+        """Link the original to the backup, or copy it if it can't be linked."""
+
+        # A file with other links lives on through them and can still change, so it can't be the backup.
+        if st.st_nlink == 1:
+            try:
+                link(self.name, self.backup)
+                return
+            except OSError:
+                pass
+        shutil.copy2(self.name, self.backup)
+
+    def stage_backup(self, backup, share=False):
+        """
+        Make the backup under another name, so it only replaces what has the backup's name on commit.
+
+        If `share` is set, the backup is a clone of the file where the file system supports it,
+        and is otherwise the original itself once it is replaced, instead of a copy.
+        """
+
+        self.backup = backup
+        staged = _get_temp_name(backup)
+        try:
+            if share:
+                clone(self.name, staged)
+            else:
+                shutil.copy2(self.name, staged)
+        except OSError:
+            _remove(staged)
+            if not share:
+                raise
+            return
+        self.staged_backup = staged
+
+    def discard(self):
+        """Discard the new content and any staged backup, if they weren't committed."""
+
+        self.file.close()
+        self._close_source()
+        if self.temp is not None:
+            _remove(self.temp)
+            self.temp = None
+        if self.staged_backup is not None:
+            _remove(self.staged_backup)
+            self.staged_backup = None
+
+    def _close_source(self):
+        """Close the original file."""
+
+        if self.source is not None:
+            os.close(self.source)
+            self.source = None
+
+
+class Transaction:
+    """
+    Swap in the new content of many files together, so either every file is replaced or none are.
+
+    Writers hand their prepared content to the transaction instead of committing it. Nothing is swapped in
+    until `commit`, so a transaction that is rolled back leaves every file as it was, along with any backups
+    from before. As pending files are just the temporary file, the file, the backup, and the staged backup,
+    they can be passed between processes.
+    """
+
+    def __init__(self):
+        """Initialize."""
+
+        self.pending = []
+
+    def add(self, writer):
+        """Take over the prepared content of a writer, to swap it in with the rest."""
+
+        writer.prepare()
+        self.pending.append((writer.temp, writer.name, writer.backup, writer.staged_backup))
+        writer.temp = None
+        writer.staged_backup = None
+
+    def update(self, pending):
+        """Add files that were prepared elsewhere, such as in another process."""
+
+        self.pending.extend(pending)
+
+    def pop_pending(self):
+        """Get the pending files and stop tracking them, so they can be passed to another transaction."""
+
+        pending = self.pending
+        self.pending = []
+        return pending
+
+    def commit(self):
+        """
+        Swap in the new content of every pending file.
+
+        Each original is kept under another name until every file is swapped, so if one can't be swapped,
+        the ones that were are put back. Staged backups are then moved in place, and kept originals become
+        the backups that weren't staged, so backups never need another copy. If that fails once every file
+        is swapped, the files stay replaced and `CleanupError` is raised.
+        """
+
+        swapped = []
+        try:
+            for temp, name, backup, staged in self.pending:
+                keep = _get_temp_name(name)
+                _remove(keep)
+                # A file with other links lives on through them and can still change, so it can't be the backup.
+                if backup is not None and staged is None and os.stat(name).st_nlink > 1:
+                    shutil.copy2(name, keep)
+                else:
+                    try:
+                        os.link(name, keep)
+                    except OSError:
+                        # File systems without links need a copy to put the original back.
+                        shutil.copy2(name, keep)
+                try:
+                    os.replace(temp, name)
+                except BaseException:
+                    _remove(keep)
+                    raise
+                swapped.append((name, keep, backup, staged))
+        except BaseException:
+            for name, keep, _backup, _staged in reversed(swapped):
+                os.replace(keep, name)
+            self.rollback()
+            raise
+
+        # Every file is swapped in, so what is left can fail without undoing the commit.
+        self.pending = []
+        errors = []
+        for name, keep, backup, staged in swapped:
+            try:
+                if staged is not None:
+                    os.replace(staged, backup)
+                    os.remove(keep)
+                elif backup is not None:
+                    os.replace(keep, backup)
+                else:
+                    os.remove(keep)
+            except OSError as e:
+                errors.append('%s: %s' % (name, e))
+        folders = set()
+        for name, _, backup, _ in swapped:
+            folders.add(os.path.dirname(name))
+            if backup is not None:
+                folders.add(os.path.dirname(backup))
+        for folder in folders:
+            _sync_folder(folder)
+        if errors:
+            raise CleanupError('Files were replaced, but not all backups could be put in place:\n' + '\n'.join(errors))
+
+    def rollback(self):
+        """Discard the new content and staged backup of every pending file, leaving the files as they were."""
+
+        for temp, _, _, staged in self.pending:
+            _remove(temp)
+            if staged is not None:
+                _remove(staged)
+        self.pending = []
@@ -0,0 +1,81 @@
+"""Tests for `aho_corasick.py`."""
+import unittest
+import re
+import unittest.mock as mock
+from rummage.lib.rumcore import aho_corasick as ac
+
+
+class TestAhoCorasick(unittest.TestCase):
+    """Test searching for term lists."""
+
+    def spans(self, terms, text, ignorecase=False, pos=0):
+        """Get the match spans with the automaton and with the alternation, and verify they are the same."""
+
+        alternation = (b'|' if isinstance(text, bytes) else '|').join(
+            re.escape(term) for term in sorted(terms, key=len, reverse=True)
+        )
+        expected = [m.span() for m in re.finditer(alternation, text[pos:], re.I if ignorecase else 0)]
+        expected = [(start + pos, end + pos) for start, end in expected]
+
+        with mock.patch('rummage.lib.rumcore.aho_corasick.ALTERNATION_LIMIT', 0):
+            automaton = ac.AhoCorasick(terms, ignorecase)
+            self.assertIsNone(automaton.alternation)
+            result = [m.span() for m in automaton.finditer(text, pos)]
+        self.assertEqual(result, [m.span() for m in ac.AhoCorasick(terms, ignorecase).finditer(text, pos)])
+        self.assertEqual(result, expected)
+        return result
+
+    def test_leftmost_longest(self):
+        """Test that the leftmost match is found, and then the longest one."""
+
+        self.assertEqual(self.spans(['bcd', 'abcde', 'cd'], 'abcdx abcde'), [(1, 4), (6, 11)])
+        self.assertEqual(self.spans(['he', 'she', 'his', 'hers'], 'ushers'), [(1, 4)])
+        self.assertEqual(self.spans(['a', 'ab', 'abc'], 'abcabab'), [(0, 3), (3, 5), (5, 7)])
+
+    def test_fail_links(self):
+        """Test following the fail links of a partial match."""
+
+        self.assertEqual(self.spans(['aab', 'ab', 'b'], 'aaab'), [(1, 4)])
+        self.assertEqual(self.spans(['abcd', 'bc'], 'abcabc'), [(1, 3), (4, 6)])
+        self.assertEqual(self.spans(['abcd', 'bc'], 'abcabc', pos=2), [(4, 6)])
+
+    def test_bytes(self):
+        """Test searching bytes."""
+
+        self.assertEqual(self.spans([b'search', b'ear'], b'research SEARCH'), [(2, 8)])
+        self.assertEqual(self.spans([b'search', b'ear'], b'research SEARCH', True), [(2, 8), (9, 15)])
+
+    def test_ignorecase(self):
+        """Test searching case insensitively."""
+
+        self.assertEqual(
+            self.spans(['Straße', 'ab'], 'STRASSE straße STRAßE aB', True), [(8, 14), (15, 21), (22, 24)]
+        )
+
+        # Folding case doesn't change positions.
+        automaton = ac.AhoCorasick(['i', 'x'], True)
+        self.assertEqual([m.span() for m in automaton.finditer('İ Ix')], [(2, 3), (3, 4)])
+
+    def test_terms(self):
+        """Test that the matched term is reported."""
+
+        automaton = ac.AhoCorasick(['Hello', '', 'world', 'hello'], True)
+        self.assertEqual(automaton.terms, ('Hello', 'world', 'hello'))
+        matches = list(automaton.finditer('HELLO World'))
+        self.assertEqual([m.term for m in matches], ['Hello', 'world'])
+        self.assertEqual([m.group(0) for m in matches], ['HELLO', 'World'])
+        self.assertEqual(automaton.findall('hello'), ['hello'])
+        self.assertIsNone(automaton.search('nothing'))
+        with self.assertRaises(IndexError):
+            matches[0].group(1)
+
+    def test_no_terms(self):
+        """Test that nothing matches without terms."""
+
+        self.assertEqual(ac.AhoCorasick(['']).findall('text'), [])
+
+    def test_mixed_terms(self):
+        """Test that bytes and str terms can't be mixed."""
+
+        with self.assertRaises(TypeError):
+            ac.AhoCorasick(['a', b'b'])
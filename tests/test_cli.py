@@ -0,0 +1,217 @@
+"""Tests for `cli.py`."""
+import unittest
+import os
+import io
+import json
+import shutil
+from rummage.lib import cli
+from . import util
+
+
+class TestCli(unittest.TestCase):
+    """Test command line searches."""
+
+    def mktemp(self, *parts, content=b''):
+        """Make temp file."""
+
+        filename = self.norm(*parts)
+        base = os.path.dirname(filename)
+        if not os.path.exists(base):
+            os.makedirs(base)
+        util.create_empty_file(filename, content)
+
+    def norm(self, *parts):
+        """Normalizes file path (in relation to temp directory)."""
+
+        return os.path.join(self.tempdir, *parts)
+
+    def setUp(self):
+        """Setup temp folder."""
+
+        self.tempdir = os.path.abspath(util.TESTFN + "_dir")
+        self.mktemp('a.txt', content=b'search me\nnothing\nsearch you\n')
+        self.mktemp('sub', 'b.txt', content=b'nothing\nsearch\n')
+        self.mktemp('sub', 'c.log', content=b'search\n')
+
+    def tearDown(self):
+        """Tear down."""
+
+        shutil.rmtree(self.tempdir)
+
+    def search(self, *argv):
+        """Run a search and return the exit code and output."""
+
+        out = io.StringIO()
+        err = io.StringIO()
+        code = cli.search(cli.parse_arguments(list(argv)), out, err)
+        return code, out.getvalue().splitlines(), err.getvalue()
+
+    def test_search(self):
+        """Test grep style output."""
+
+        code, lines, _ = self.search('search', self.tempdir, '-f', '*.txt')
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(
+            lines,
+            [
+                '%s:1:1:search me' % self.norm('a.txt'),
+                '%s:3:1:search you' % self.norm('a.txt')
+            ]
+        )
+
+    def test_recursive_count(self):
+        """Test counting matches in sub-folders."""
+
+        code, lines, _ = self.search('-c', '-R', '-f', '*.txt', 'search', self.tempdir)
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(sorted(lines), sorted(['%s:2' % self.norm('a.txt'), '%s:1' % self.norm('sub', 'b.txt')]))
+
+    def test_json(self):
+        """Test JSON Lines output."""
+
+        code, lines, _ = self.search('--json', '-F', 'you', self.norm('a.txt'))
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['type'], 'FileRecord')
+        self.assertEqual(record['match']['lineno'], 3)
+        self.assertEqual(record['match']['lines'], 'search you')
+
+    def test_terms(self):
+        """Test searching for the terms in a term file."""
+
+        self.mktemp('terms.lst', content=b'me\nyou\n')
+        code, lines, _ = self.search('--json', '-T', self.norm('terms.lst'), self.norm('a.txt'))
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual([json.loads(line)['match']['term'] for line in lines], ['me', 'you'])
+
+        code, lines, err = self.search('-T', self.norm('missing.lst'), self.norm('a.txt'))
+        self.assertEqual(code, cli.EXIT_ERROR)
+        self.assertIn('missing.lst', err)
+
+    def test_replace(self):
+        """Test replace."""
+
+        code, lines, _ = self.search('--no-backup', '-r', 'found', 'search', self.norm('a.txt'))
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(lines, ['%s:2' % self.norm('a.txt')])
+        with open(self.norm('a.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'found me\nnothing\nfound you\n')
+
+    def test_replace_backup_link(self):
+        """Test replace with backups that share the file's data."""
+
+        code, _, _ = self.search('--backup-link', '-r', 'found', 'search', self.norm('a.txt'))
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        with open(self.norm('a.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'found me\nnothing\nfound you\n')
+        with open(self.norm('a.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'search me\nnothing\nsearch you\n')
+
+    def test_replace_journal(self):
+        """Test replace with a journal instead of backups."""
+
+        journal = self.norm('journal')
+        code, _, _ = self.search('--journal', journal, '-r', 'found', 'search', self.norm('a.txt'))
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertFalse(os.path.exists(self.norm('a.txt.rum-bak')))
+        runs = cli.rumcore.get_journal_runs(journal)
+        self.assertEqual([count for _, _, count in runs], [1])
+        self.assertEqual(cli.rumcore.restore_journal_run(journal, runs[0][0]), [])
+        with open(self.norm('a.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search me\nnothing\nsearch you\n')
+
+    def test_replace_transaction(self):
+        """Test replacing in every file or none."""
+
+        code, _, _ = self.search('--no-backup', '--transaction', '-R', '-r', 'found', 'search', self.tempdir)
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        with open(self.norm('sub', 'c.log'), 'rb') as f:
+            self.assertEqual(f.read(), b'found\n')
+        self.assertEqual(sorted(os.listdir(self.norm('sub'))), ['b.txt', 'c.log'])
+
+    def test_no_match(self):
+        """Test exit code when nothing matches."""
+
+        code, lines, _ = self.search('missing', self.tempdir)
+
+        self.assertEqual(code, cli.EXIT_NO_MATCH)
+        self.assertEqual(lines, [])
+
+    def test_missing_path(self):
+        """Test searching a path that doesn't exist."""
+
+        code, lines, err = self.search('search', self.norm('missing'))
+
+        self.assertEqual(code, cli.EXIT_ERROR)
+        self.assertEqual(lines, [])
+        self.assertEqual(err, 'rummage: No such file or directory: %s\n' % self.norm('missing'))
+
+    def test_broken_pipe(self):
+        """Test that output stops quietly when whatever reads it goes away."""
+
+        class ClosedPipe(io.StringIO):
+            """Output that was closed by whatever reads it."""
+
+            def write(self, text):
+                """Fail to write."""
+
+                raise BrokenPipeError
+
+        err = io.StringIO()
+        code = cli.search(cli.parse_arguments(['search', self.tempdir]), ClosedPipe(), err)
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(err.getvalue(), '')
+
+    def test_broken_pipe_finish(self):
+        """Test that a search whose output goes away still finishes up, saving its encoding cache."""
+
+        class ClosedPipe(io.StringIO):
+            """Output that was closed by whatever reads it."""
+
+            def write(self, text):
+                """Fail to write."""
+
+                raise BrokenPipeError
+
+        cache = self.norm('cache', 'encodings')
+        argv = ['--encoding-cache', cache, '-R', 'search', self.tempdir]
+        code = cli.search(cli.parse_arguments(argv), ClosedPipe(), io.StringIO())
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertTrue(os.path.exists(cache))
+
+    def test_share_encodings(self):
+        """Test that encodings are shared between similar files unless disabled."""
+
+        self.assertTrue(cli.get_flags(cli.parse_arguments(['search', self.tempdir])) & cli.rumcore.ENCODING_PRIORS)
+        args = cli.parse_arguments(['--no-share-encodings', 'search', self.tempdir])
+        self.assertFalse(cli.get_flags(args) & cli.rumcore.ENCODING_PRIORS)
+
+        code, lines, _ = self.search('-c', '-R', '--no-share-encodings', '-f', '*.txt', 'search', self.tempdir)
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(sorted(lines), sorted(['%s:2' % self.norm('a.txt'), '%s:1' % self.norm('sub', 'b.txt')]))
+
+    def test_bad_limit(self):
+        """Test a bad size limit."""
+
+        with self.assertRaises(SystemExit):
+            cli.parse_arguments(['--size', 'bigger:10', 'search', self.tempdir])
+
+    def test_ignore_files(self):
+        """Test skipping files in ignore files."""
+
+        self.mktemp('.gitignore', content=b'*.log\n')
+        code, lines, _ = self.search('-c', '-R', '--ignore-files', 'search', self.tempdir)
+
+        self.assertEqual(code, cli.EXIT_MATCH)
+        self.assertEqual(sorted(lines), sorted(['%s:2' % self.norm('a.txt'), '%s:1' % self.norm('sub', 'b.txt')]))
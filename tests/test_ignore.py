@@ -0,0 +1,83 @@
+"""Tests for `ignore.py`."""
+import os
+import unittest
+from rummage.lib.rumcore import ignore
+
+
+class TestIgnoreRules(unittest.TestCase):
+    """Test matching the rules of ignore files."""
+
+    def match(self, lines, path, folder=False):
+        """Match a path against the rules."""
+
+        return ignore.IgnoreRules(lines).match(path, folder)
+
+    def test_names(self):
+        """Test that rules without a slash match names at any depth."""
+
+        self.assertTrue(self.match(['*.log'], 'a.log'))
+        self.assertTrue(self.match(['*.log'], 'a/b/c.log'))
+        self.assertTrue(self.match(['build'], 'src/build', True))
+        self.assertIsNone(self.match(['*.log'], 'a.log.txt'))
+        self.assertIsNone(self.match(['*.log'], 'a.log/b.txt'))
+
+    def test_anchored(self):
+        """Test that rules with a slash are relative to the ignore file's folder."""
+
+        self.assertTrue(self.match(['/build'], 'build', True))
+        self.assertIsNone(self.match(['/build'], 'src/build', True))
+        self.assertTrue(self.match(['doc/*.txt'], 'doc/a.txt'))
+        self.assertIsNone(self.match(['doc/*.txt'], 'doc/sub/a.txt'))
+        self.assertIsNone(self.match(['doc/*.txt'], 'src/doc/a.txt'))
+
+    def test_globstar(self):
+        """Test that `**` matches any number of folders."""
+
+        self.assertTrue(self.match(['**/cache'], 'cache', True))
+        self.assertTrue(self.match(['**/cache'], 'a/b/cache', True))
+        self.assertTrue(self.match(['a/**/b'], 'a/b'))
+        self.assertTrue(self.match(['a/**/b'], 'a/x/y/b'))
+        self.assertTrue(self.match(['a/**'], 'a/x/y'))
+        self.assertIsNone(self.match(['a/**'], 'a', True))
+        self.assertIsNone(self.match(['a**b'], 'a/b'))
+
+    def test_folders(self):
+        """Test that rules ending in a slash only match folders."""
+
+        self.assertTrue(self.match(['node_modules/'], 'node_modules', True))
+        self.assertIsNone(self.match(['node_modules/'], 'node_modules'))
+
+    def test_negate(self):
+        """Test that the last matching rule decides."""
+
+        rules = ['*.log', '!keep.log']
+        self.assertFalse(self.match(rules, 'keep.log'))
+        self.assertTrue(self.match(rules, 'other.log'))
+        self.assertTrue(self.match(rules + ['*.log'], 'keep.log'))
+
+    def test_syntax(self):
+        """Test comments, escapes, trailing spaces, and character classes."""
+
+        self.assertIsNone(self.match(['# comment', '', '   '], 'comment'))
+        self.assertTrue(self.match(['\\#file'], '#file'))
+        self.assertTrue(self.match(['\\!file'], '!file'))
+        self.assertTrue(self.match(['file   '], 'file'))
+        self.assertTrue(self.match(['file\\ '], 'file '))
+        self.assertTrue(self.match(['file[0-9].txt'], 'file5.txt'))
+        self.assertIsNone(self.match(['file[!0-9].txt'], 'file5.txt'))
+        self.assertTrue(self.match(['file?.txt'], 'fileA.txt'))
+        self.assertIsNone(self.match(['a?b'], 'a/b'))
+        self.assertTrue(self.match(['[abc'], '[abc'))
+
+    def test_is_ignored(self):
+        """Test that the rules of the innermost folder with a matching rule decide."""
+
+        base = os.path.join(os.sep, 'repo')
+        rules = (
+            (base, ignore.IgnoreRules(['*.log'])),
+            (os.path.join(base, 'src'), ignore.IgnoreRules(['!debug.log']))
+        )
+        self.assertTrue(ignore.is_ignored(rules, os.path.join(base, 'a.log')))
+        self.assertTrue(ignore.is_ignored(rules, os.path.join(base, 'src', 'a.log')))
+        self.assertFalse(ignore.is_ignored(rules, os.path.join(base, 'src', 'debug.log')))
+        self.assertFalse(ignore.is_ignored(rules, os.path.join(base, 'a.txt')))
@@ -0,0 +1,116 @@
+"""Tests for `pattern_info.py`."""
+import unittest
+import re
+import regex
+from backrefs import bre, bregex
+from rummage.lib.rumcore import pattern_info as pi
+
+
+class TestRequiredLiterals(unittest.TestCase):
+    """Test required literal extraction."""
+
+    def literals(self, pattern, flags=0):
+        """Get the required literals for both `re` and `regex`."""
+
+        result = pi.required_literals(re.compile(pattern, flags))
+        self.assertEqual(result, pi.required_literals(regex.compile(pattern, flags)))
+        return result
+
+    def test_literal(self):
+        """Test a plain literal."""
+
+        self.assertEqual(self.literals('search'), frozenset(['search']))
+
+    def test_longest_run(self):
+        """Test that the longest required run is picked."""
+
+        self.assertEqual(self.literals(r'a.*bcd'), frozenset(['bcd']))
+        self.assertEqual(self.literals(r'foo\s*=\s*(\d+)'), frozenset(['foo']))
+
+    def test_branches(self):
+        """Test alternation."""
+
+        self.assertEqual(self.literals('hello|world'), frozenset(['hello', 'world']))
+        self.assertIsNone(self.literals(r'hello|\w+'))
+
+    def test_optional(self):
+        """Test that optional parts are not required."""
+
+        self.assertEqual(self.literals('colou?r'), frozenset(['colo']))
+        self.assertEqual(self.literals('(?:abc)?de'), frozenset(['de']))
+        self.assertEqual(self.literals('(?:abc)+d'), frozenset(['abc']))
+
+    def test_newlines(self):
+        """Test that newlines break up literals."""
+
+        self.assertEqual(self.literals(r'a\r\nbcd'), frozenset(['bcd']))
+        self.assertIsNone(self.literals('\n'))
+
+    def test_ignorecase(self):
+        """Test that case insensitive patterns are not analyzed."""
+
+        self.assertIsNone(self.literals('abc', re.I))
+        self.assertIsNone(self.literals('(?i)abc'))
+        self.assertEqual(self.literals('ab(?i:cd)'), frozenset(['ab']))
+
+    def test_no_literals(self):
+        """Test patterns without literals."""
+
+        self.assertIsNone(self.literals(r'\w+\d'))
+        self.assertIsNone(self.literals(r'[abc]'))
+
+    def test_fuzzy(self):
+        """Test that fuzzy `regex` patterns are not analyzed."""
+
+        self.assertIsNone(pi.required_literals(regex.compile('(?:abc){e<=1}')))
+
+    def test_backrefs(self):
+        """Test `backrefs` patterns."""
+
+        self.assertEqual(pi.required_literals(bre.compile(r'\Qa.b\E\d')), frozenset(['a.b']))
+        self.assertEqual(pi.required_literals(bregex.compile(r'\Qa.b\E\d')), frozenset(['a.b']))
+
+
+class TestByteSafety(unittest.TestCase):
+    """Test checking whether patterns can be run over bytes."""
+
+    def safety(self, pattern, flags=0):
+        """Get the byte safety for both `re` and `regex`."""
+
+        result = pi.byte_safety(re.compile(pattern, flags | re.ASCII))
+        self.assertEqual(result, pi.byte_safety(regex.compile(pattern, flags | regex.ASCII)))
+        return result
+
+    def test_safe(self):
+        """Test patterns that only match ASCII."""
+
+        self.assertEqual(self.safety(r'\bfoo\b'), pi.BYTES_SAFE)
+        self.assertEqual(self.safety(r'(a)\1[a-z_]+\d'), pi.BYTES_SAFE)
+        self.assertEqual(self.safety('foo', re.I), pi.BYTES_SAFE)
+
+    def test_newlines(self):
+        """Test patterns that depend on line endings."""
+
+        self.assertEqual(self.safety(r'foo\s*=\s*\d+'), pi.BYTES_NO_CR)
+        self.assertEqual(self.safety('^foo$', re.M), pi.BYTES_NO_CR)
+        self.assertEqual(self.safety('^foo', re.M), pi.BYTES_NO_CR)
+        self.assertEqual(self.safety('(?m)^foo'), pi.BYTES_NO_CR)
+        self.assertEqual(self.safety('^foo'), pi.BYTES_SAFE)
+        self.assertEqual(self.safety('foo[\n]'), pi.BYTES_NO_CR)
+
+    def test_unsafe(self):
+        """Test patterns that can match non-ASCII characters or nothing at all."""
+
+        self.assertEqual(self.safety('a.b'), pi.BYTES_UNSAFE)
+        self.assertEqual(self.safety('[^a]b'), pi.BYTES_UNSAFE)
+        self.assertEqual(self.safety(r'\Wb'), pi.BYTES_UNSAFE)
+        self.assertEqual(self.safety('é'), pi.BYTES_UNSAFE)
+        self.assertEqual(self.safety('a?'), pi.BYTES_UNSAFE)
+
+    def test_unicode(self):
+        """Test that Unicode character classes and case folding are unsafe."""
+
+        self.assertEqual(pi.byte_safety(re.compile(r'\w+')), pi.BYTES_UNSAFE)
+        self.assertEqual(pi.byte_safety(re.compile('foo', re.I)), pi.BYTES_UNSAFE)
+        self.assertEqual(pi.byte_safety(regex.compile(r'\bfoo')), pi.BYTES_UNSAFE)
+        self.assertEqual(pi.byte_safety(re.compile('foo')), pi.BYTES_SAFE)
@@ -5,8 +5,12 @@ import os
 import re
 import regex
 import codecs
+import errno
 import datetime
 import textwrap
+import threading
+import time
+import unittest.mock as mock
 from backrefs import bre
 from backrefs import bregex
 from rummage.lib import rumcore as rc
@@ -218,6 +222,65 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertTrue(error[0].startswith('TypeError'))
 
 
+class TestSearchPlan(unittest.TestCase):
+    """Test compiling searches once for a whole search."""
+
+    def test_compile_once(self):
+        """Test that searches are compiled once for text and once for binary files."""
+
+        search_params = rc.Search(True)
+        search_params.add(r'(\w+) test', r'\1 replaced', rc.IGNORECASE)
+        plan = rc._SearchPlan(search_params, rc.BRE_MODE)
+
+        text = plan[0].get()
+        self.assertIs(text, plan[0].get())
+        self.assertIs(text.pattern, rc.compile_search(r'(\w+) test', rc.IGNORECASE, rc.BRE_MODE))
+        self.assertEqual(text.replace, r'\1 replaced')
+        self.assertEqual(text.expand(text.pattern.match('a test')), 'a replaced')
+
+        binary = plan[0].get(True)
+        self.assertIsNot(text, binary)
+        self.assertEqual(binary.pattern.pattern, br'(\w+) test')
+        self.assertEqual(binary.replace, br'\1 replaced')
+
+    def test_binary_unicode(self):
+        """Test that patterns with Unicode characters can't be used to search binary files."""
+
+        search_params = rc.Search()
+        search_params.add('é', None, 0)
+        plan = rc._SearchPlan(search_params)
+
+        self.assertEqual(plan[0].get().pattern.pattern, 'é')
+        with self.assertRaises(rc.RummageException):
+            plan[0].get(True)
+
+
+class TestLineIndex(unittest.TestCase):
+    """Test the line ending index."""
+
+    @mock.patch('rummage.lib.rumcore.LINE_CHUNK', 3)
+    def test_line_endings(self):
+        """Test that mixed line endings are indexed the same across chunk boundaries."""
+
+        text = 'ab\r\ncd\r\r\n\nef\rg\r\n'
+        expected = [m.end() - 1 for m in rc.RE_LINE_ENDINGS.finditer(text)]
+        for content in (text, text.encode('ascii'), memoryview(text.encode('ascii'))):
+            line_index = rc._LineIndex(content)
+            line_index.to_count(len(content))
+            self.assertEqual(list(line_index.ends), expected)
+
+    @mock.patch('rummage.lib.rumcore.LINE_CHUNK', 4)
+    def test_get_row(self):
+        """Test getting the row of a point."""
+
+        line_index = rc._LineIndex('one\ntwo\nthree')
+        self.assertEqual(line_index.get_row(0), 1)
+        self.assertEqual(line_index.get_row(3), 1)
+        self.assertEqual(line_index.get_row(4), 2)
+        self.assertEqual(line_index.get_row(12), 3)
+        self.assertEqual(len(line_index), 2)
+
+
 class TestRummageFileContent(_FileTest):
     """Tests for `_RummageFileContent`."""
 
@@ -227,14 +290,12 @@ class TestRummageFileContent(_FileTest):
         if not bfr:
             self.mktemp(filename, content=content)
             name = self.norm(filename)
-            size = os.path.getsize(name)
         else:
             name = filename
-            size = None
         if not bfr:
-            rfc = rc._RummageFileContent(name, size, file_encoding)
+            rfc = rc._RummageFileContent(name, file_encoding)
         else:
-            rfc = rc._RummageFileContent(name, size, file_encoding, content)
+            rfc = rc._RummageFileContent(name, file_encoding, content)
         with rfc as f:
             text = f[:]
         if not bfr:
@@ -332,13 +393,13 @@ class TestRummageFileContent(_FileTest):
     def test_rummageexception(self):
         """Test `RummageException` with file."""
 
-        rfc = rc._RummageFileContent(self.norm('does_not_exist.txt'), 10, td.Encoding('ascii', None))
+        rfc = rc._RummageFileContent(self.norm('does_not_exist.txt'), td.Encoding('ascii', None))
         self.assertRaises(rc.RummageException, rfc.__enter__)
 
     def test_bin_rummageexception(self):
         """Test `RummageException` with a bin file."""
 
-        rfc = rc._RummageFileContent(self.norm('does_not_exist.txt'), 10, td.Encoding('bin', None))
+        rfc = rc._RummageFileContent(self.norm('does_not_exist.txt'), td.Encoding('bin', None))
         self.assertRaises(rc.RummageException, rfc.__enter__)
 
 
@@ -630,6 +691,70 @@ class TestDirWalker(_FileTest):
 
         self.assertEqual(records, 1)
 
+    def test_parallel_walk(self):
+        """Test that walking with threads finds the same files as walking serially."""
+
+        self.mktemp('sub1', 'sub2', 'c.txt')
+        self.mktemp('sub1', 'd.txt.rum-bak')
+        self.mktemp('sub3', 'e.txt')
+
+        results = []
+        for walkers in (1, 4):
+            walker = rc._DirWalker(
+                self.tempdir,
+                file_pattern='*.txt',
+                flags=self.default_flags | wcmatch.RECURSIVE,
+                backup_location='rum-bak',
+                walkers=walkers
+            )
+            results.append((sorted(walker.imatch()), walker.get_skipped()))
+
+        self.assertEqual(results[0], results[1])
+        files = [os.path.basename(f.name) for f in results[1][0] if not f.skipped]
+        self.assertEqual(files, ['a.txt', 'c.txt', 'e.txt'])
+        self.assertEqual(results[1][1], 4)
+
+    def test_wcmatch_walk(self):
+        """Test that `wcmatch` walks when the private members the walk relies on are missing."""
+
+        self.mktemp('sub1', 'sub2', 'c.txt')
+        self.mktemp('sub1', 'd.txt.rum-bak')
+
+        results = []
+        for members in (rc.WCMATCH_WALK_MEMBERS, (*rc.WCMATCH_WALK_MEMBERS, '_missing')):
+            with mock.patch.object(rc, 'WCMATCH_WALK_MEMBERS', members):
+                walker = rc._DirWalker(
+                    self.tempdir,
+                    file_pattern='*.txt',
+                    flags=self.default_flags | wcmatch.RECURSIVE,
+                    backup_location='rum-bak'
+                )
+                results.append((sorted(walker.imatch()), walker.get_skipped(), walker.folders))
+
+        self.assertFalse(walker.scandir_walk)
+        self.assertEqual(results[0][:2], results[1][:2])
+        self.assertIn(self.norm('sub1', 'sub2'), {os.path.normpath(f) for f in results[1][2]})
+
+    def test_parallel_abort(self):
+        """Test aborting a walk with threads."""
+
+        for x in range(20):
+            self.mktemp('sub%d' % x, 'a.txt')
+
+        walker = rc._DirWalker(
+            self.tempdir,
+            file_pattern='*.txt',
+            flags=self.default_flags | wcmatch.RECURSIVE,
+            walkers=4
+        )
+
+        records = 0
+        for _f in walker.imatch():
+            records += 1
+            walker.kill()
+
+        self.assertEqual(records, 1)
+
     def test_abort_early(self):
         """Test aborting early."""
 
@@ -791,6 +916,73 @@ class TestDirWalker(_FileTest):
         self.assertEqual(self.skipped, 2)
         self.assertEqual(len(self.files), 2)
 
+    def test_lazy_stat(self):
+        """Test that files are only stat'ed during the walk when size or time limits need it."""
+
+        walker = rc._DirWalker(
+            self.tempdir,
+            file_pattern='*.*',
+            flags=self.default_flags | wcmatch.RECURSIVE | wcmatch.HIDDEN
+        )
+
+        with mock.patch('rummage.lib.rumcore.util.get_stat', wraps=rc.util.get_stat) as get_stat:
+            self.crawl_files(walker)
+            self.assertEqual(get_stat.call_count, 0)
+
+        self.assertEqual(len(self.files), 6)
+        self.assertTrue(all(f.size is None for f in self.files))
+        sizes = {os.path.basename(f.name): f.with_stat().size for f in self.files}
+        self.assertEqual(sizes['greater_than_0.txt.rum-bak'], 23)
+        self.assertIsNotNone(self.files[0].with_stat().modified)
+
+    def test_ignore_files(self):
+        """Test that ignored files are skipped and ignored folders aren't walked."""
+
+        self.mktemp('.gitignore', content=b'*.file\nbuild/\n')
+        self.mktemp('build', 'a.txt')
+        self.mktemp('sub', '.ignore', content=b'!b.file\n')
+        self.mktemp('sub', 'b.file')
+        self.mktemp('sub', '.rummageignore', content=b'/c.txt\n')
+        self.mktemp('sub', 'c.txt')
+        self.mktemp('sub', 'deeper', 'c.txt')
+        self.mktemp('.git', 'config')
+
+        walker = rc._DirWalker(
+            self.tempdir,
+            file_pattern='*.txt|*.file',
+            flags=self.default_flags | wcmatch.RECURSIVE | wcmatch.HIDDEN,
+            ignore_files=True
+        )
+
+        with mock.patch.object(rc._DirWalker, '_scan', autospec=True, side_effect=rc._DirWalker._scan) as scan:
+            self.crawl_files(walker)
+        scanned = {os.path.basename(os.path.normpath(call.args[1])) for call in scan.call_args_list}
+        self.assertNotIn('build', scanned)
+        self.assertNotIn('.git', scanned)
+
+        self.assertEqual(
+            sorted(os.path.relpath(f.name, self.tempdir) for f in self.files),
+            sorted(
+                [
+                    'a.txt', os.path.join('.hidden', 'a.txt'), os.path.join('sub', 'b.file'),
+                    os.path.join('sub', 'deeper', 'c.txt')
+                ]
+            )
+        )
+
+    def test_no_ignore_files(self):
+        """Test that ignore files are only used when enabled."""
+
+        self.mktemp('.gitignore', content=b'*.txt\n')
+        walker = rc._DirWalker(
+            self.tempdir,
+            file_pattern='*.txt',
+            flags=self.default_flags | wcmatch.RECURSIVE | wcmatch.HIDDEN
+        )
+        self.crawl_files(walker)
+        self.assertEqual(len(self.files), 2)
+
+
 
 class TestHiddenDirWalker(_FileTest):
     """Test the `_DirWalker` class."""
@@ -912,6 +1104,582 @@ class TestFileSearch(_FileTest):
         print(results)
         self.assertEqual(len(results), 2)
 
+    def test_prefilter(self):
+        """Test that files without the required literals are skipped."""
+
+        self.mktemp('match.txt', content=b'\xff\xfe' + 'nothing\nto see\nsearch1 = 3\n'.encode('utf-16-le'))
+        self.mktemp('no_match.txt', content=b'nothing\nto see\nsearch2\n')
+
+        search_params = rc.Search()
+        search_params.add(r'search1\s*=\s*\d', None, 0)
+
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('match.txt'), 0, 0, (0, 0), None, 'rum-bak', None
+        )
+        self.assertTrue(fs._is_possible_match(fs._get_prepared_info()[0]))
+        self.assertEqual(len([r for r in fs.run() if r.match is not None]), 1)
+
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('no_match.txt'), 0, 0, (0, 0), None, 'rum-bak', None
+        )
+        file_info = fs._get_prepared_info()[0]
+        self.assertFalse(fs._is_possible_match(file_info))
+        results = list(fs.run())
+        self.assertEqual(len(results), 1)
+        self.assertIsNone(results[0].match)
+        self.assertIsNone(results[0].error)
+
+    def test_prefilter_match(self):
+        """Test that the prefilter does not get in the way of matches."""
+
+        self.mktemp('searches.txt', content=b'search1\r\nsearch2\r\n')
+
+        search_params = rc.Search()
+        search_params.add(r'search1\nsearch2', None, 0)
+        search_params.add(r'h2', None, rc.LITERAL)
+
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, 0, (0, 0), None, 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0].match.lineno, 1)
+        self.assertEqual(results[1].match.lineno, 2)
+
+    def test_prefilter_multibyte(self):
+        """Test that the prefilter is not used with codecs that encode a character in more than one way."""
+
+        # NEC's encoding of `∵` in `cp932`, which also has the JIS encoding `b'\x81\xe6'`.
+        self.mktemp('searches.txt', content=b'\x87\x9a\n')
+
+        search_params = rc.Search()
+        search_params.add('∵', None, rc.LITERAL)
+
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, 0, (0, 0), 'cp932', 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertEqual(len(results), 1)
+        self.assertIsNotNone(results[0].match)
+        self.assertIsNone(rc._get_literal_finder(('∵',), 'cp932', True))
+        self.assertIsNotNone(rc._get_literal_finder(('é',), 'cp1252', True))
+        self.assertIsNone(rc._get_literal_finder(('é',), 'cp875', True))
+
+    def byte_search(self, name, pattern, flags=0, file_flags=0, context=(1, 1)):
+        """Search the file as text and as bytes, and verify the results are the same."""
+
+        search_params = rc.Search()
+        search_params.add(pattern, None, flags)
+
+        results = []
+        for byte_flags in (0, rc.BYTE_SEARCH):
+            fs = rc._FileSearch(
+                search_params, self.get_file_attr(name), 0, file_flags | byte_flags, context, None, 'rum-bak', None
+            )
+            results.append(list(fs.run()))
+            self.assertEqual(fs.byte_codec is not None, bool(byte_flags))
+        self.assertEqual(results[0], results[1])
+        return results[1]
+
+    def test_byte_search(self):
+        """Test searching `UTF-8` as bytes."""
+
+        self.mktemp('searches.txt', content='héllo search1\r\nsearch2 = 3 é\r\n\r\nsearch1\r\n'.encode('utf-8'))
+
+        results = self.byte_search('searches.txt', r'search\d')
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[1].match.lineno, 2)
+        self.assertEqual(results[0].match.colno, 7)
+        self.assertEqual(results[0].match.lines, 'héllo search1\nsearch2 = 3 é')
+
+        self.assertEqual(len(self.byte_search('searches.txt', r'search1', rc.LITERAL, rc.TRUNCATE_LINES)), 2)
+        self.assertEqual(len(self.byte_search('searches.txt', r'search\d', 0, rc.COUNT_ONLY)), 3)
+
+    def test_single_open(self):
+        """Test that a file is opened once for encoding detection, filtering, and searching."""
+
+        self.mktemp('searches.txt', content='héllo search1\r\nsearch2 = 3 é\r\n'.encode('utf-8'))
+
+        file_map = rc._FileMap
+        for flags in (0, rc.BYTE_SEARCH):
+            with mock.patch('rummage.lib.rumcore._FileMap', side_effect=file_map) as mock_map:
+                search_params = rc.Search()
+                search_params.add(r'search\d', None, 0)
+                fs = rc._FileSearch(
+                    search_params, self.get_file_attr('searches.txt'), 0, flags, (0, 0), None, 'rum-bak', None
+                )
+                results = list(fs.run())
+            self.assertEqual(len(results), 2)
+            self.assertEqual(results[1].match.lines, 'search2 = 3 é')
+            self.assertEqual(mock_map.call_count, 1)
+            self.assertIsNone(fs.file_map)
+
+    def test_fast_detect_utf16(self):
+        """Test searching `UTF-16` without a BOM found by the fast detection mode."""
+
+        self.mktemp('searches.txt', content='héllo search1\r\nsearch2\r\n'.encode('utf-16-be'))
+
+        search_params = rc.Search()
+        search_params.add(r'search\d', None, 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, 0, (0, 0), None, 'rum-bak', None,
+            encoding_options={'chardet_mode': rc.text_decode.CHARDET_FAST}
+        )
+        results = list(fs.run())
+        self.assertEqual(results[0].info.encoding, 'UTF-16-BE')
+        self.assertEqual([r.match.lines for r in results], ['héllo search1', 'search2'])
+
+    def test_byte_search_bom(self):
+        """Test searching `UTF-8` with a BOM as bytes."""
+
+        self.mktemp('searches.txt', content=codecs.BOM_UTF8 + 'café search1\nsearch2\n'.encode('utf-8'))
+
+        results = self.byte_search('searches.txt', r'^search\d$', rc.MULTILINE, context=(0, 0))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].match.match, (0, 7))
+
+    def test_byte_search_lone_cr(self):
+        """Test that line anchors find the same matches after lone carriage returns as the text search."""
+
+        self.mktemp('searches.txt', content=b'other\rsearch1\rsearch2\r')
+
+        search_params = rc.Search()
+        search_params.add(r'^search\d', None, rc.MULTILINE)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, rc.BYTE_SEARCH, (0, 0), None, 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertIsNone(fs.byte_codec)
+        self.assertEqual([r.match.lineno for r in results], [2, 3])
+
+    def test_byte_search_fallback(self):
+        """Test that patterns that could match non-ASCII text are not searched as bytes."""
+
+        self.mktemp('searches.txt', content='héllo search1\r\n'.encode('utf-8'))
+
+        search_params = rc.Search()
+        search_params.add(r'h.llo', None, 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, rc.BYTE_SEARCH, (0, 0), None, 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertIsNone(fs.byte_codec)
+        self.assertEqual(results[0].match.lines, 'héllo search1')
+
+    def stream_search(self, name, pattern, flags=0, file_flags=0, context=(1, 1), encoding=None):
+        """Search the file in whole and a window at a time, and verify the results are the same."""
+
+        search_params = rc.Search()
+        search_params.add(pattern, None, flags)
+
+        results = []
+        for stream_flags in (0, rc.STREAM):
+            fs = rc._FileSearch(
+                search_params, self.get_file_attr(name), 0, file_flags | stream_flags, context, encoding,
+                'rum-bak', None, stream_overlap=16
+            )
+            results.append(list(fs.run()))
+        self.assertEqual(results[0], results[1])
+        return results[1]
+
+    @mock.patch('rummage.lib.rumcore.text_decode.SAMPLE_WINDOW', 16)
+    @mock.patch('rummage.lib.rumcore.text_decode.MAX_GUESS_SIZE', 64)
+    @mock.patch('rummage.lib.rumcore.STREAM_WINDOW', 128)
+    @mock.patch('rummage.lib.rumcore.STREAM_SIZE', 0)
+    def test_large_file(self):
+        """Test that text files too large to detect in whole are only searched as text when streamed."""
+
+        self.mktemp('large.txt', content='héllo search\n'.encode('utf-8') * 20)
+
+        search_params = rc.Search()
+        search_params.add('search', None, rc.LITERAL)
+        results = {}
+        for flags in (0, rc.STREAM):
+            fs = rc._FileSearch(search_params, self.get_file_attr('large.txt'), 0, flags, (0, 0), None, 'rum-bak', None)
+            results[flags] = list(fs.run())
+
+        self.assertEqual(len(results[0]), 1)
+        self.assertIsNone(results[0][0].match)
+        self.assertEqual(results[0][0].info.encoding, 'BIN')
+        self.assertEqual(len(results[rc.STREAM]), 20)
+        self.assertEqual(results[rc.STREAM][0].info.encoding, 'UTF-8')
+
+    @mock.patch('rummage.lib.rumcore.STREAM_WINDOW', 128)
+    @mock.patch('rummage.lib.rumcore.STREAM_SIZE', 0)
+    def test_stream_search(self):
+        """Test searching a file a window at a time."""
+
+        self.mktemp(
+            'searches.txt',
+            content=''.join('line %d: héllo search%d\r\n' % (i, i % 3) for i in range(50)).encode('utf-8')
+        )
+
+        results = self.stream_search('searches.txt', r'search[12]\s*line')
+        self.assertEqual(len(results), 32)
+        self.assertEqual(results[-1].match.lineno, 48)
+        self.assertEqual(results[-1].match.colno, 16)
+        self.assertEqual(
+            results[-1].match.lines, 'line 46: héllo search1\nline 47: héllo search2\nline 48: héllo search0'
+        )
+
+        self.assertEqual(len(self.stream_search('searches.txt', r'^line \d+', rc.MULTILINE, context=(3, 2))), 50)
+        self.assertEqual(len(self.stream_search('searches.txt', 'search0', rc.LITERAL, rc.COUNT_ONLY)), 17)
+        self.assertEqual(len(self.stream_search('searches.txt', 'o*', 0, rc.TRUNCATE_LINES, (0, 0))), 1141)
+
+    @mock.patch('rummage.lib.rumcore.STREAM_WINDOW', 128)
+    @mock.patch('rummage.lib.rumcore.STREAM_SIZE', 0)
+    def test_stream_search_chain(self):
+        """Test searching a file a window at a time for every pattern in a chain at once."""
+
+        self.mktemp(
+            'searches.txt',
+            content=''.join('line %d: héllo search%d\r\n' % (i, i % 3) for i in range(50)).encode('utf-8')
+        )
+
+        patterns = ((r'search[12]\s*line', 0), (r'^line \d+', rc.MULTILINE), ('o*', 0))
+
+        def search(patterns, stream_flags):
+            """Search the file for a chain of patterns."""
+
+            search_params = rc.Search()
+            for pattern, flags in patterns:
+                search_params.add(pattern, None, flags)
+            fs = rc._FileSearch(
+                search_params, self.get_file_attr('searches.txt'), 0, stream_flags, (1, 1), None,
+                'rum-bak', None, stream_overlap=16
+            )
+            return list(fs.run())
+
+        # Read in whole, each pattern's matches are reported before the next pattern's.
+        found = [search([pattern], 0) for pattern in patterns]
+        self.assertEqual(search(patterns, 0), found[0] + found[1] + found[2])
+
+        # Streamed, each window's matches are reported a pattern at a time, so the patterns' matches
+        # are interleaved, but each pattern's matches are still found in the same order.
+        results = search(patterns, rc.STREAM)
+        self.assertEqual(len(results), 32 + 50 + 1141)
+        self.assertNotEqual(results, found[0] + found[1] + found[2])
+        pending = [list(f) for f in found]
+        for record in results:
+            self.assertIn(record, [p[0] for p in pending if p])
+            next(p for p in pending if p and p[0] == record).pop(0)
+        self.assertFalse(any(pending))
+
+    @mock.patch('rummage.lib.rumcore.STREAM_WINDOW', 16)
+    @mock.patch('rummage.lib.rumcore.STREAM_SIZE', 0)
+    def test_stream_search_long_lines(self):
+        """Test that context lines longer than a window are left out instead of shown in part."""
+
+        self.mktemp('searches.txt', content=b'before\n' + b'x' * 40 + b'\nsearch\n' + b'y' * 40 + b'\nafter\n')
+
+        search_params = rc.Search()
+        search_params.add('search', None, rc.LITERAL)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, rc.STREAM, (2, 2), None,
+            'rum-bak', None, stream_overlap=4
+        )
+        results = list(fs.run())
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].match.lineno, 3)
+        self.assertEqual(results[0].match.lines, 'search\n' + 'y' * 40)
+        self.assertEqual(results[0].match.match, (0, 6))
+        self.assertEqual(results[0].match.context, (0, 1))
+
+    def test_context_file_end(self):
+        """Test that context at the ends of a file counts only the lines that are there."""
+
+        self.mktemp('searches.txt', content=b'line\nsearch1\nline\nsearch2')
+
+        search_params = rc.Search()
+        search_params.add(r'search\d', None, 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, 0, (3, 3), None, 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertEqual([r.match.context for r in results], [(1, 2), (3, 0)])
+
+    @mock.patch('rummage.lib.rumcore.STREAM_WINDOW', 128)
+    @mock.patch('rummage.lib.rumcore.STREAM_SIZE', 0)
+    def test_stream_search_binary(self):
+        """Test that files that don't decode are searched as binary when streaming."""
+
+        self.mktemp('searches.txt', content=b'search1\nsearch2\xff\xfe\n' * 8)
+
+        results = self.stream_search('searches.txt', r'search\d', encoding='utf-8')
+        self.assertEqual(results[0].info.encoding, 'BIN')
+
+    def test_boolean_chain_search(self):
+        """Test that a boolean search reports one match no matter how many patterns are in the chain."""
+
+        self.mktemp('searches.txt', content=b'search1\nsearch2\n')
+
+        search_params = rc.Search()
+        search_params.add('search1', None, 0)
+        search_params.add('search2', None, 0)
+
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('searches.txt'), 0, rc.BOOLEAN, (0, 0), None, 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].match.lineno, 1)
+
+    @mock.patch('rummage.lib.rumcore.STREAM_WINDOW', 128)
+    @mock.patch('rummage.lib.rumcore.STREAM_SIZE', 0)
+    def test_terms_search(self):
+        """Test searching for a term list."""
+
+        self.mktemp(
+            'searches.txt',
+            content=''.join('line %d: héllo search%d\r\n' % (i, i % 3) for i in range(50)).encode('utf-8')
+        )
+        self.mktemp('terms.txt', content=b'\xef\xbb\xbfsearch1\r\n\r\nline 4\r\nh\xc3\xa9llo search2\r\n')
+        terms = rc.read_terms(self.norm('terms.txt'))
+        self.assertEqual(terms, 'search1\nline 4\nhéllo search2')
+
+        results = self.stream_search('searches.txt', terms, rc.TERMS)
+        self.assertEqual(len(results), 17 + 11 + 16)
+        self.assertEqual([r.match.term for r in results[:3]], ['search1', 'héllo search2', 'line 4'])
+        self.assertEqual(results[2].match.lineno, 5)
+
+        results = self.byte_search('searches.txt', 'search1\nline 4', rc.TERMS)
+        self.assertEqual(len(results), 17 + 11)
+        self.assertEqual(results[0].match.term, 'search1')
+
+        results = self.stream_search('searches.txt', 'SEARCH1\nLINE 4', rc.TERMS | rc.IGNORECASE, rc.COUNT_ONLY)
+        self.assertEqual(len(results), 17 + 11)
+        self.assertEqual(results[0].match.term, 'SEARCH1')
+
+    def test_terms_replace(self):
+        """Test replacing a term list."""
+
+        self.mktemp('pets.txt', content=b'a dog in the catalog, a cat')
+
+        search_params = rc.Search(True)
+        search_params.add('cat\ndog\ncatalog', r'\1 pet', rc.TERMS)
+        fs = rc._FileSearch(search_params, self.get_file_attr('pets.txt'), 0, 0, (0, 0), None, 'rum-bak', None)
+        results = list(fs.run())
+        self.assertEqual([r.match.term for r in results], ['dog', 'catalog', 'cat'])
+        with open(self.norm('pets.txt'), 'rb') as f:
+            self.assertEqual(f.read(), br'a \1 pet in the \1 pet, a \1 pet')
+
+    def test_patch_replace(self):
+        """Test that only the matches are written when the rest of the file can be copied as it is."""
+
+        self.mktemp('versions.txt', content=b'\xef\xbb\xbfversion 1.0\nother 1.0\n')
+        os.chmod(self.norm('versions.txt'), 0o640)
+
+        search_params = rc.Search(True)
+        search_params.add(r'(?<=version )1\.0', '2.0.0', 0)
+        fs = rc._FileSearch(search_params, self.get_file_attr('versions.txt'), 0, 0, (0, 0), None, 'rum-bak', None)
+        copy = rc._writer.ReplaceWriter.copy
+        with mock.patch.object(rc._writer.ReplaceWriter, 'copy', autospec=True, side_effect=copy) as m:
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        self.assertEqual([c.args[1:] for c in m.call_args_list], [(0, 11), (14, 25)])
+        with open(self.norm('versions.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'\xef\xbb\xbfversion 2.0.0\nother 1.0\n')
+        self.assertEqual(os.stat(self.norm('versions.txt')).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.tempdir), ['versions.txt'])
+
+    def test_replace_long_name(self):
+        """Test replacing in a file whose name is as long as names can be."""
+
+        name = 'n' * 251 + '.txt'
+        self.mktemp(name, content=b'search\n')
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        fs = rc._FileSearch(search_params, self.get_file_attr(name), 0, 0, (0, 0), None, 'rum-bak', None)
+        results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        with open(self.norm(name), 'rb') as f:
+            self.assertEqual(f.read(), b'found\n')
+        self.assertEqual(os.listdir(self.tempdir), [name])
+
+    def test_patch_in_place(self):
+        """Test that large files are patched in place when each replacement is as long as its match."""
+
+        content = b'id=0x0000\n' + b'x' * (rc._writer.mmap.PAGESIZE * 2) + b'id=0x0000\n'
+        self.mktemp('ids.txt', content=content)
+        inode = os.stat(self.norm('ids.txt')).st_ino
+
+        search_params = rc.Search(True)
+        search_params.add('0x0000', '0xBEEF', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('ids.txt'), 0, rc.BACKUP, (0, 0), None, 'rum-bak', None
+        )
+        with mock.patch.object(rc, 'PATCH_SIZE', 0), mock.patch.object(rc._writer, 'ReplaceWriter') as writer:
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        self.assertFalse(writer.called)
+        with open(self.norm('ids.txt'), 'rb') as f:
+            self.assertEqual(f.read(), content.replace(b'0x0000', b'0xBEEF'))
+        with open(self.norm('ids.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(os.stat(self.norm('ids.txt')).st_ino, inode)
+
+        # Replacements of another length rewrite the file.
+        search_params = rc.Search(True)
+        search_params.add('0xBEEF', '0xDEADBEEF', 0)
+        fs = rc._FileSearch(search_params, self.get_file_attr('ids.txt'), 0, 0, (0, 0), None, 'rum-bak', None)
+        with mock.patch.object(rc, 'PATCH_SIZE', 0), mock.patch.object(rc._writer, 'patch') as patch:
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        self.assertFalse(patch.called)
+        with open(self.norm('ids.txt'), 'rb') as f:
+            self.assertEqual(f.read(), content.replace(b'0x0000', b'0xDEADBEEF'))
+
+    def test_patch_byte_replace(self):
+        """Test that matches of the raw bytes are replaced without decoding the file."""
+
+        content = 'héllo\r\nversion 1 é\r\nversion 22\r\n'
+        self.mktemp('versions.txt', content=content.encode('utf-8'))
+
+        search_params = rc.Search(True)
+        search_params.add(r'version (\d+)', r'vérsion \1.0', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('versions.txt'), 0, rc.BYTE_SEARCH, (0, 0), None, 'rum-bak', None
+        )
+        copy = rc._writer.ReplaceWriter.copy
+        with mock.patch.object(rc, '_RummageFileContent') as text, \
+                mock.patch.object(rc._writer.ReplaceWriter, 'copy', autospec=True, side_effect=copy) as m:
+            results = list(fs.run())
+        self.assertFalse(text.called)
+        self.assertIsNone(results[0].error)
+        self.assertEqual([r.match.match for r in results], [(6, 15), (18, 28)])
+        self.assertEqual([c.args[1:] for c in m.call_args_list], [(0, 8), (17, 22), (32, 34)])
+        with open(self.norm('versions.txt'), 'rb') as f:
+            self.assertEqual(f.read(), 'héllo\r\nvérsion 1.0 é\r\nvérsion 22.0\r\n'.encode('utf-8'))
+
+        # Single byte encodings are patched in place when the replacements are as long as their matches.
+        content = 'ñame=0x0000\r\n'.encode('cp1252') * 4
+        self.mktemp('ids.txt', content=content)
+        inode = os.stat(self.norm('ids.txt')).st_ino
+        search_params = rc.Search(True)
+        search_params.add('0x0000', '0xBEEF', rc.LITERAL)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('ids.txt'), 0, rc.BYTE_SEARCH, (0, 0),
+            'cp1252', 'rum-bak', None
+        )
+        with mock.patch.object(rc, 'PATCH_SIZE', 0), mock.patch.object(rc, '_RummageFileContent') as text:
+            results = list(fs.run())
+        self.assertFalse(text.called)
+        self.assertEqual(len(results), 4)
+        with open(self.norm('ids.txt'), 'rb') as f:
+            self.assertEqual(f.read(), content.replace(b'0x0000', b'0xBEEF'))
+        self.assertEqual(os.stat(self.norm('ids.txt')).st_ino, inode)
+
+        # Templates with escapes that could expand differently from the bytes are replaced from the text.
+        template = rc._get_byte_template(r'\\ \g<name> \1é', 'utf-8')
+        self.assertEqual(template, [b'\\', b' ', 'name', b' ', 1, 'é'.encode('utf-8')])
+        self.assertIsNone(rc._get_byte_template(r'\1\n', 'utf-8'))
+        self.assertIsNone(rc._get_byte_template('ü', 'ascii'))
+
+    def test_backup_link(self):
+        """Test that the original file becomes the backup when it can't be cloned."""
+
+        self.mktemp('names.txt', content=b'name = old\n')
+        inode = os.stat(self.norm('names.txt')).st_ino
+
+        search_params = rc.Search(True)
+        search_params.add('old', 'new', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('names.txt'), 0, rc.BACKUP | rc.BACKUP_LINK, (0, 0), None,
+            'rum-bak', None
+        )
+        error = OSError(errno.EOPNOTSUPP, 'Not supported')
+        with mock.patch.object(rc._writer, 'clone', side_effect=error), mock.patch('shutil.copy2') as copy:
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        self.assertFalse(copy.called)
+        with open(self.norm('names.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'name = new\n')
+        with open(self.norm('names.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'name = old\n')
+        self.assertEqual(os.stat(self.norm('names.txt.rum-bak')).st_ino, inode)
+        self.assertEqual(sorted(os.listdir(self.tempdir)), ['names.txt', 'names.txt.rum-bak'])
+
+    def test_backup_link_patch(self):
+        """Test that files patched in place are cloned or copied as backups, as a link would change with them."""
+
+        self.mktemp('ids.txt', content=b'id=0x0000\n')
+        inode = os.stat(self.norm('ids.txt')).st_ino
+
+        search_params = rc.Search(True)
+        search_params.add('0x0000', '0xBEEF', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('ids.txt'), 0, rc.BACKUP | rc.BACKUP_FOLDER | rc.BACKUP_LINK, (0, 0),
+            None, '.rum-bak', None
+        )
+        error = OSError(errno.EOPNOTSUPP, 'Not supported')
+        with mock.patch.object(rc, 'PATCH_SIZE', 0), mock.patch.object(rc._writer, 'clone', side_effect=error):
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        self.assertEqual(os.stat(self.norm('ids.txt')).st_ino, inode)
+        with open(self.norm('.rum-bak', 'ids.txt.bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'id=0x0000\n')
+
+    def test_backup_clone(self):
+        """Test that files are cloned as backups where they can be."""
+
+        self.mktemp('names.txt', content=b'name = old\n')
+
+        search_params = rc.Search(True)
+        search_params.add('old', 'new', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('names.txt'), 0, rc.BACKUP | rc.BACKUP_LINK, (0, 0), None,
+            'rum-bak', None
+        )
+        with mock.patch.object(rc._writer, 'clone', side_effect=shutil.copy2) as clone, \
+                mock.patch.object(rc._writer, 'link') as link:
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        self.assertEqual(clone.call_count, 1)
+        self.assertFalse(link.called)
+        with open(self.norm('names.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'name = old\n')
+
+    def test_patch_pages(self):
+        """Test that only the pages edits touch are flushed."""
+
+        page = rc._writer.mmap.PAGESIZE
+        edits = [(1, 3, b''), (5, 7, b''), (page + 1, page + 2, b''), (page * 3, page * 3 + 1, b'')]
+        self.assertEqual(rc._writer._get_pages(edits), [[0, 7], [page, page + 2], [page * 3, page * 3 + 1]])
+
+    def test_replace_error_keeps_file(self):
+        """Test that a replace that fails leaves the file as it was."""
+
+        self.mktemp('prices.txt', content='caf\xe9 5 EUR\n'.encode('latin-1'))
+
+        search_params = rc.Search(True)
+        search_params.add('EUR', '€', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('prices.txt'), 0, 0, (0, 0), 'latin-1', 'rum-bak', None
+        )
+        results = list(fs.run())
+        self.assertIsNotNone(results[-1].error)
+        with open(self.norm('prices.txt'), 'rb') as f:
+            self.assertEqual(f.read(), 'caf\xe9 5 EUR\n'.encode('latin-1'))
+        self.assertEqual(os.listdir(self.tempdir), ['prices.txt'])
+
+    def test_replace_copy_fallback(self):
+        """Test that spans are still copied when the kernel can't copy them."""
+
+        self.mktemp('data.bin', content=b'\x00\x01abc\x00\x02')
+
+        search_params = rc.Search(True)
+        search_params.add('abc', 'xyz', 0)
+        fs = rc._FileSearch(
+            search_params, self.get_file_attr('data.bin'), 0, rc.PROCESS_BINARY, (0, 0), None, 'rum-bak', None
+        )
+        error = OSError(errno.ENOSYS, 'Not supported')
+        with mock.patch.object(rc._writer, 'COPY_METHODS', (mock.Mock(side_effect=error), rc._writer._read_write)):
+            results = list(fs.run())
+        self.assertIsNone(results[0].error)
+        with open(self.norm('data.bin'), 'rb') as f:
+            self.assertEqual(f.read(), b'\x00\x01xyz\x00\x02')
+
     def test_literal_chain_search(self):
         """Test for literal search."""
 
@@ -1303,3 +2071,581 @@ class TestFileSearch(_FileTest):
 
         with open(self.norm('searches.txt'), 'rb') as f:
             self.assertEqual(f.read(), after)
+
+
+class TestRummage(_FileTest):
+    """Test the `Rummage` search object."""
+
+    def setUp(self):
+        """Setup the tests."""
+
+        _FileTest.setUp(self)
+        for x in range(40):
+            self.mktemp(
+                'folder%d' % (x % 3), 'file%02d.txt' % x,
+                content=('search%d\nsearch\nother\n' % x).encode('ascii')
+            )
+
+    def get_matches(self, results):
+        """Get the file name and match position of each match record."""
+
+        return [
+            (os.path.basename(r.info.name), r.match.lineno, r.match.colno)
+            for r in results if isinstance(r, rc.FileRecord) and r.match is not None
+        ]
+
+    def find(self, workers=None, max_count=None, flags=0, walkers=None):
+        """Find matches."""
+
+        search_params = rc.Search()
+        search_params.add('search', None, rc.LITERAL)
+        return list(
+            rc.Rummage(
+                self.tempdir,
+                search_params,
+                file_pattern='*.txt',
+                flags=rc.RECURSIVE | flags,
+                max_count=max_count,
+                workers=workers,
+                walkers=walkers
+            ).find()
+        )
+
+    def test_file_info(self):
+        """Test that searched files have their size and times, whether searched in a folder or directly."""
+
+        for target in (self.tempdir, self.norm('folder0', 'file00.txt')):
+            search_params = rc.Search()
+            search_params.add('search', None, rc.LITERAL)
+            results = list(rc.Rummage(target, search_params, file_pattern='*.txt', flags=rc.RECURSIVE).find())
+            self.assertTrue(all(r.error is None for r in results))
+            self.assertEqual(results[0].info.size, os.path.getsize(results[0].info.name))
+            self.assertIsNotNone(results[0].info.modified)
+
+    def test_parallel(self):
+        """Test that a parallel search gives the same results as a serial search."""
+
+        serial = self.find()
+        parallel = self.find(workers=2)
+
+        self.assertEqual(len(self.get_matches(serial)), 80)
+        self.assertEqual(sorted(self.get_matches(serial)), sorted(self.get_matches(parallel)))
+        self.assertEqual(self.get_matches(parallel), self.get_matches(self.find(workers=2)))
+        self.assertTrue(all(r.error is None for r in parallel))
+
+    def test_parallel_walk(self):
+        """Test that a search that walks folders with threads finds the same matches."""
+
+        serial = self.find()
+        walked = self.find(walkers=4, flags=rc.PIPELINE)
+        self.assertEqual(sorted(self.get_matches(serial)), sorted(self.get_matches(walked)))
+
+    def test_snapshot(self):
+        """Test that a rerun with a snapshot only searches the files that changed."""
+
+        # Changes made in the same clock tick as a search aren't trusted, so make everything older.
+        past = datetime.datetime.now().timestamp() - 60
+        for base, dirs, files in os.walk(self.tempdir):
+            for name in dirs + files:
+                os.utime(os.path.join(base, name), (past, past))
+        os.utime(self.tempdir, (past, past))
+
+        snapshot = os.path.abspath(util.TESTFN + '_snapshot')
+        self.addCleanup(shutil.rmtree, snapshot, True)
+
+        def find():
+            """Find matches with a snapshot and count the files searched."""
+
+            search_params = rc.Search()
+            search_params.add('search', None, rc.LITERAL)
+            with mock.patch.object(rc._FileSearch, 'run', autospec=True, side_effect=rc._FileSearch.run) as run:
+                results = list(
+                    rc.Rummage(
+                        self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE, snapshot=snapshot
+                    ).find()
+                )
+            return results, run.call_count
+
+        serial = self.find()
+        results, searched = find()
+        self.assertEqual(searched, 40)
+        self.assertEqual(self.get_matches(results), self.get_matches(serial))
+
+        results, searched = find()
+        self.assertEqual(searched, 0)
+        self.assertEqual(self.get_matches(results), self.get_matches(serial))
+        self.assertEqual([r.info.id for r in results], [r.info.id for r in serial])
+
+        with open(self.norm('folder1', 'file01.txt'), 'w') as f:
+            f.write('other\nsearch\n')
+        os.utime(self.norm('folder1', 'file01.txt'), (past + 1, past + 1))
+        results, searched = find()
+        self.assertEqual(searched, 1)
+        self.assertIn(('file01.txt', 2, 1), self.get_matches(results))
+        self.assertEqual(len(self.get_matches(results)), 79)
+
+    def watch(self, poll):
+        """Watch a search while files change, and get the changes."""
+
+        search_params = rc.Search()
+        search_params.add('search', None, rc.LITERAL)
+        rummage = rc.Rummage(self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE)
+        ids = {r.info.name: r.info.id for r in rummage.find()}
+
+        changes = []
+        thread = threading.Thread(target=rummage.watch, args=(changes.append,), kwargs={'interval': 0.1, 'poll': poll})
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(rummage.kill)
+
+        def wait(count):
+            """Wait for the changes to be reported."""
+
+            end = time.monotonic() + 10
+            while len(changes) < count and time.monotonic() < end:
+                time.sleep(0.05)
+            self.assertEqual(len(changes), count)
+            return changes[-1]
+
+        # Give the watch time to start.
+        time.sleep(0.3)
+        # Replace the file all at once, so the change isn't seen in the middle of the write.
+        with open(self.norm('folder1', 'file01.tmp'), 'w') as f:
+            f.write('other\nsearch\nsearch\n')
+        os.replace(self.norm('folder1', 'file01.tmp'), self.norm('folder1', 'file01.txt'))
+        change = wait(1)
+        self.assertEqual(change.name, os.path.abspath(self.norm('folder1', 'file01.txt')))
+        self.assertFalse(change.removed)
+        file_id = ids[change.name]
+        self.assertEqual([(r.info.id, r.match.lineno) for r in change.records], [(file_id, 2), (file_id, 3)])
+
+        os.remove(self.norm('folder2', 'file02.txt'))
+        change = wait(2)
+        self.assertEqual(change.name, os.path.abspath(self.norm('folder2', 'file02.txt')))
+        self.assertEqual((change.records, change.removed), ([], True))
+
+        # Files that aren't searched are ignored, while files in new folders are searched.
+        self.mktemp('folder3', 'skip.log', content=b'search\n')
+        self.mktemp('folder3', 'sub', 'file40.tmp', content=b'search\n')
+        os.replace(self.norm('folder3', 'sub', 'file40.tmp'), self.norm('folder3', 'sub', 'file40.txt'))
+        change = wait(3)
+        self.assertEqual(change.name, os.path.abspath(self.norm('folder3', 'sub', 'file40.txt')))
+        self.assertEqual(len(change.records), 1)
+        self.assertGreater(change.records[0].info.id, max(ids.values()))
+
+        rummage.kill()
+        thread.join()
+        self.assertEqual(len(changes), 3)
+
+    def test_encoding_cache(self):
+        """Test that the encodings of unchanged files are only detected once, whether searched in serial or parallel."""
+
+        past = datetime.datetime.now().timestamp() - 60
+        for base, _dirs, files in os.walk(self.tempdir):
+            for name in files:
+                os.utime(os.path.join(base, name), (past, past))
+
+        cache = os.path.abspath(util.TESTFN + '_encodings')
+        self.addCleanup(os.remove, cache)
+
+        def find(workers=None):
+            """Find matches with an encoding cache and count the encodings detected in this process."""
+
+            search_params = rc.Search()
+            search_params.add('search', None, rc.LITERAL)
+            with mock.patch.object(rc.text_decode, 'mguess', side_effect=rc.text_decode.mguess) as mguess:
+                results = list(
+                    rc.Rummage(
+                        self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE,
+                        workers=workers, encoding_cache=cache
+                    ).find()
+                )
+            self.assertTrue(all(r.error is None for r in results))
+            return results, mguess.call_count
+
+        serial = self.find()
+        results, detected = find(workers=2)
+        self.assertEqual(self.get_matches(results), self.get_matches(serial))
+        saved = rc._encoding_cache.EncodingCache(cache, rc.text_decode.DEFAULT_ENCODING_OPTIONS)
+        self.assertEqual(len(saved.entries), 40)
+
+        results, detected = find()
+        self.assertEqual(detected, 0)
+        self.assertEqual(self.get_matches(results), self.get_matches(serial))
+        self.assertTrue(all(r.info.encoding == 'ASCII' for r in results))
+
+        with open(self.norm('folder1', 'file01.txt'), 'wb') as f:
+            f.write('other\nsearch é\n'.encode('utf-8'))
+        os.utime(self.norm('folder1', 'file01.txt'), (past + 1, past + 1))
+        results, detected = find()
+        self.assertEqual(detected, 1)
+        self.assertEqual([r.info.encoding for r in results if r.info.name.endswith('file01.txt')], ['UTF-8'])
+
+    def test_encoding_cache_eviction(self):
+        """Test that the least recently used encodings are dropped when the cache is full."""
+
+        cache = rc._encoding_cache.EncodingCache(util.TESTFN + '_encodings', {}, max_entries=2)
+        past = datetime.datetime.now().timestamp() - 60
+        stats = []
+        for x in range(3):
+            name = self.norm('folder0', 'file%02d.txt' % (x * 3))
+            os.utime(name, (past, past))
+            stats.append(os.stat(name))
+
+        cache.set(stats[0], rc.text_decode.Encoding('ascii', None))
+        cache.set(stats[1], rc.text_decode.Encoding('utf-8', None))
+        self.assertEqual(cache.get(stats[0]), ('ascii', None))
+        cache.set(stats[2], rc.text_decode.Encoding('cp1252', None))
+        self.assertIsNone(cache.get(stats[1]))
+        self.assertEqual(cache.get(stats[0]), ('ascii', None))
+
+        # Files modified since the cache was loaded aren't kept.
+        os.utime(self.norm('folder0', 'file00.txt'))
+        cache.set(os.stat(self.norm('folder0', 'file00.txt')), rc.text_decode.Encoding('ascii', None))
+        self.assertIsNone(cache.get(os.stat(self.norm('folder0', 'file00.txt'))))
+
+    def test_encoding_priors(self):
+        """Test that files like ones already detected are only verified."""
+
+        with mock.patch.object(rc.text_decode, 'mguess', side_effect=rc.text_decode.mguess) as mguess:
+            results = self.find(flags=rc.ENCODING_PRIORS)
+        self.assertEqual(mguess.call_count, 3 * rc.text_decode.PRIOR_THRESHOLD)
+        self.assertEqual(self.get_matches(results), self.get_matches(self.find()))
+        self.assertTrue(all(r.info.encoding == 'ASCII' for r in results))
+
+    def replace_journal(self, journal, workers=None):
+        """Replace in all the files, keeping what changed in a journal."""
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE | rc.BACKUP | rc.BACKUP_JOURNAL,
+            workers=workers, journal=journal
+        )
+        results = list(rummage.find())
+        self.assertTrue(all(r.error is None for r in results))
+        return rummage.journal_run
+
+    def test_journal(self):
+        """Test that a replace run can be restored from its journal."""
+
+        self.mktemp('folder0', 'file40.txt', content='search é\r\nsearch\r\n'.encode('utf-8'))
+        past = datetime.datetime.now().timestamp() - 60
+        os.utime(self.norm('folder0', 'file00.txt'), (past, past))
+        journal = os.path.abspath(util.TESTFN + '_journal')
+        self.addCleanup(shutil.rmtree, journal, True)
+
+        run = self.replace_journal(journal, workers=2)
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'found0\nfound\nother\n')
+        self.assertFalse(any(name.endswith('.rum-bak') for name in os.listdir(self.norm('folder0'))))
+        self.assertEqual([(r[0], r[2]) for r in rc.get_journal_runs(journal)], [(run, 41)])
+
+        self.assertEqual(rc.restore_journal_run(journal, run), [])
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+        with open(self.norm('folder0', 'file40.txt'), 'rb') as f:
+            self.assertEqual(f.read(), 'search é\r\nsearch\r\n'.encode('utf-8'))
+        self.assertEqual(int(os.stat(self.norm('folder0', 'file00.txt')).st_mtime), int(past))
+        self.assertEqual(rc.get_journal_runs(journal), [])
+
+    def test_journal_span(self):
+        """Test that a file written out in whole only keeps the span that changed in the journal."""
+
+        # Text that isn't ASCII is written out in whole.
+        content = 'é\n'.encode('utf-8') * 1000 + b'search\n' + b'other\n' * 1000
+        self.mktemp('big.txt', content=content)
+        journal = os.path.abspath(util.TESTFN + '_journal')
+        self.addCleanup(shutil.rmtree, journal, True)
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='big.txt', flags=rc.RECURSIVE | rc.BACKUP | rc.BACKUP_JOURNAL,
+            journal=journal
+        )
+        self.assertTrue(all(r.error is None for r in rummage.find()))
+
+        records = list(rc._journal._iter_records(os.path.join(journal, rummage.journal_run)))
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0][3], [(3000, 5, b'search')])
+
+        self.assertEqual(rc.restore_journal_run(journal, rummage.journal_run), [])
+        with open(self.norm('big.txt'), 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_journal_changed(self):
+        """Test that files changed since a replace run aren't restored, and that a run can be discarded."""
+
+        journal = os.path.abspath(util.TESTFN + '_journal')
+        self.addCleanup(shutil.rmtree, journal, True)
+
+        run = self.replace_journal(journal)
+        with open(self.norm('folder1', 'file01.txt'), 'ab') as f:
+            f.write(b'more\n')
+
+        errors = rc.restore_journal_run(journal, run)
+        self.assertEqual([name for name, _ in errors], [os.path.abspath(self.norm('folder1', 'file01.txt'))])
+        self.assertIsInstance(errors[0][1], rc._journal.JournalError)
+        with open(self.norm('folder1', 'file01.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'found1\nfound\nother\nmore\n')
+        with open(self.norm('folder1', 'file04.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search4\nsearch\nother\n')
+
+        rc.discard_journal_run(journal, run)
+        self.assertEqual(rc.get_journal_runs(journal), [])
+
+    def replace_transaction(self, flags=0, workers=None):
+        """Replace in all the files in one transaction, and return the results."""
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE | rc.TRANSACTION | flags,
+            workers=workers
+        )
+        return list(rummage.find())
+
+    def get_names(self):
+        """Get the names of every file in the temp folder."""
+
+        return sorted(os.path.join(root, name) for root, _, files in os.walk(self.tempdir) for name in files)
+
+    def test_transaction(self):
+        """Test that a transactional replace swaps in every file, with the originals as the backups."""
+
+        inode = os.stat(self.norm('folder0', 'file00.txt')).st_ino
+
+        results = self.replace_transaction(rc.BACKUP | rc.BACKUP_LINK, workers=2)
+        self.assertTrue(all(r.error is None for r in results))
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'found0\nfound\nother\n')
+        with open(self.norm('folder0', 'file00.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+        self.assertEqual(os.stat(self.norm('folder0', 'file00.txt.rum-bak')).st_ino, inode)
+        self.assertFalse(any(name.endswith(rc._writer.TEMP_SUFFIX) for name in self.get_names()))
+
+    def test_transaction_backup(self):
+        """Test that a transactional replace moves staged backups over earlier ones when it commits."""
+
+        self.mktemp('folder0', 'file00.txt.rum-bak', content=b'earlier\n')
+
+        results = self.replace_transaction(rc.BACKUP, workers=2)
+        self.assertTrue(all(r.error is None for r in results))
+        with open(self.norm('folder0', 'file00.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+        self.assertFalse(any(name.endswith(rc._writer.TEMP_SUFFIX) for name in self.get_names()))
+
+    def test_transaction_long_names(self):
+        """Test that files whose long names start the same get backups of their own."""
+
+        names = ['a_very_long_shared_file_name_prefix_%d.txt' % i for i in range(2)]
+        for i, name in enumerate(names):
+            self.mktemp('long', name, content=b'search%d\n' % i)
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.norm('long'), search_params, file_pattern='*.txt',
+            flags=rc.RECURSIVE | rc.TRANSACTION | rc.BACKUP | rc.BACKUP_FOLDER, backup_location='.rum-bak'
+        )
+        results = list(rummage.find())
+        self.assertTrue(all(r.error is None for r in results))
+        for i, name in enumerate(names):
+            with open(self.norm('long', name), 'rb') as f:
+                self.assertEqual(f.read(), b'found%d\n' % i)
+            with open(self.norm('long', '.rum-bak', name + '.bak'), 'rb') as f:
+                self.assertEqual(f.read(), b'search%d\n' % i)
+        self.assertFalse(any(name.endswith(rc._writer.TEMP_SUFFIX) for name in self.get_names()))
+
+    def test_transaction_rollback(self):
+        """Test that no file is replaced if one fails, and that earlier backups are kept."""
+
+        self.mktemp('folder0', 'file00.txt.rum-bak', content=b'earlier\n')
+        names = self.get_names()
+        copy = rc._writer.ReplaceWriter.copy
+
+        def fail(writer, start, end):
+            """Fail to replace one of the files."""
+
+            if writer.name.endswith('file13.txt'):
+                raise OSError(errno.EIO, 'Failed')
+            copy(writer, start, end)
+
+        with mock.patch.object(rc._writer.ReplaceWriter, 'copy', autospec=True, side_effect=fail):
+            results = self.replace_transaction(rc.BACKUP)
+        self.assertEqual(
+            [r.info.name for r in results if r.error is not None], [os.path.abspath(self.norm('folder1', 'file13.txt'))]
+        )
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+        with open(self.norm('folder0', 'file00.txt.rum-bak'), 'rb') as f:
+            self.assertEqual(f.read(), b'earlier\n')
+        self.assertEqual(self.get_names(), names)
+
+    def test_transaction_kill(self):
+        """Test that no file is replaced if the replace is stopped."""
+
+        names = self.get_names()
+        journal = os.path.abspath(util.TESTFN + '_journal')
+        self.addCleanup(shutil.rmtree, journal, True)
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='*.txt',
+            flags=rc.RECURSIVE | rc.TRANSACTION | rc.BACKUP | rc.BACKUP_JOURNAL, journal=journal
+        )
+        for _ in rummage.find():
+            rummage.kill()
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+        self.assertEqual(self.get_names(), names)
+        self.assertEqual(rc.get_journal_runs(journal), [])
+
+    def test_transaction_close(self):
+        """Test that no file is replaced, and nothing is left behind, if the replace is closed early."""
+
+        names = self.get_names()
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE | rc.TRANSACTION | rc.BACKUP
+        )
+        results = rummage.find()
+        # Each file has two matches, so the first file is waiting in the transaction by the third.
+        for _ in range(3):
+            next(results)
+        self.assertNotEqual(self.get_names(), names)
+        rummage.kill()
+        results.close()
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+        self.assertEqual(self.get_names(), names)
+
+    def test_transaction_cleanup_error(self):
+        """Test that files stay replaced, and keep their journal, if what is left after the swap fails."""
+
+        journal = os.path.abspath(util.TESTFN + '_journal')
+        self.addCleanup(shutil.rmtree, journal, True)
+        remove = os.remove
+
+        def fail(name):
+            """Fail to remove the kept originals."""
+
+            if name.endswith(rc._writer.TEMP_SUFFIX):
+                raise OSError(errno.EIO, 'Failed')
+            remove(name)
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='*.txt',
+            flags=rc.RECURSIVE | rc.TRANSACTION | rc.BACKUP | rc.BACKUP_JOURNAL, journal=journal
+        )
+        with mock.patch.object(rc._writer.os, 'remove', side_effect=fail):
+            results = list(rummage.find())
+        errors = [r for r in results if isinstance(r, rc.ErrorRecord)]
+        self.assertEqual(len(errors), 1)
+        self.assertIn('CleanupError', errors[0].error[0])
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'found0\nfound\nother\n')
+
+        self.assertEqual([r[0] for r in rc.get_journal_runs(journal)], [rummage.journal_run])
+        self.assertEqual(rc.restore_journal_run(journal, rummage.journal_run), [])
+        with open(self.norm('folder0', 'file00.txt'), 'rb') as f:
+            self.assertEqual(f.read(), b'search0\nsearch\nother\n')
+
+    def test_transaction_commit_error(self):
+        """Test that files already swapped in are put back if another can't be."""
+
+        for name in ('a.txt', 'b.txt'):
+            self.mktemp(name, content=b'old\n')
+        transaction = rc._writer.Transaction()
+        for name in ('a.txt', 'b.txt'):
+            writer = rc._writer.ReplaceWriter(self.norm(name))
+            writer.write(b'new\n')
+            transaction.add(writer)
+        os.remove(transaction.pending[1][0])
+
+        with self.assertRaises(OSError):
+            transaction.commit()
+        for name in ('a.txt', 'b.txt'):
+            with open(self.norm(name), 'rb') as f:
+                self.assertEqual(f.read(), b'old\n')
+        self.assertFalse(any(name.endswith(rc._writer.TEMP_SUFFIX) for name in os.listdir(self.tempdir)))
+
+    def test_watch(self):
+        """Test watching the searched files by polling."""
+
+        self.watch(True)
+
+    @unittest.skipUnless(rc._watch._get_libc() is not None, "Requires inotify")
+    def test_watch_inotify(self):
+        """Test watching the searched files with `inotify`."""
+
+        self.watch(False)
+
+    def test_watch_replace(self):
+        """Test that replaces can't be watched."""
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE)
+        with self.assertRaises(rc.RummageException):
+            rummage.watch(lambda record: None)
+
+    def test_parallel_max_count(self):
+        """Test that the max count is respected across worker processes."""
+
+        self.assertEqual(len(self.get_matches(self.find(workers=2, max_count=5))), 5)
+
+    def get_replaced(self):
+        """Count the replacements in the files on disk."""
+
+        count = 0
+        for name in self.get_names():
+            with open(name, 'rb') as f:
+                count += f.read().count(b'found')
+        return count
+
+    def test_parallel_replace_max_count(self):
+        """Test that a replace with workers only changes the files on disk up to the max count."""
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(
+            self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE, max_count=3, workers=2
+        )
+        results = list(rummage.find())
+        self.assertEqual(sum(1 for r in results if r.error is None and r.match is not None), 3)
+        self.assertEqual(self.get_replaced(), 3)
+
+    def test_parallel_replace_kill(self):
+        """Test that killing a replace with workers stops it before any more files are changed on disk."""
+
+        search_params = rc.Search(True)
+        search_params.add('search', 'found', rc.LITERAL)
+        rummage = rc.Rummage(self.tempdir, search_params, file_pattern='*.txt', flags=rc.RECURSIVE, workers=2)
+        results = []
+        for result in rummage.find():
+            results.append(result)
+            rummage.kill()
+        self.assertEqual(len(results), 1)
+        # The file being replaced when it was killed is left as it was too.
+        self.assertEqual(self.get_replaced(), 0)
+
+    def test_pipeline(self):
+        """Test that a pipelined search gives the same results as a serial search."""
+
+        serial = self.find()
+        pipeline = self.find(flags=rc.PIPELINE)
+
+        self.assertEqual(self.get_matches(serial), self.get_matches(pipeline))
+        self.assertEqual([r.info.id for r in serial], [r.info.id for r in pipeline])
+
+    def test_pipeline_max_count(self):
+        """Test that the pipeline stops once the max count is reached."""
+
+        self.assertEqual(len(self.get_matches(self.find(max_count=5, flags=rc.PIPELINE))), 5)
@@ -6,6 +6,7 @@ import shutil
 import os
 import textwrap
 import codecs
+import mmap
 from rummage.lib.rumcore import text_decode
 from . import util
 
@@ -459,7 +460,7 @@ class TestSizeGuess(_Encoding):
 
     @mock.patch('rummage.lib.rumcore.text_decode.os.path.getsize')
     def test_too_big(self, mock_size):
-        """Test a file size 30MB or greater."""
+        """Test a file size 30MB or greater, which is detected from samples."""
 
         # Force a fake hit on file being too big
         mock_size.return_value = text_decode.MAX_GUESS_SIZE
@@ -470,7 +471,7 @@ class TestSizeGuess(_Encoding):
                 exámple
                 '''
             ).encode('utf-8'),
-            encoding='bin'
+            encoding='utf-8'
         )
 
     def test_too_small_ascii(self):
@@ -500,6 +501,198 @@ class TestSizeGuess(_Encoding):
         )
 
 
+class TestMappedGuess(_Encoding):
+    """Test guessing the encoding of a file from its memory map."""
+
+    def mguess(self, *parts, content=b'', encoding=None, bom=None):
+        """Guess from the memory map."""
+
+        self.mktemp(*parts, content=content)
+        with open(self.norm(*parts), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                enc = text_decode.mguess(m, os.path.splitext(parts[-1])[1])
+                self.assertEqual(m.tell(), 0)
+        self.assertEqual(enc.encode, encoding)
+        self.assertEqual(enc.bom, bom)
+
+    def test_bom(self):
+        """Test a file with a BOM."""
+
+        self.mguess('utf16.txt', content='exámple'.encode('utf-16'), encoding='utf-16-le', bom=codecs.BOM_UTF16_LE)
+
+    def test_python(self):
+        """Test a Python file with an encoding comment."""
+
+        self.mguess('test.py', content=b'# -*- coding: cp1252 -*-\nex\xe1mple\n', encoding='cp1252')
+
+    def test_binary(self):
+        """Test a binary file."""
+
+        self.mguess('binary.txt', content=b'This is a \x00\x00\x00binary test.\n', encoding='bin')
+
+    def test_empty(self):
+        """Test an empty file, which can't be mapped."""
+
+        self.assertEqual(text_decode.mguess(b'', '.txt').encode, 'ascii')
+        self.assertEqual(text_decode.mguess(b'', '.png').encode, 'bin')
+
+
+class TestFastGuess(_Encoding):
+    """Test the fast encoding detection mode."""
+
+    def setUp(self):
+        """Setup."""
+
+        super().setUp()
+        self.options = {'chardet_mode': text_decode.CHARDET_FAST, 'detect_budget': 1024}
+
+    def test_utf16_no_bom(self):
+        """Test `UTF-16` without a BOM."""
+
+        content = 'exámple text\n' * 20
+        self.guess('utf16.txt', content=content.encode('utf-16-le'), encoding='utf-16-le', options=self.options)
+        self.sguess(content.encode('utf-16-be'), encoding='utf-16-be', options=self.options)
+
+    def test_utf32_no_bom(self):
+        """Test `UTF-32` without a BOM."""
+
+        content = 'exámple text 😀\n' * 20
+        self.guess('utf32.txt', content=content.encode('utf-32-be'), encoding='utf-32-be', options=self.options)
+        self.sguess(content.encode('utf-32-le'), encoding='utf-32-le', options=self.options)
+
+    def test_ascii(self):
+        """Test that ASCII is only reported when all of the content was looked at."""
+
+        self.guess('ascii.txt', content=b'example\n' * 100, encoding='ascii', options=self.options)
+        self.guess('long.txt', content=b'example\n' * 200, encoding='utf-8', options=self.options)
+
+    def test_utf8_cut_off(self):
+        """Test `UTF-8` with a character cut off by the end of the sample."""
+
+        content = b'x' + 'é'.encode('utf-8') * 1000
+        self.guess('utf8.txt', content=content, encoding='utf-8', options=self.options)
+
+    def test_binary(self):
+        """Test binary content."""
+
+        self.sguess(b'This is a \x00\x00\x00binary test.\n' * 10, encoding='bin', options=self.options)
+
+    @mock.patch('rummage.lib.rumcore.text_decode.DetectEncoding')
+    def test_chardet_budget(self, mock_detect):
+        """Test that `chardet` is only fed the sample."""
+
+        instance = mock_detect.return_value
+        instance.done = False
+        instance.result = {'encoding': 'cp1252', 'confidence': 0.9}
+        content = 'exámple text\n'.encode('cp1252') * 1000
+        self.guess('cp1252.txt', content=content, encoding='cp1252', options=self.options)
+        self.assertEqual(sum(len(c[0][0]) for c in instance.feed.call_args_list), 1024)
+
+
+@mock.patch('rummage.lib.rumcore.text_decode.SAMPLE_WINDOW', 16)
+@mock.patch('rummage.lib.rumcore.text_decode.MAX_GUESS_SIZE', 64)
+class TestSampleGuess(_Encoding):
+    """Test detecting the encoding of very large files from samples."""
+
+    def test_utf8(self):
+        """Test `UTF-8` where the samples start part way into characters."""
+
+        self.guess('utf8.txt', content='é'.encode('utf-8') * 33 + b'x', encoding='utf-8')
+        self.guess('utf8.txt', content='€'.encode('utf-8') * 33, encoding='utf-8')
+        self.assertEqual(text_decode.mguess('€'.encode('utf-8') * 33, '.txt').encode, 'utf-8')
+
+    def test_utf16(self):
+        """Test `UTF-16` without a BOM, where the samples need to be aligned."""
+
+        self.guess('utf16.txt', content=('exámple text\n' * 5).encode('utf-16-le'), encoding='utf-16-le')
+
+    def test_bad_middle(self):
+        """Test content that only fails to decode in the middle."""
+
+        self.guess('bad.txt', content=b'a' * 40 + b'\xe9' + b'a' * 40, encoding='bin')
+
+    def test_bad_end(self):
+        """Test content that ends part way into a character."""
+
+        self.sguess(b'a' * 80 + 'é'.encode('utf-8')[:1], encoding='bin')
+
+    def test_binary(self):
+        """Test binary content."""
+
+        self.guess('binary.txt', content=b'\x00\x01\x02\x03' * 20, encoding='bin')
+
+
+class TestEncodingPriors(_Encoding):
+    """Test learning the encodings of files like each other."""
+
+    def guess(self, priors, name, content):
+        """Guess the encoding with the priors, and get whether it was detected."""
+
+        with mock.patch.object(text_decode, 'mguess', side_effect=text_decode.mguess) as mguess:
+            encoding = priors.guess(content, os.path.join('folder', name))
+        return encoding, bool(mguess.call_count)
+
+    def test_learn(self):
+        """Test that files are only verified once enough like them share an encoding."""
+
+        priors = text_decode.EncodingPriors(threshold=3)
+        content = 'exámple\n'.encode('utf-8') * 100
+        for _ in range(3):
+            self.assertEqual(self.guess(priors, 'file.java', content)[1], True)
+
+        encoding, detected = self.guess(priors, 'file.java', content)
+        self.assertFalse(detected)
+        self.assertEqual(encoding, priors._predict(('folder', '.java')))
+
+        # Other extensions and folders are learned separately.
+        self.assertTrue(self.guess(priors, 'file.txt', content)[1])
+        self.assertIsNone(priors._predict(('other', '.java')))
+
+    def test_verify_fails(self):
+        """Test that a file that doesn't decode with the predicted encoding is detected."""
+
+        priors = text_decode.EncodingPriors(threshold=2)
+        for _ in range(2):
+            self.guess(priors, 'file.txt', 'exámple\n'.encode('utf-8'))
+
+        encoding, detected = self.guess(priors, 'file.txt', 'exámple\n'.encode('utf-16'))
+        self.assertTrue(detected)
+        self.assertEqual(encoding.bom, codecs.BOM_UTF16_LE)
+
+        encoding, detected = self.guess(priors, 'file.txt', b'\x00\x01\x02')
+        self.assertTrue(detected)
+        self.assertEqual(encoding.encode, 'bin')
+
+    def test_single_byte_binary(self):
+        """Test that binary content is detected even if a predicted single-byte encoding decodes it."""
+
+        priors = text_decode.EncodingPriors(threshold=1)
+        priors._learn(('folder', '.txt'), text_decode.Encoding('latin-1', None))
+        self.assertEqual(self.guess(priors, 'file.txt', 'exämple\n'.encode('latin-1')), (('latin-1', None), False))
+
+        encoding, detected = self.guess(priors, 'file.txt', b'\x00\x01\x02\xe4' * 100)
+        self.assertTrue(detected)
+        self.assertEqual(encoding.encode, 'bin')
+
+    def test_ascii(self):
+        """Test that a large file that is only known to be ASCII at the start is read as `UTF-8`."""
+
+        priors = text_decode.EncodingPriors(threshold=1)
+        self.guess(priors, 'file.txt', b'example\n')
+
+        self.assertEqual(self.guess(priors, 'file.txt', b'other\n'), (text_decode.Encoding('ascii', None), False))
+        options = {'detect_budget': 1024}
+        encoding = priors.guess(b'example\n' * 200, os.path.join('folder', 'file.txt'), options)
+        self.assertEqual(encoding.encode, 'utf-8')
+
+    def test_special(self):
+        """Test that file types with their own detection are always detected."""
+
+        priors = text_decode.EncodingPriors(threshold=1)
+        for _ in range(2):
+            self.assertTrue(self.guess(priors, 'file.py', b'# -*- coding: cp1252 -*-\n')[1])
+
+
 class TestChardetGuess(_Encoding):
     """
     Test guessing with `chardet`.
@@ -640,7 +833,7 @@ class TestSizeSguess(_Encoding):
 
     @mock.patch('rummage.lib.rumcore.text_decode._is_very_large')
     def test_too_big(self, mock_size):
-        """Test a file size 30MB or greater."""
+        """Test a file size 30MB or greater, which is detected from samples."""
 
         mock_size.return_value = True
         self.sguess(
@@ -649,7 +842,7 @@ class TestSizeSguess(_Encoding):
                 exámple
                 '''
             ).encode('utf-8'),
-            encoding='bin'
+            encoding='utf-8'
         )
 
     def test_too_small_ascii(self):